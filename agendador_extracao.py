@@ -0,0 +1,212 @@
+import os
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+from concurrent.futures import ProcessPoolExecutor
+
+from extratores.documento_pdf import DocumentoPDF
+from extratores.matriz_curricular_obrigatoria import extrair_matriz_curricular
+from extratores.disciplinas_optativas import extrair_disciplinas_optativas
+from extratores.equivalencia_atv_complementares import extrair_atividades_complementares
+from extratores.matriz_equivalencia_obrigatoria import extrair_equivalencia_obrigatorias
+from extratores.matriz_equivalencia_optativas import extrair_equivalencia_optativas
+from extratores.ementario import extrair_ementario
+from extratores.corpo_docente import extrair_dados_corpo_docente
+from extratores.textosemtabela import extrair_chunks_de_texto
+from extratores.guia_graduacao import extrair_chunks_guia_graduacao
+
+
+def montar_tarefas(arquivo_ppc, arquivo_guia, workers_paginas=1):
+    # A ordem da lista é a ordem em que os resultados chegam ao gerar_chunks.
+    # 'paginas' são os índices (base 0) lidos pelo extrator; None = documento inteiro.
+    # 'intervalo' nomeia o trecho no índice de marcadores; o agendador o resolve em 'paginas'.
+    # 'kwargs' são repassados ao extrator junto com o documento.
+    return [
+        {"nome": "matriz_curricular", "funcao": extrair_matriz_curricular, "arquivo": arquivo_ppc, "intervalo": "matriz_curricular"},
+        {"nome": "disciplinas_optativas", "funcao": extrair_disciplinas_optativas, "arquivo": arquivo_ppc, "intervalo": "disciplinas_optativas"},
+        {"nome": "atividades_complementares", "funcao": extrair_atividades_complementares, "arquivo": arquivo_ppc, "intervalo": "atividades_complementares"},
+        {"nome": "equivalencia_obrigatorias", "funcao": extrair_equivalencia_obrigatorias, "arquivo": arquivo_ppc, "intervalo": "equivalencia_obrigatorias"},
+        {"nome": "equivalencia_optativas", "funcao": extrair_equivalencia_optativas, "arquivo": arquivo_ppc, "intervalo": "equivalencia_optativas"},
+        {"nome": "corpo_docente", "funcao": extrair_dados_corpo_docente, "arquivo": arquivo_ppc, "intervalo": "corpo_docente"},
+        {"nome": "ementario", "funcao": extrair_ementario, "arquivo": arquivo_ppc, "intervalo": "ementario"},
+        {"nome": "texto_corrido", "funcao": extrair_chunks_de_texto, "arquivo": arquivo_ppc, "paginas": None,
+         "kwargs": {"workers": workers_paginas}},
+        {"nome": "guia_graduacao", "funcao": extrair_chunks_guia_graduacao, "arquivo": arquivo_guia, "paginas": None,
+         "abrir_documento": False, "pipeline": 2},
+    ]
+
+
+def descrever_paginas(paginas):
+    if paginas is None:
+        return "documento inteiro"
+    paginas = list(paginas)
+    if not paginas:
+        return "nenhuma página"
+    return f"páginas {paginas[0] + 1}-{paginas[-1] + 1}"
+
+
+def _resolver_intervalos(tarefas, documentos):
+    # Consulta o índice de marcadores de cada documento e fixa as páginas de cada tarefa.
+    inicio = time.perf_counter()
+    for documento in documentos.values():
+        if documento is not None:
+            documento.intervalos()
+    if documentos:
+        print(f"   -- Índice de marcadores construído em {time.perf_counter() - inicio:.2f}s.")
+
+    for tarefa in tarefas:
+        documento = documentos.get(tarefa['arquivo'])
+        if documento is None:
+            continue
+        # Repassado aos workers para que nenhum deles reconstrua o índice.
+        tarefa['intervalos_documento'] = documento.intervalos()
+        if 'intervalo' in tarefa:
+            tarefa['paginas'] = documento.intervalo(tarefa['intervalo'])
+            tarefa.setdefault('kwargs', {})['paginas'] = tarefa['paginas']
+
+
+def _abrir_documentos(tarefas, cache=None):
+    documentos = {}
+    for tarefa in tarefas:
+        arquivo = tarefa['arquivo']
+        if not tarefa.get('abrir_documento', True) or arquivo in documentos:
+            continue
+        if os.path.exists(arquivo):
+            documentos[arquivo] = DocumentoPDF(arquivo, cache=cache)
+        else:
+            documentos[arquivo] = None
+    return documentos
+
+
+def preparar_documentos(tarefas, cache=None):
+    # Abre os documentos e fixa as páginas das tarefas. O resultado pode ser repassado a
+    # executar_tarefas para que as páginas já lidas pelo índice não sejam reinterpretadas.
+    documentos = _abrir_documentos(tarefas, cache)
+    _resolver_intervalos(tarefas, documentos)
+    return documentos
+
+
+def _custo_estimado(tarefa):
+    # Tarefas que leem o documento inteiro vão primeiro para o pool.
+    return float('inf') if tarefa.get('paginas') is None else len(tarefa['paginas'])
+
+
+def _conferir_paginas_lidas(tarefa, paginas_lidas):
+    if tarefa.get('paginas') is None:
+        return
+    fora = sorted(set(paginas_lidas) - set(tarefa['paginas']))
+    if fora:
+        print(f"   -- AVISO: '{tarefa['nome']}' leu páginas fora do intervalo declarado: {[p + 1 for p in fora]}")
+
+
+def _tempo_cpu():
+    # Do processo e dos filhos já encerrados (o pool de páginas do texto corrido). Sem o módulo
+    # resource, só o do processo.
+    if resource is None:
+        return time.process_time()
+    filhos = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + filhos.ru_utime + filhos.ru_stime
+
+
+def _rodar_tarefa(tarefa, documento=None, cache=None):
+    inicio_wall = time.perf_counter()
+    inicio_cpu = _tempo_cpu()
+    paginas_lidas = []
+
+    if not tarefa.get('abrir_documento', True):
+        resultado = tarefa['funcao'](tarefa['arquivo'], **tarefa.get('kwargs', {}))
+    elif documento is not None:
+        documento.paginas_acessadas.clear()
+        resultado = tarefa['funcao'](documento, **tarefa.get('kwargs', {}))
+        paginas_lidas = sorted(documento.paginas_acessadas)
+    else:
+        try:
+            with DocumentoPDF(tarefa['arquivo'], cache=cache, intervalos=tarefa.get('intervalos_documento')) as documento_local:
+                resultado = tarefa['funcao'](documento_local, **tarefa.get('kwargs', {}))
+                paginas_lidas = sorted(documento_local.paginas_acessadas)
+        except FileNotFoundError as e:
+            print(f"   -- Erro: {e}")
+            resultado = []
+
+    return {
+        "nome": tarefa['nome'],
+        "resultado": resultado,
+        "paginas_lidas": paginas_lidas,
+        "tempo_wall": time.perf_counter() - inicio_wall,
+        "tempo_cpu": _tempo_cpu() - inicio_cpu,
+    }
+
+
+def _iterar_sequencial(tarefas, cache=None, documentos=None):
+    # Sem pool, todos os extratores de um mesmo arquivo compartilham o DocumentoPDF memoizado.
+    if documentos is None:
+        documentos = preparar_documentos(tarefas, cache)
+    try:
+        for tarefa in tarefas:
+            documento = None
+            if tarefa.get('abrir_documento', True):
+                arquivo = tarefa['arquivo']
+                documento = documentos.get(arquivo)
+                if documento is None:
+                    print(f"   -- Erro: O arquivo '{arquivo}' não foi encontrado.")
+                    yield {"nome": tarefa['nome'], "resultado": [], "paginas_lidas": [],
+                           "tempo_wall": 0.0, "tempo_cpu": 0.0}
+                    continue
+            yield _rodar_tarefa(tarefa, documento)
+    finally:
+        for documento in documentos.values():
+            if documento is not None:
+                documento.imprimir_estatisticas()
+                documento.fechar()
+
+
+def _iterar_em_pool(tarefas, workers, cache=None, documentos=None):
+    # O índice de marcadores é montado uma vez aqui; os workers recebem só as páginas.
+    if documentos is None:
+        documentos = preparar_documentos(tarefas, cache)
+    for documento in documentos.values():
+        if documento is not None:
+            documento.fechar()
+
+    ordem_submissao = sorted(range(len(tarefas)), key=lambda i: _custo_estimado(tarefas[i]), reverse=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {i: pool.submit(_rodar_tarefa, tarefas[i], None, cache) for i in ordem_submissao}
+        for i in range(len(tarefas)):
+            # Libera cada resultado assim que é entregue, na ordem declarada.
+            yield futuros.pop(i).result()
+
+
+def iterar_tarefas(tarefas, workers=1, cache=None, documentos=None):
+    # Entrega (tarefa, resultado) na ordem declarada, assim que cada extrator termina.
+    print(f"\n-> Agendador: {len(tarefas)} extratores, {workers} worker(s)...")
+    inicio_wall = time.perf_counter()
+
+    if workers <= 1:
+        execucoes = _iterar_sequencial(tarefas, cache, documentos)
+    else:
+        execucoes = _iterar_em_pool(tarefas, workers, cache, documentos)
+
+    resumos = []
+    # execucoes vem primeiro no zip para que o gerador seja esgotado e feche os documentos.
+    for execucao, tarefa in zip(execucoes, tarefas):
+        resultado = execucao.pop('resultado')
+        execucao['registros'] = len(resultado)
+        resumos.append(execucao)
+        yield tarefa, resultado
+
+    tempo_total = time.perf_counter() - inicio_wall
+
+    print(f"\n-> Resumo do agendador ({workers} worker(s)):")
+    for tarefa, execucao in zip(tarefas, resumos):
+        _conferir_paginas_lidas(tarefa, execucao['paginas_lidas'])
+        print(f"   -- {execucao['nome']}: {execucao['tempo_wall']:.2f}s wall / {execucao['tempo_cpu']:.2f}s CPU "
+              f"({descrever_paginas(tarefa.get('paginas'))}, {execucao['registros']} registros)")
+    soma_cpu = sum(execucao['tempo_cpu'] for execucao in resumos)
+    print(f"   -- Total: {tempo_total:.2f}s wall / {soma_cpu:.2f}s CPU somada dos extratores")
+
+
+def executar_tarefas(tarefas, workers=1, cache=None, documentos=None):
+    return {tarefa['nome']: resultado for tarefa, resultado in iterar_tarefas(tarefas, workers, cache, documentos)}
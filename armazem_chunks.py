@@ -0,0 +1,217 @@
+import argparse
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+from array import array
+
+# Formato binário dos chunks (.chunks), little-endian:
+#   cabeçalho: MAGICO, versão, número de chunks e a tabela de seções (offset, tamanho)
+#   textos:          page_content de todos os chunks, UTF-8 contíguo
+#   offsets_textos:  uint64[n + 1], início de cada texto no buffer
+#   strings:         chaves e valores de metadata distintos (valores em JSON), UTF-8 contíguo
+#   offsets_strings: uint64[m + 1]
+#   pares:           uint32 (id da chave, id do valor) de todos os chunks
+#   offsets_pares:   uint64[n + 1], primeiro par de cada chunk
+MAGICO = b'CHNK'
+VERSAO_FORMATO = 1
+SECOES = ('textos', 'offsets_textos', 'strings', 'offsets_strings', 'pares', 'offsets_pares')
+FORMATO_CABECALHO = '<4sIQ' + 'QQ' * len(SECOES)
+EXTENSAO_ARMAZEM = '.chunks'
+
+if sys.byteorder != 'little':
+    raise ImportError("armazem_chunks assume uma plataforma little-endian.")
+
+
+def _offsets(tamanhos):
+    offsets = array('Q', [0])
+    for tamanho in tamanhos:
+        offsets.append(offsets[-1] + tamanho)
+    return offsets
+
+
+class EscritorArmazem:
+    # Grava o armazém chunk a chunk: os textos vão para um arquivo auxiliar ao lado do destino e na
+    # memória ficam só os offsets, os pares e as strings distintas de metadata.
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._caminho_textos = caminho + '.textos'
+        self._textos = open(self._caminho_textos, 'w+b')
+        self._offsets_textos = array('Q', [0])
+        # Codifica metadata por dicionário: cada chave/valor distinto é gravado uma única vez.
+        self._ids_strings = {}
+        self._strings = []
+        self._pares = array('I')
+        self._offsets_pares = array('Q', [0])
+
+    def __len__(self):
+        return len(self._offsets_textos) - 1
+
+    def _id_string(self, texto):
+        if texto not in self._ids_strings:
+            self._ids_strings[texto] = len(self._strings)
+            self._strings.append(texto.encode('utf-8'))
+        return self._ids_strings[texto]
+
+    def adicionar(self, chunk):
+        texto = chunk['page_content'].encode('utf-8')
+        self._textos.write(texto)
+        self._offsets_textos.append(self._offsets_textos[-1] + len(texto))
+        metadata = chunk.get('metadata', {})
+        for chave, valor in metadata.items():
+            self._pares.append(self._id_string(chave))
+            self._pares.append(self._id_string(json.dumps(valor, ensure_ascii=False)))
+        self._offsets_pares.append(self._offsets_pares[-1] + len(metadata))
+
+    def fechar(self):
+        conteudo = {
+            'offsets_textos': self._offsets_textos.tobytes(),
+            'strings': b''.join(self._strings),
+            'offsets_strings': _offsets(len(s) for s in self._strings).tobytes(),
+            'pares': self._pares.tobytes(),
+            'offsets_pares': self._offsets_pares.tobytes(),
+        }
+        tamanhos = {secao: len(dados) for secao, dados in conteudo.items()}
+        tamanhos['textos'] = self._offsets_textos[-1]
+
+        posicao = struct.calcsize(FORMATO_CABECALHO)
+        tabela = []
+        for secao in SECOES:
+            # Seções alinhadas em 8 bytes para que os arrays possam ser lidos direto do mmap.
+            posicao += -posicao % 8
+            tabela.extend([posicao, tamanhos[secao]])
+            posicao += tamanhos[secao]
+
+        with open(self.caminho, 'wb') as f:
+            f.write(struct.pack(FORMATO_CABECALHO, MAGICO, VERSAO_FORMATO, len(self), *tabela))
+            for secao in SECOES:
+                f.write(b'\0' * (-f.tell() % 8))
+                if secao == 'textos':
+                    self._textos.seek(0)
+                    shutil.copyfileobj(self._textos, f)
+                else:
+                    f.write(conteudo[secao])
+        self.descartar()
+        return len(self)
+
+    def descartar(self):
+        self._textos.close()
+        if os.path.exists(self._caminho_textos):
+            os.remove(self._caminho_textos)
+
+
+def salvar_armazem(chunks, caminho):
+    escritor = EscritorArmazem(caminho)
+    for chunk in chunks:
+        escritor.adicionar(chunk)
+    return escritor.fechar()
+
+
+class ArmazemChunks:
+    # Leitura sob demanda via mmap: abrir o arquivo não decodifica nenhum chunk,
+    # e qualquer chunk é obtido pelo índice em O(1).
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = open(caminho, 'rb')
+        self._mmap = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+
+        cabecalho = struct.unpack_from(FORMATO_CABECALHO, self._buffer)
+        magico, versao, self.total = cabecalho[:3]
+        if magico != MAGICO or versao != VERSAO_FORMATO:
+            self.fechar()
+            raise ValueError(f"'{caminho}' não é um armazém de chunks (versão {VERSAO_FORMATO}).")
+
+        secoes = {}
+        for i, secao in enumerate(SECOES):
+            offset, tamanho = cabecalho[3 + 2 * i], cabecalho[4 + 2 * i]
+            secoes[secao] = self._buffer[offset:offset + tamanho]
+        self._textos = secoes['textos']
+        self._strings = secoes['strings']
+        self._offsets_textos = secoes['offsets_textos'].cast('Q')
+        self._offsets_strings = secoes['offsets_strings'].cast('Q')
+        self._pares = secoes['pares'].cast('I')
+        self._offsets_pares = secoes['offsets_pares'].cast('Q')
+        # Cada string de metadata é decodificada uma única vez.
+        self._strings_decodificadas = {}
+
+    def __len__(self):
+        return self.total
+
+    def _string(self, indice):
+        if indice not in self._strings_decodificadas:
+            inicio, fim = self._offsets_strings[indice], self._offsets_strings[indice + 1]
+            self._strings_decodificadas[indice] = bytes(self._strings[inicio:fim]).decode('utf-8')
+        return self._strings_decodificadas[indice]
+
+    def texto(self, indice):
+        inicio, fim = self._offsets_textos[indice], self._offsets_textos[indice + 1]
+        return bytes(self._textos[inicio:fim]).decode('utf-8')
+
+    def metadata(self, indice):
+        inicio, fim = self._offsets_pares[indice], self._offsets_pares[indice + 1]
+        metadata = {}
+        for par in range(inicio, fim):
+            chave = self._string(self._pares[2 * par])
+            metadata[chave] = json.loads(self._string(self._pares[2 * par + 1]))
+        return metadata
+
+    def chunk(self, indice):
+        if not 0 <= indice < self.total:
+            raise IndexError(f"Chunk {indice} fora do armazém ({self.total} chunks).")
+        return {"page_content": self.texto(indice), "metadata": self.metadata(indice)}
+
+    def __getitem__(self, indice):
+        return self.chunk(indice)
+
+    def __iter__(self):
+        for indice in range(self.total):
+            yield self.chunk(indice)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.fechar()
+
+    def fechar(self):
+        # As views precisam ser liberadas antes de fechar o mmap.
+        for nome in ('_offsets_textos', '_offsets_strings', '_pares', '_offsets_pares', '_textos', '_strings', '_buffer'):
+            view = self.__dict__.pop(nome, None)
+            if view is not None:
+                view.release()
+        if getattr(self, '_mmap', None) is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._arquivo.close()
+
+
+def json_para_armazem(caminho_json, caminho_armazem):
+    with open(caminho_json, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    total = salvar_armazem(chunks, caminho_armazem)
+    print(f"-> {total} chunks convertidos: '{caminho_json}' -> '{caminho_armazem}'")
+
+
+def armazem_para_json(caminho_armazem, caminho_json):
+    with ArmazemChunks(caminho_armazem) as armazem:
+        chunks = list(armazem)
+    with open(caminho_json, 'w', encoding='utf-8') as f:
+        json.dump(chunks, f, ensure_ascii=False, indent=4)
+    print(f"-> {len(chunks)} chunks convertidos: '{caminho_armazem}' -> '{caminho_json}'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte os chunks entre JSON e o armazém binário (.chunks).")
+    parser.add_argument("origem")
+    parser.add_argument("destino")
+    args = parser.parse_args()
+
+    if args.origem.endswith(EXTENSAO_ARMAZEM):
+        armazem_para_json(args.origem, args.destino)
+    else:
+        json_para_armazem(args.origem, args.destino)
@@ -0,0 +1,96 @@
+import json
+import os
+
+from langchain_core.embeddings import Embeddings
+
+from indice_mapeado import eh_indice_mapeado, ler_manifesto
+
+BACKEND_OPENAI = "openai"
+BACKEND_LOCAL = "local"
+MODELO_EMBEDDING_OPENAI = "text-embedding-3-small"
+# Multilíngue, 384 dimensões, roda em CPU.
+MODELO_EMBEDDING_LOCAL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+MODELOS_PADRAO = {BACKEND_OPENAI: MODELO_EMBEDDING_OPENAI, BACKEND_LOCAL: MODELO_EMBEDDING_LOCAL}
+ARQUIVO_IDENTIDADE = "embeddings.json"
+TAMANHO_LOTE_LOCAL = 32
+
+
+class EmbeddingsLocais(Embeddings):
+    # sentence-transformers em CPU. Com processos > 1, embed_documents distribui os lotes
+    # num pool de processos (útil na criação do índice; consultas usam sempre o processo atual).
+    # O pool é criado na primeira chamada e reaproveitado até fechar().
+
+    def __init__(self, modelo=MODELO_EMBEDDING_LOCAL, tamanho_lote=TAMANHO_LOTE_LOCAL, processos=1):
+        self.modelo = modelo
+        self.tamanho_lote = tamanho_lote
+        self.processos = processos
+        self._modelo = None
+        self._pool = None
+
+    @property
+    def sentence_transformer(self):
+        if self._modelo is None:
+            from sentence_transformers import SentenceTransformer
+            self._modelo = SentenceTransformer(self.modelo, device="cpu")
+        return self._modelo
+
+    def embed_documents(self, texts):
+        if self.processos > 1 and len(texts) > self.tamanho_lote:
+            if self._pool is None:
+                self._pool = self.sentence_transformer.start_multi_process_pool(["cpu"] * self.processos)
+            vetores = self.sentence_transformer.encode_multi_process(
+                texts, self._pool, batch_size=self.tamanho_lote, normalize_embeddings=True)
+        else:
+            vetores = self.sentence_transformer.encode(
+                texts, batch_size=self.tamanho_lote, normalize_embeddings=True, convert_to_numpy=True)
+        return vetores.tolist()
+
+    def embed_query(self, text):
+        return self.sentence_transformer.encode([text], normalize_embeddings=True, convert_to_numpy=True)[0].tolist()
+
+    def fechar(self):
+        if self._pool is not None:
+            self.sentence_transformer.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+
+def criar_embeddings(backend, modelo=None, processos=1, max_retries=2):
+    # max_retries só vale para a OpenAI; processos só para o backend local.
+    modelo = modelo or MODELOS_PADRAO.get(backend)
+    if backend == BACKEND_OPENAI:
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=modelo, max_retries=max_retries)
+    if backend == BACKEND_LOCAL:
+        return EmbeddingsLocais(modelo, processos=processos)
+    raise ValueError(f"Backend de embedding desconhecido: '{backend}'.")
+
+
+def salvar_identidade(pasta_indice, backend, modelo, dimensao):
+    # Gravada junto do índice: quem consulta o índice cria exatamente o mesmo embedder.
+    with open(os.path.join(pasta_indice, ARQUIVO_IDENTIDADE), 'w', encoding='utf-8') as f:
+        json.dump({"backend": backend, "modelo": modelo, "dimensao": dimensao}, f, ensure_ascii=False, indent=4)
+
+
+def ler_identidade(pasta_indice):
+    if eh_indice_mapeado(pasta_indice):
+        manifesto = ler_manifesto(pasta_indice)
+        return {chave: manifesto[chave] for chave in ("backend", "modelo", "dimensao")}
+    caminho = os.path.join(pasta_indice, ARQUIVO_IDENTIDADE)
+    if not os.path.exists(caminho):
+        # Índices anteriores à identidade foram todos criados com a OpenAI.
+        return {"backend": BACKEND_OPENAI, "modelo": MODELO_EMBEDDING_OPENAI, "dimensao": None}
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def embeddings_do_indice(pasta_indice):
+    identidade = ler_identidade(pasta_indice)
+    print(f"Índice criado com o backend '{identidade['backend']}' ({identidade['modelo']}).")
+    return criar_embeddings(identidade['backend'], identidade['modelo']), identidade
+
+
+def conferir_dimensao(db, identidade):
+    dimensao = db.dimensao if hasattr(db, 'dimensao') else db.index.d
+    if identidade.get('dimensao') is not None and dimensao != identidade['dimensao']:
+        raise ValueError(f"O índice tem vetores de dimensão {dimensao}, mas a identidade registra "
+                         f"{identidade['dimensao']} ({identidade['modelo']}).")
@@ -0,0 +1,36 @@
+import json
+import os
+
+ARQUIVO_PERGUNTAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados", "perguntas_avaliacao.json")
+
+
+def carregar_perguntas(caminho=ARQUIVO_PERGUNTAS):
+    # Cada pergunta lista critérios de relevância: um subconjunto do metadata
+    # ou {"contem": trecho} buscado no page_content.
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def eh_relevante(documento, criterios):
+    for criterio in criterios:
+        if 'contem' in criterio:
+            if criterio['contem'] in documento.page_content:
+                return True
+        elif all(documento.metadata.get(chave) == valor for chave, valor in criterio.items()):
+            return True
+    return False
+
+
+def avaliar_ranking(documentos, criterios, k):
+    # (acertou no top-k, recíproco da posição do primeiro relevante ou 0)
+    for posicao, documento in enumerate(documentos[:k], start=1):
+        if eh_relevante(documento, criterios):
+            return True, 1.0 / posicao
+    return False, 0.0
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
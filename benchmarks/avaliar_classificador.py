@@ -0,0 +1,70 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from avaliacao import carregar_perguntas
+from classificador_intencao import (ACADEMICO, ARQUIVO_LOG_INTENCAO, ARQUIVO_SEMENTES_INTENCAO, ClassificadorIntencao,
+                                    carregar_exemplos, treinar)
+
+LIMIARES = (0.7, 0.8, 0.9, 0.95)
+
+
+def validacao_cruzada(exemplos, dobras, semente=0):
+    # Probabilidade de acadêmico de cada exemplo, prevista por um modelo treinado sem ele.
+    ordem = list(range(len(exemplos)))
+    random.Random(semente).shuffle(ordem)
+    probabilidades = [0.0] * len(exemplos)
+    for dobra in range(dobras):
+        teste = set(ordem[dobra::dobras])
+        treino = [exemplos[i] for i in ordem if i not in teste]
+        modelo = ClassificadorIntencao(treinar([e[0] for e in treino], [e[1] for e in treino]))
+        for i in teste:
+            probabilidades[i] = modelo.probabilidade_academico(exemplos[i][0])
+    return probabilidades
+
+
+def relatorio(nome, exemplos, probabilidades):
+    # Rótulos de referência: os do LLM (log) e das sementes. O que o modelo não decide vai ao
+    # LLM, e aí a resposta é a do próprio LLM.
+    print(f"\n{nome}: {len(exemplos)} exemplos")
+    print(f"{'Limiar':>6} {'Sem LLM':>8} {'Acerto local':>12} {'Acerto final':>12}")
+    for limiar in LIMIARES:
+        decididos = acertos = 0
+        for (_, rotulo, _), p in zip(exemplos, probabilidades):
+            if p >= limiar or p <= 1.0 - limiar:
+                decididos += 1
+                acertos += (p >= limiar) == (rotulo == ACADEMICO)
+        print(f"{limiar:>6.2f} {decididos / len(exemplos):>8.0%} {acertos / max(decididos, 1):>12.1%} "
+              f"{(acertos + len(exemplos) - decididos) / len(exemplos):>12.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Acerto do classificador local e fração de chamadas ao LLM evitadas.")
+    parser.add_argument("--sementes", default=ARQUIVO_SEMENTES_INTENCAO)
+    parser.add_argument("--log", default=ARQUIVO_LOG_INTENCAO)
+    parser.add_argument("--dobras", type=int, default=5)
+    args = parser.parse_args()
+
+    exemplos = carregar_exemplos(args.sementes, args.log)
+    probabilidades = validacao_cruzada(exemplos, args.dobras)
+    relatorio(f"Validação cruzada ({args.dobras} dobras), sementes + log", exemplos, probabilidades)
+    do_llm = [i for i, e in enumerate(exemplos) if e[2] == "llm"]
+    if do_llm:
+        relatorio("Só as perguntas rotuladas pelo LLM", [exemplos[i] for i in do_llm], [probabilidades[i] for i in do_llm])
+
+    # Perguntas de avaliação do retrieval: todas acadêmicas e fora do treino.
+    modelo = ClassificadorIntencao(treinar([e[0] for e in exemplos], [e[1] for e in exemplos]))
+    externas = [(item['pergunta'], ACADEMICO, "avaliacao") for item in carregar_perguntas()]
+    relatorio("Perguntas de avaliação (fora do treino)", externas,
+              [modelo.probabilidade_academico(e[0]) for e in externas])
+
+    tempos = []
+    for texto, _, _ in exemplos:
+        inicio = time.perf_counter()
+        modelo.classificar(texto)
+        tempos.append(time.perf_counter() - inicio)
+    print(f"\nLatência por pergunta: p50 {statistics.median(tempos) * 1e6:.0f} µs, máx {max(tempos) * 1e6:.0f} µs")
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from langchain_core.documents import Document
+
+from avaliacao import avaliar_ranking, carregar_perguntas
+from driver_embeddings import EmbeddingsSimulados
+from grafo_curricular import ARQUIVO_GRADE, carregar_grafo
+from indice_mapeado import EscritorIndiceMapeado, IndiceMapeado
+from roteador_consultas import MAX_DOCUMENTOS_ROTA, criar_roteador
+
+ARQUIVO_CHUNKS = 'chunks_completos.json'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cobertura e acerto do roteador de consultas nas perguntas de avaliação.")
+    parser.add_argument("--arquivo", default=ARQUIVO_CHUNKS)
+    parser.add_argument("--grade", default=ARQUIVO_GRADE)
+    args = parser.parse_args()
+
+    with open(args.arquivo, 'r', encoding='utf-8') as f:
+        documentos = [Document(page_content=c['page_content'], metadata=c['metadata']) for c in json.load(f)]
+    perguntas = carregar_perguntas()
+
+    # As rotas não usam os vetores; o índice só fornece os chunks por posição.
+    embeddings = EmbeddingsSimulados(dimensao=384)
+    pasta = tempfile.mkdtemp()
+    escritor = EscritorIndiceMapeado(pasta, embeddings)
+    escritor.adicionar(documentos)
+    escritor.finalizar("simulado", "simulado")
+    grafo = carregar_grafo(args.grade)
+    if grafo is None:
+        print(f"   -- AVISO: '{args.grade}' não encontrado; avaliando sem o grafo curricular.")
+    roteador = criar_roteador(IndiceMapeado(pasta, embeddings), pasta, grafo)
+
+    roteadas, acertos, latencias, tamanhos = 0, 0, [], []
+    for item in perguntas:
+        inicio = time.perf_counter()
+        rota = roteador.rotear(item['pergunta'])
+        resultado = roteador.recuperar(rota) if rota else []
+        latencias.append(time.perf_counter() - inicio)
+        if not resultado:
+            print(f"   -- caminho geral: {item['pergunta']}")
+            continue
+        roteadas += 1
+        tamanhos.append(len(resultado))
+        acertou, _ = avaliar_ranking(resultado, item['relevantes'], MAX_DOCUMENTOS_ROTA)
+        acertos += acertou
+        print(f"   -- rota '{rota['intencao']}' ({len(resultado)} chunks, {'acerto' if acertou else 'ERRO'}): "
+              f"{item['pergunta']}")
+
+    print(f"\n{len(perguntas)} perguntas: {roteadas} roteadas ({roteadas / len(perguntas):.0%}), "
+          f"{acertos}/{roteadas} com chunk relevante")
+    print(f"Roteamento + busca: p50 {statistics.median(latencias) * 1000:.2f} ms, "
+          f"máx {max(latencias) * 1000:.2f} ms; média de {statistics.mean(tamanhos or [0]):.1f} chunks por rota")
+
+    if grafo is not None:
+        # Consultas estruturais puras: fecho de pré-requisitos e de dependentes de todas as disciplinas.
+        inicio = time.perf_counter()
+        for i in range(len(grafo.disciplinas)):
+            grafo.pre_requisitos(i)
+            grafo.dependentes(i)
+        por_consulta = (time.perf_counter() - inicio) / (2 * len(grafo.disciplinas))
+        inicio = time.perf_counter()
+        for i in range(len(grafo.disciplinas)):
+            grafo.texto_pre_requisitos(i)
+        por_texto = (time.perf_counter() - inicio) / len(grafo.disciplinas)
+        print(f"Grafo curricular ({len(grafo.disciplinas)} disciplinas): {por_consulta * 1e6:.1f} µs por fecho, "
+              f"{por_texto * 1e6:.1f} µs por resposta em texto")
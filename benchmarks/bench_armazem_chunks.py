@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from armazem_chunks import ArmazemChunks, salvar_armazem
+
+ARQUIVO_CHUNKS = 'chunks_completos.json'
+
+
+def rss_atual_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def medir(formato, caminho, consultas):
+    # Roda num processo próprio para que o RSS de um formato não contamine o outro.
+    from langchain_core.documents import Document
+
+    rss_inicial = rss_atual_mb()
+    inicio = time.perf_counter()
+    if formato == 'json':
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        documentos = [Document(page_content=c['page_content'], metadata=c['metadata']) for c in dados]
+        tempo_abertura = time.perf_counter() - inicio
+        total = len(documentos)
+        obter = documentos.__getitem__
+    else:
+        armazem = ArmazemChunks(caminho)
+        tempo_abertura = time.perf_counter() - inicio
+        total = len(armazem)
+
+        def obter(indice):
+            chunk = armazem[indice]
+            return Document(page_content=chunk['page_content'], metadata=chunk['metadata'])
+    rss_aberto = rss_atual_mb()
+
+    indices = random.Random(42).choices(range(total), k=consultas)
+    inicio = time.perf_counter()
+    for indice in indices:
+        obter(indice).page_content
+    tempo_consultas = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for indice in range(total):
+        obter(indice)
+    tempo_varredura = time.perf_counter() - inicio
+
+    return {
+        "abertura_ms": tempo_abertura * 1000,
+        "consulta_us": tempo_consultas / consultas * 1e6,
+        "varredura_ms": tempo_varredura * 1000,
+        "rss_apos_abrir_mb": rss_aberto - rss_inicial,
+        "pico_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara o carregamento dos chunks em JSON e no armazém binário.")
+    parser.add_argument("--arquivo", default=ARQUIVO_CHUNKS)
+    parser.add_argument("--replicar", type=int, default=50,
+                        help="Repete o corpus N vezes para simular vários PPCs.")
+    parser.add_argument("--consultas", type=int, default=1000)
+    parser.add_argument("--medir", choices=["json", "chunks"], help=argparse.SUPPRESS)
+    parser.add_argument("--caminho", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.caminho, args.consultas)))
+        sys.exit(0)
+
+    with open(args.arquivo, 'r', encoding='utf-8') as f:
+        chunks = json.load(f) * args.replicar
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminhos = {"json": os.path.join(pasta, "chunks.json"), "chunks": os.path.join(pasta, "chunks.chunks")}
+        with open(caminhos["json"], 'w', encoding='utf-8') as f:
+            json.dump(chunks, f, ensure_ascii=False, indent=4)
+        salvar_armazem(chunks, caminhos["chunks"])
+
+        print(f"{len(chunks)} chunks ({args.replicar}x '{args.arquivo}')")
+        print(f"{'Formato':>8} {'Tamanho (KB)':>13} {'Abertura (ms)':>14} {'Consulta (us)':>14} "
+              f"{'Varredura (ms)':>15} {'RSS aberto (MB)':>16} {'Pico RSS (MB)':>14}")
+        for formato, caminho in caminhos.items():
+            saida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--medir", formato, "--caminho", caminho,
+                 "--consultas", str(args.consultas)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            r = json.loads(saida.strip().splitlines()[-1])
+            print(f"{formato:>8} {os.path.getsize(caminho) / 1024:>13.0f} {r['abertura_ms']:>14.2f} "
+                  f"{r['consulta_us']:>14.2f} {r['varredura_ms']:>15.1f} {r['rss_apos_abrir_mb']:>16.1f} "
+                  f"{r['pico_rss_mb']:>14.1f}")
@@ -0,0 +1,65 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dotenv import load_dotenv
+
+from avaliacao import carregar_perguntas
+from backends_embedding import BACKEND_LOCAL, BACKEND_OPENAI, MODELOS_PADRAO, criar_embeddings
+from cache_respostas import LIMIAR_SIMILARIDADE, MAX_ENTRADAS_RESPOSTAS, CacheRespostas, assinatura_pergunta
+from driver_embeddings import EmbeddingsSimulados
+
+BACKEND_SIMULADO = "simulado"
+# Formas diferentes de fazer a mesma pergunta; com o backend simulado só a repetição exata acerta.
+REESCRITAS = ("{}", "{}", "{} Obrigado.", "Por favor, {}", "Oi! {}")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Taxa de acertos e tempo economizado pelo cache semântico de respostas.")
+    parser.add_argument("--backend", default=BACKEND_SIMULADO, choices=[BACKEND_SIMULADO, BACKEND_OPENAI, BACKEND_LOCAL])
+    parser.add_argument("--mensagens", type=int, default=500)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Expoente da popularidade das perguntas.")
+    parser.add_argument("--custo", type=float, default=4.0, help="Segundos para gerar uma resposta sem o cache.")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_SIMILARIDADE)
+    parser.add_argument("--max-entradas", type=int, default=MAX_ENTRADAS_RESPOSTAS)
+    args = parser.parse_args()
+
+    if args.backend == BACKEND_SIMULADO:
+        embeddings = EmbeddingsSimulados(dimensao=384)
+    else:
+        embeddings = criar_embeddings(args.backend, MODELOS_PADRAO[args.backend])
+    perguntas = [item['pergunta'] for item in carregar_perguntas()]
+    pesos = [1.0 / (posicao ** args.zipf) for posicao in range(1, len(perguntas) + 1)]
+    aleatorio = random.Random(0)
+    mensagens = [(base, aleatorio.choice(REESCRITAS).format(base))
+                 for base in aleatorio.choices(perguntas, weights=pesos, k=args.mensagens)]
+    textos = sorted({mensagem for _, mensagem in mensagens})
+    vetores = dict(zip(textos, embeddings.embed_documents(textos)))
+
+    cache = CacheRespostas(limiar=args.limiar, max_entradas=args.max_entradas)
+    falsos, buscas = 0, []
+    for base, mensagem in mensagens:
+        inicio = time.perf_counter()
+        entrada = cache.buscar(vetores[mensagem], assinatura_pergunta(mensagem), "v1")
+        buscas.append(time.perf_counter() - inicio)
+        if entrada is None:
+            cache.guardar(mensagem, vetores[mensagem], assinatura_pergunta(mensagem), f"resposta para {base}", "v1", args.custo)
+        elif entrada['resposta'] != f"resposta para {base}":
+            falsos += 1
+
+    ideal = len(mensagens) - len({base for base, _ in mensagens})
+    print(f"{len(mensagens)} mensagens sobre {len(set(b for b, _ in mensagens))} perguntas distintas "
+          f"(backend {args.backend}, limiar {args.limiar})")
+    print(f"Cache: {cache.estatisticas()}; máximo possível {ideal} acertos")
+    print(f"Respostas erradas servidas do cache: {falsos}")
+    print(f"Consulta ao cache: p50 {statistics.median(buscas) * 1e6:.0f} µs, máx {max(buscas) * 1e6:.0f} µs")
+
+    # Recriar o índice muda a versão: o cache esvazia na consulta seguinte.
+    base, mensagem = mensagens[0]
+    assert cache.buscar(vetores[mensagem], assinatura_pergunta(mensagem), "v2") is None and len(cache) == 0
+    print("Troca da versão do índice: cache esvaziado.")
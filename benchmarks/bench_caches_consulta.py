@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from langchain_core.documents import Document
+
+from avaliacao import carregar_perguntas
+from cache_consultas import CachesConsulta, CacheTTL, EmbeddingsComCacheTTL
+from driver_embeddings import EmbeddingsSimulados
+from indice_mapeado import EscritorIndiceMapeado, IndiceMapeado, versao_do_indice
+from pipeline_consulta import Cronometro, buscar_contexto, criar_executor
+
+ARQUIVO_CHUNKS = 'chunks_completos.json'
+NUM_VARIACOES = 3
+# A mesma pergunta escrita de formas que a normalização junta.
+REESCRITAS = (str, str, str.lower, lambda p: p + "!", lambda p: f" {p} ")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Idas à rede e tempo até o contexto com os caches de consulta.")
+    parser.add_argument("--arquivo", default=ARQUIVO_CHUNKS)
+    parser.add_argument("--mensagens", type=int, default=120)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--multiquery", type=float, default=0.9, help="Segundos da chamada de multiquery.")
+    parser.add_argument("--embedding", type=float, default=0.15, help="Segundos por requisição de embedding.")
+    args = parser.parse_args()
+
+    with open(args.arquivo, 'r', encoding='utf-8') as f:
+        documentos = [Document(page_content=c['page_content'], metadata=c['metadata']) for c in json.load(f)]
+    perguntas = [item['pergunta'] for item in carregar_perguntas()]
+    pesos = [1.0 / (posicao ** args.zipf) for posicao in range(1, len(perguntas) + 1)]
+    aleatorio = random.Random(0)
+    mensagens = [aleatorio.choice(REESCRITAS)(pergunta)
+                 for pergunta in aleatorio.choices(perguntas, weights=pesos, k=args.mensagens)]
+
+    base = EmbeddingsSimulados(dimensao=384)
+    pasta = tempfile.mkdtemp()
+    escritor = EscritorIndiceMapeado(pasta, base)
+    escritor.adicionar(documentos)
+    escritor.finalizar("simulado", "simulado")
+    versao = versao_do_indice(pasta)
+    base.latencia = args.embedding
+    chamadas_multiquery = []
+
+    def gerar_variacoes(pergunta):
+        chamadas_multiquery.append(pergunta)
+        time.sleep(args.multiquery)
+        # Variações fixas por pergunta normalizada, como um LLM com temperatura baixa.
+        pergunta = pergunta.strip().rstrip('!').lower()
+        return f"De acordo com o PPC, {pergunta}\n{pergunta} (curso de SI)\nExplique: {pergunta}"
+
+    executor = criar_executor()
+    print(f"{len(mensagens)} mensagens sobre {len(set(m.strip().rstrip('!').lower() for m in mensagens))} perguntas; "
+          f"multiquery {args.multiquery * 1000:.0f} ms, embedding {args.embedding * 1000:.0f} ms")
+    print(f"{'Caches':<8} {'p50 (ms)':>9} {'Média (ms)':>10} {'Multiquery':>10} {'Req. embedding':>14}")
+    referencia = None
+    caches = CachesConsulta()
+    # A última rodada simula um índice recriado: resultados invalidados, variações e embeddings aproveitados.
+    for nome, com_caches, versao_rodada in (("não", False, versao), ("sim", True, versao), ("reindex.", True, "nova")):
+        embeddings = EmbeddingsComCacheTTL(base, "simulado", caches.embeddings) if com_caches else base
+        retriever = IndiceMapeado(pasta, embeddings).as_retriever(search_kwargs={"k": 5})
+        del chamadas_multiquery[:]
+        chamadas_antes = base.chamadas
+        tempos, contextos = [], []
+        for mensagem in mensagens:
+            cronometro = Cronometro()
+            contexto = buscar_contexto(mensagem, lambda p: True, gerar_variacoes, retriever, None, executor,
+                                       cronometro, NUM_VARIACOES, None, None, versao_rodada,
+                                       caches if com_caches else None)
+            tempos.append(time.perf_counter() - cronometro.inicio)
+            contextos.append([d.page_content for d in contexto['documentos']])
+        if referencia is None:
+            referencia = contextos
+        assert contextos == referencia, "Os caches mudaram o contexto recuperado"
+        print(f"{nome:<8} {statistics.median(tempos) * 1000:>9.0f} "
+              f"{statistics.mean(tempos) * 1000:>10.0f} {len(chamadas_multiquery):>10} {base.chamadas - chamadas_antes:>14}")
+        if com_caches:
+            print(f"   -- {caches.estatisticas()}")
+    executor.shutdown()
+
+    # TTL: uma entrada vencida não é devolvida.
+    agora = [0.0]
+    cache = CacheTTL(10, ttl=60, relogio=lambda: agora[0])
+    cache.guardar("chave", "valor")
+    agora[0] = 59.0
+    assert cache.obter("chave") == "valor"
+    agora[0] = 61.0
+    assert cache.obter("chave") is None and len(cache) == 0
+    print("TTL: entrada expirada descartada.")
@@ -0,0 +1,39 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from driver_embeddings import DriverEmbeddings, EmbeddingsSimulados, contador_de_tokens
+
+ARQUIVO_CHUNKS = 'chunks_completos.json'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vazão do driver de embeddings contra um modelo simulado.")
+    parser.add_argument("--arquivo", default=ARQUIVO_CHUNKS)
+    parser.add_argument("--latencia", type=float, default=0.2, help="Segundos por requisição simulada.")
+    parser.add_argument("--taxa-falhas", type=float, default=0.05, help="Fração de requisições com 429/5xx.")
+    parser.add_argument("--max-tokens-lote", type=int, default=8000)
+    parser.add_argument("--em-voo", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    with open(args.arquivo, 'r', encoding='utf-8') as f:
+        textos = [chunk['page_content'] for chunk in json.load(f)]
+
+    # Referência: um único lote, sem falhas nem latência.
+    referencia = EmbeddingsSimulados().embed_documents(textos)
+    contador_de_tokens("simulado")
+
+    print(f"{len(textos)} textos, {args.latencia * 1000:.0f} ms por requisição, {args.taxa_falhas:.0%} de falhas")
+    print(f"{'Em voo':>6} {'Requisições':>11} {'Tentativas':>10} {'Tempo (s)':>10} {'Chunks/s':>9}")
+    for em_voo in args.em_voo:
+        modelo = EmbeddingsSimulados(latencia=args.latencia, taxa_falhas=args.taxa_falhas, semente=em_voo)
+        driver = DriverEmbeddings(modelo, "simulado", max_tokens_lote=args.max_tokens_lote, max_em_voo=em_voo,
+                                  espera_base=args.latencia, semente=em_voo)
+        inicio = time.perf_counter()
+        vetores = driver.embed_documents(textos)
+        tempo = time.perf_counter() - inicio
+        assert vetores == referencia, "Vetores fora de ordem ou divergentes"
+        print(f"{em_voo:>6} {driver.requisicoes:>11} {driver.novas_tentativas:>10} {tempo:>10.2f} {len(textos) / tempo:>9.1f}")
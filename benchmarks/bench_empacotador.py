@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from langchain_core.documents import Document
+
+from avaliacao import carregar_perguntas, eh_relevante
+from driver_embeddings import EmbeddingsSimulados
+from empacotador_contexto import ORCAMENTO_TOKENS_CONTEXTO, anotar_tokens, contar_tokens, empacotar_contexto
+from grafo_curricular import ARQUIVO_GRADE, carregar_grafo
+from indice_lexico import IndiceLexico
+from indice_mapeado import EscritorIndiceMapeado, IndiceMapeado
+from recuperacao_hibrida import RetrieverHibrido, documento_por_posicao, mesclar_resultados
+from roteador_consultas import criar_roteador
+
+ARQUIVO_CHUNKS = 'chunks_completos.json'
+K_RECUPERACAO = 4
+MAX_CHUNKS_ANTIGO = 10
+
+
+def variacoes(pergunta):
+    return [pergunta, f"De acordo com o PPC, {pergunta}", f"{pergunta} (curso de SI)"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tokens do contexto RAG: os 10 primeiros chunks x o empacotador.")
+    parser.add_argument("--arquivo", default=ARQUIVO_CHUNKS)
+    parser.add_argument("--orcamento", type=int, default=ORCAMENTO_TOKENS_CONTEXTO)
+    args = parser.parse_args()
+
+    with open(args.arquivo, 'r', encoding='utf-8') as f:
+        documentos = anotar_tokens([Document(page_content=c['page_content'], metadata=c['metadata'])
+                                    for c in json.load(f)])
+    embeddings = EmbeddingsSimulados(dimensao=384)
+    pasta = tempfile.mkdtemp()
+    escritor = EscritorIndiceMapeado(pasta, embeddings)
+    escritor.adicionar(documentos)
+    escritor.finalizar("simulado", "simulado")
+    db = IndiceMapeado(pasta, embeddings)
+    lexico = IndiceLexico(pasta)
+    retriever = RetrieverHibrido(vectorstore=db, lexico=lexico, documento=documento_por_posicao(db), k=K_RECUPERACAO)
+    roteador = criar_roteador(db, pasta, carregar_grafo(ARQUIVO_GRADE))
+
+    # Sem orçamento: só a junção de vizinhos e o descarte de repetidos sobre os mesmos 10 chunks.
+    modos = {"10 primeiros": [], "sem orçamento": [], "empacotado": []}
+    relevantes = dict.fromkeys(modos, 0)
+    tempos = []
+    perguntas = carregar_perguntas()
+    for item in perguntas:
+        # Os da rota ou as variações juntadas na ordem de chegada, sem o corte adaptativo.
+        rota = roteador.rotear(item['pergunta'])
+        docs = roteador.recuperar(rota) if rota else []
+        if not docs:
+            docs = [d for d, _ in mesclar_resultados(retriever.recuperar_varias(variacoes(item['pergunta'])))]
+        inicio = time.perf_counter()
+        pacote, _ = empacotar_contexto(docs, args.orcamento)
+        tempos.append(time.perf_counter() - inicio)
+        contextos = {"10 primeiros": docs[:MAX_CHUNKS_ANTIGO],
+                     "sem orçamento": empacotar_contexto(docs[:MAX_CHUNKS_ANTIGO], float('inf'))[0],
+                     "empacotado": pacote}
+        for nome, contexto in contextos.items():
+            modos[nome].append(contar_tokens("\n\n".join(d.page_content for d in contexto)))
+            relevantes[nome] += any(eh_relevante(d, item['relevantes']) for d in contexto)
+
+    print(f"{len(perguntas)} perguntas, orçamento {args.orcamento} tokens")
+    print(f"{'Contexto':<14} {'p50':>6} {'Média':>7} {'Máx':>6} {'Economia':>9} {'Com relevante':>14}")
+    for nome, tokens in modos.items():
+        economia = 1 - sum(tokens) / sum(modos["10 primeiros"])
+        print(f"{nome:<14} {statistics.median(tokens):>6.0f} {statistics.mean(tokens):>7.0f} {max(tokens):>6} "
+              f"{economia:>9.0%} {relevantes[nome]:>9}/{len(perguntas)}")
+    print(f"Empacotamento: p50 {statistics.median(tempos) * 1e6:.0f} µs, máx {max(tempos) * 1e6:.0f} µs")
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from langchain_core.documents import Document
+
+from avaliacao import carregar_perguntas
+from driver_embeddings import EmbeddingsSimulados
+from indice_mapeado import EscritorIndiceMapeado, IndiceMapeado
+from pipeline_consulta import Cronometro, buscar_contexto, criar_executor
+from recuperacao_hibrida import cortar_por_queda, fundir_variacoes, recuperar_em_lote
+
+ARQUIVO_CHUNKS = 'chunks_completos.json'
+PERGUNTAS_CHITCHAT = ["Oi, tudo bem?", "Quem é você?", "Obrigado pela ajuda!", "Bom dia"]
+NUM_VARIACOES = 3
+
+
+def llm_simulado(latencia, funcao):
+    def chamar(pergunta):
+        time.sleep(latencia)
+        return funcao(pergunta)
+    return chamar
+
+
+def sequencial(pergunta, classificar, gerar_variacoes, retriever):
+    # O fluxo anterior: classifica, depois gera as variações, depois busca.
+    if not classificar(pergunta):
+        return False, []
+    variacoes = [v.strip() for v in gerar_variacoes(pergunta).strip().split('\n') if v.strip()][:NUM_VARIACOES]
+    return True, [d for d, _ in cortar_por_queda(fundir_variacoes(recuperar_em_lote(retriever, [pergunta] + variacoes)))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tempo até o contexto: etapas sequenciais x especulativas.")
+    parser.add_argument("--arquivo", default=ARQUIVO_CHUNKS)
+    parser.add_argument("--classificacao", type=float, default=0.5, help="Segundos da chamada de classificação.")
+    parser.add_argument("--multiquery", type=float, default=0.9, help="Segundos da chamada de multiquery.")
+    parser.add_argument("--embedding", type=float, default=0.15, help="Segundos por requisição de embedding.")
+    parser.add_argument("--perguntas", type=int, default=8)
+    args = parser.parse_args()
+
+    with open(args.arquivo, 'r', encoding='utf-8') as f:
+        documentos = [Document(page_content=c['page_content'], metadata=c['metadata']) for c in json.load(f)]
+    academicas = [item['pergunta'] for item in carregar_perguntas()][:args.perguntas]
+
+    embeddings = EmbeddingsSimulados(dimensao=384)
+    pasta = tempfile.mkdtemp()
+    escritor = EscritorIndiceMapeado(pasta, embeddings)
+    escritor.adicionar(documentos)
+    escritor.finalizar("simulado", "simulado")
+    retriever = IndiceMapeado(pasta, embeddings).as_retriever(search_kwargs={"k": 5})
+    embeddings.latencia = args.embedding
+
+    classificar = llm_simulado(args.classificacao, lambda p: p not in PERGUNTAS_CHITCHAT)
+    gerar_variacoes = llm_simulado(args.multiquery, lambda p: f"De acordo com o PPC, {p}\n{p} (curso de SI)\nExplique: {p}")
+    executor = criar_executor()
+
+    print(f"LLM simulado: classificação {args.classificacao * 1000:.0f} ms, multiquery {args.multiquery * 1000:.0f} ms; "
+          f"embedding {args.embedding * 1000:.0f} ms")
+    print(f"{'Perguntas':<12} {'Seq. p50':>10} {'Espec. p50':>10}")
+    for nome, perguntas in (("acadêmicas", academicas), ("chitchat", PERGUNTAS_CHITCHAT)):
+        tempos_seq, tempos_espec = [], []
+        for pergunta in perguntas:
+            inicio = time.perf_counter()
+            esperado = sequencial(pergunta, classificar, gerar_variacoes, retriever)
+            tempos_seq.append(time.perf_counter() - inicio)
+
+            cronometro = Cronometro()
+            contexto = buscar_contexto(pergunta, classificar, gerar_variacoes, retriever, None,
+                                       executor, cronometro, NUM_VARIACOES)
+            tempos_espec.append(time.perf_counter() - cronometro.inicio)
+            assert (contexto['academico'], [d.page_content for d in contexto['documentos']]) == \
+                (esperado[0], [d.page_content for d in esperado[1]]), f"Divergência: {pergunta}"
+        print(f"{nome:<12} {statistics.median(tempos_seq) * 1000:>10.0f} {statistics.median(tempos_espec) * 1000:>10.0f}")
+        print(f"   -- etapas da última pergunta: {cronometro.resumo()}")
+    executor.shutdown()
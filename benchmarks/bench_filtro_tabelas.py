@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+import time
+
+import pdfplumber
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extratores.textosemtabela import IndiceBBoxes
+
+ARQUIVO_PPC = 'PPC 2023 - Sistemas de Informação.pdf'
+
+
+def filtro_original(table_bboxes):
+    # Versão anterior: testa cada objeto contra todos os bboxes da página.
+    def is_outside_tables(obj):
+        def is_within_bbox(obj, bbox):
+            obj_bbox = (obj["x0"], obj["top"], obj["x1"], obj["bottom"])
+            return (obj_bbox[0] >= bbox[0] and obj_bbox[1] >= bbox[1] and
+                    obj_bbox[2] <= bbox[2] and obj_bbox[3] <= bbox[3])
+        return not any(is_within_bbox(obj, bbox) for bbox in table_bboxes)
+    return is_outside_tables
+
+
+def filtro_indexado(table_bboxes):
+    indice_tabelas = IndiceBBoxes(table_bboxes)
+    return lambda obj: not indice_tabelas.contem(obj)
+
+
+def medir(page, filtro, repeticoes):
+    # Menor tempo entre as repetições, só da filtragem dos objetos da página.
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        page.filter(filtro).objects
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara o filtro de objetos fora das tabelas (original x indexado).")
+    parser.add_argument("--arquivo", default=ARQUIVO_PPC)
+    parser.add_argument("--paginas", type=int, default=8, help="Quantas páginas com mais tabelas medir.")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    with pdfplumber.open(args.arquivo) as pdf:
+        candidatas = []
+        for i, page in enumerate(pdf.pages):
+            bboxes = [table.bbox for table in page.find_tables()]
+            if bboxes:
+                candidatas.append((len(bboxes), i, bboxes))
+        candidatas.sort(key=lambda c: (-c[0], c[1]))
+
+        print(f"{'Página':>6} {'Tabelas':>7} {'Objetos':>8} {'Original (ms)':>14} {'Indexado (ms)':>14} {'Ganho':>6}")
+        total_original = total_indexado = 0.0
+        for num_tabelas, i, bboxes in candidatas[:args.paginas]:
+            page = pdf.pages[i]
+            num_objetos = sum(len(objs) for objs in page.objects.values())
+
+            texto_original = page.filter(filtro_original(bboxes)).extract_text(x_tolerance=2)
+            texto_indexado = page.filter(filtro_indexado(bboxes)).extract_text(x_tolerance=2)
+            assert texto_original == texto_indexado, f"Texto divergente na página {i + 1}"
+
+            t_original = medir(page, filtro_original(bboxes), args.repeticoes)
+            t_indexado = medir(page, filtro_indexado(bboxes), args.repeticoes)
+            total_original += t_original
+            total_indexado += t_indexado
+            print(f"{i + 1:>6} {num_tabelas:>7} {num_objetos:>8} {t_original * 1000:>14.2f} {t_indexado * 1000:>14.2f} {t_original / t_indexado:>5.1f}x")
+
+        print(f"{'Total':>6} {'':>7} {'':>8} {total_original * 1000:>14.2f} {total_indexado * 1000:>14.2f} {total_original / total_indexado:>5.1f}x")
@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from langchain_core.documents import Document
+
+from avaliacao import avaliar_ranking, carregar_perguntas
+from driver_embeddings import EmbeddingsSimulados
+from empacotador_contexto import anotar_tokens, contar_tokens, empacotar_contexto
+from grafo_curricular import ARQUIVO_GRADE, carregar_grafo
+from indice_lexico import IndiceLexico
+from indice_mapeado import EscritorIndiceMapeado, IndiceMapeado
+from recuperacao_hibrida import (RAZAO_QUEDA_FUSAO, RetrieverHibrido, cortar_por_queda, documento_por_posicao,
+                                 fundir_variacoes, mesclar_resultados)
+from roteador_consultas import criar_roteador
+
+ARQUIVO_CHUNKS = 'chunks_completos.json'
+K_RECUPERACAO = 4
+MAX_CHUNKS_ANTIGO = 10
+
+
+def variacoes(pergunta):
+    return [pergunta, f"De acordo com o PPC, {pergunta}", f"{pergunta} (curso de SI)", f"Explique: {pergunta}"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ordem de chegada + 10 chunks x fusão RRF com corte por queda de pontuação.")
+    parser.add_argument("--arquivo", default=ARQUIVO_CHUNKS)
+    parser.add_argument("--razao", type=float, default=RAZAO_QUEDA_FUSAO)
+    args = parser.parse_args()
+
+    with open(args.arquivo, 'r', encoding='utf-8') as f:
+        documentos = anotar_tokens([Document(page_content=c['page_content'], metadata=c['metadata'])
+                                    for c in json.load(f)])
+    embeddings = EmbeddingsSimulados(dimensao=384)
+    pasta = tempfile.mkdtemp()
+    escritor = EscritorIndiceMapeado(pasta, embeddings)
+    escritor.adicionar(documentos)
+    escritor.finalizar("simulado", "simulado")
+    db = IndiceMapeado(pasta, embeddings)
+    lexico = IndiceLexico(pasta)
+    retriever = RetrieverHibrido(vectorstore=db, lexico=lexico, documento=documento_por_posicao(db), k=K_RECUPERACAO)
+    roteador = criar_roteador(db, pasta, carregar_grafo(ARQUIVO_GRADE))
+
+    modos = ("chegada, 10", "RRF, 10", "RRF + corte")
+    chunks, tokens, empacotados = ({modo: [] for modo in modos} for _ in range(3))
+    acertos, reciprocos = dict.fromkeys(modos, 0), dict.fromkeys(modos, 0.0)
+    perguntas = []
+    for item in carregar_perguntas():
+        # As perguntas roteadas não passam pelo multiquery.
+        rota = roteador.rotear(item['pergunta'])
+        if rota and roteador.recuperar(rota):
+            continue
+        perguntas.append(item)
+        resultados = retriever.recuperar_varias(variacoes(item['pergunta']))
+        fundidos = fundir_variacoes(resultados)
+        contextos = {"chegada, 10": [d for d, _ in mesclar_resultados(resultados)][:MAX_CHUNKS_ANTIGO],
+                     "RRF, 10": [d for d, _ in fundidos][:MAX_CHUNKS_ANTIGO],
+                     "RRF + corte": [d for d, _ in cortar_por_queda(fundidos, args.razao)]}
+        for modo, contexto in contextos.items():
+            chunks[modo].append(len(contexto))
+            tokens[modo].append(contar_tokens("\n\n".join(d.page_content for d in contexto)))
+            empacotados[modo].append(empacotar_contexto(contexto)[1])
+            acertou, reciproco = avaliar_ranking(contexto, item['relevantes'], len(contexto))
+            acertos[modo] += acertou
+            reciprocos[modo] += reciproco
+
+    print(f"{len(perguntas)} perguntas pelo multiquery ({len(variacoes(''))} consultas cada), razão de queda {args.razao}")
+    print(f"{'Contexto':<13} {'Chunks p50':>10} {'Média':>6} {'Tokens':>7} {'Empacotado':>10} {'Com relevante':>14} {'MRR':>6}")
+    for modo in modos:
+        print(f"{modo:<13} {statistics.median(chunks[modo]):>10.0f} {statistics.mean(chunks[modo]):>6.1f} "
+              f"{statistics.mean(tokens[modo]):>7.0f} {statistics.mean(empacotados[modo]):>10.0f} "
+              f"{acertos[modo]:>9}/{len(perguntas)} {reciprocos[modo] / len(perguntas):>6.3f}")
@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indice_mapeado import TIPOS_BUSCA, EscritorIndiceMapeado, IndiceMapeado
+
+K = 5
+
+
+def rss_atual_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def corpus_sintetico(total, dimensao, grupos, semente=0):
+    # Vetores normalizados agrupados em torno de 'grupos' centros, como embeddings de textos
+    # sobre poucos assuntos; as consultas são pontos do corpus com ruído.
+    aleatorio = np.random.default_rng(semente)
+    centros = aleatorio.standard_normal((grupos, dimensao)).astype(np.float32)
+    vetores = centros[aleatorio.integers(grupos, size=total)] + \
+        0.6 * aleatorio.standard_normal((total, dimensao)).astype(np.float32)
+    vetores /= np.linalg.norm(vetores, axis=1, keepdims=True)
+    return vetores
+
+
+def consultas_sinteticas(vetores, quantidade, semente=1):
+    aleatorio = np.random.default_rng(semente)
+    consultas = vetores[aleatorio.integers(len(vetores), size=quantidade)] + \
+        0.3 * aleatorio.standard_normal((quantidade, vetores.shape[1])).astype(np.float32) / np.sqrt(vetores.shape[1])
+    return (consultas / np.linalg.norm(consultas, axis=1, keepdims=True)).astype(np.float32)
+
+
+def medir(pasta_indice, caminho_consultas, caminho_gabarito):
+    # Roda num processo próprio para que o RSS de uma estrutura não contamine a outra.
+    consultas = np.load(caminho_consultas)
+    gabarito = np.load(caminho_gabarito)
+
+    rss_inicial = rss_atual_mb()
+    inicio = time.perf_counter()
+    indice = IndiceMapeado(pasta_indice, None)
+    tempo_abertura = time.perf_counter() - inicio
+
+    # Aquecimento: normas da busca exata e páginas da estrutura.
+    for consulta in consultas[:10]:
+        indice.similarity_search_with_score_by_vector(consulta, K)
+
+    tempos = []
+    acertos = 0
+    for consulta, esperados in zip(consultas, gabarito):
+        inicio = time.perf_counter()
+        resultado = indice.similarity_search_with_score_by_vector(consulta, K)
+        tempos.append(time.perf_counter() - inicio)
+        acertos += len({d.metadata['id'] for d, _ in resultado} & set(esperados.tolist()))
+
+    return {
+        "abertura_ms": tempo_abertura * 1000,
+        "p50_ms": float(np.percentile(tempos, 50)) * 1000,
+        "p99_ms": float(np.percentile(tempos, 99)) * 1000,
+        "recall": acertos / (len(consultas) * K),
+        "rss_mb": rss_atual_mb() - rss_inicial,
+    }
+
+
+def tamanho_estrutura_mb(pasta_indice, manifesto):
+    # Bytes que a busca percorre: os vetores na busca exata, o arquivo FAISS nas aproximadas.
+    arquivo = manifesto['arquivos']['busca' if 'busca' in manifesto['arquivos'] else 'vetores']
+    return os.path.getsize(os.path.join(pasta_indice, arquivo)) / (1024 * 1024)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memória, latência e recall@5 das estruturas de busca do índice mapeado.")
+    parser.add_argument("--total", type=int, default=100_000, help="Número de chunks sintéticos.")
+    parser.add_argument("--dimensao", type=int, default=384)
+    parser.add_argument("--grupos", type=int, default=1000)
+    parser.add_argument("--consultas", type=int, default=500)
+    parser.add_argument("--tipo-vetores", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--buscas", nargs="+", choices=TIPOS_BUSCA, default=list(TIPOS_BUSCA))
+    parser.add_argument("--medir", help=argparse.SUPPRESS)
+    parser.add_argument("--caminho-consultas", help=argparse.SUPPRESS)
+    parser.add_argument("--caminho-gabarito", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.caminho_consultas, args.caminho_gabarito)))
+        sys.exit(0)
+
+    print(f"Gerando {args.total} vetores sintéticos ({args.dimensao} dimensões, {args.grupos} grupos)...")
+    vetores = corpus_sintetico(args.total, args.dimensao, args.grupos)
+    consultas = consultas_sinteticas(vetores, args.consultas)
+    documentos = [Document(page_content=f"chunk {i}", metadata={"id": i}) for i in range(args.total)]
+
+    # Gabarito: busca exata em float32, a mesma do IndexFlatL2.
+    exato = faiss.IndexFlatL2(args.dimensao)
+    exato.add(vetores)
+    _, gabarito = exato.search(consultas, K)
+    del exato
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_consultas = os.path.join(pasta, "consultas.npy")
+        caminho_gabarito = os.path.join(pasta, "gabarito.npy")
+        np.save(caminho_consultas, consultas)
+        np.save(caminho_gabarito, gabarito)
+
+        linhas = []
+        for tipo_busca in args.buscas:
+            pasta_indice = os.path.join(pasta, tipo_busca)
+            inicio = time.perf_counter()
+            escritor = EscritorIndiceMapeado(pasta_indice, None, args.tipo_vetores, tipo_busca)
+            escritor.adicionar_vetores(documentos, vetores)
+            manifesto = escritor.finalizar("sintetico", "sintetico")
+            tempo_construcao = time.perf_counter() - inicio
+
+            saida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--medir", pasta_indice,
+                 "--caminho-consultas", caminho_consultas, "--caminho-gabarito", caminho_gabarito],
+                capture_output=True, text=True, check=True
+            ).stdout
+            r = json.loads(saida.strip().splitlines()[-1])
+            parametros = {chave: valor for chave, valor in manifesto['busca'].items() if chave != 'tipo'}
+            linhas.append(f"{tipo_busca:>6} {tempo_construcao:>15.1f} {tamanho_estrutura_mb(pasta_indice, manifesto):>15.1f} "
+                          f"{r['rss_mb']:>9.1f} {r['abertura_ms']:>14.2f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                          f"{r['recall']:>9.3f}  {parametros or ''}")
+
+    print(f"\n{args.total} chunks, {args.consultas} consultas, vetores em {args.tipo_vetores}, k={K}")
+    print(f"{'Busca':>6} {'Construção (s)':>15} {'Estrutura (MB)':>15} {'RSS (MB)':>9} {'Abertura (ms)':>14} "
+          f"{'p50 (ms)':>9} {'p99 (ms)':>9} {'Recall@5':>9}  Parâmetros")
+    for linha in linhas:
+        print(linha)
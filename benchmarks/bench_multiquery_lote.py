@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from avaliacao import carregar_perguntas
+from driver_embeddings import EmbeddingsSimulados
+from indice_lexico import IndiceLexico
+from indice_mapeado import EscritorIndiceMapeado, IndiceMapeado
+from recuperacao_hibrida import RetrieverHibrido, documento_por_posicao, mesclar_resultados, recuperar_em_lote
+
+ARQUIVO_CHUNKS = 'chunks_completos.json'
+# Variações fixas no lugar das geradas pelo LLM: o que importa aqui é o número de consultas.
+MODELOS_VARIACAO = ("{}", "De acordo com o PPC, {}", "{} (curso de Sistemas de Informação)", "Explique: {}")
+
+
+def sequencial(retriever, consultas):
+    # O caminho antigo do app: um invoke por consulta, juntando sem repetir.
+    documentos, vistos = [], set()
+    for consulta in consultas:
+        for documento in retriever.invoke(consulta):
+            if documento.page_content not in vistos:
+                vistos.add(documento.page_content)
+                documentos.append(documento)
+    return documentos
+
+
+def medir(nome, retriever, embeddings, perguntas):
+    tempos_seq, tempos_lote, chamadas_seq, chamadas_lote = [], [], 0, 0
+    for pergunta in perguntas:
+        consultas = [modelo.format(pergunta) for modelo in MODELOS_VARIACAO]
+        antes = embeddings.chamadas
+        inicio = time.perf_counter()
+        esperados = sequencial(retriever, consultas)
+        tempos_seq.append(time.perf_counter() - inicio)
+        chamadas_seq += embeddings.chamadas - antes
+
+        antes = embeddings.chamadas
+        inicio = time.perf_counter()
+        obtidos = [documento for documento, _ in mesclar_resultados(recuperar_em_lote(retriever, consultas))]
+        tempos_lote.append(time.perf_counter() - inicio)
+        chamadas_lote += embeddings.chamadas - antes
+        assert [d.page_content for d in obtidos] == [d.page_content for d in esperados], f"Divergência: {pergunta}"
+    print(f"{nome:<18} {statistics.median(tempos_seq) * 1000:>10.1f} {statistics.median(tempos_lote) * 1000:>10.1f} "
+          f"{chamadas_seq / len(perguntas):>8.1f} {chamadas_lote / len(perguntas):>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multiquery sequencial x em lote (um embedding e uma busca por pergunta).")
+    parser.add_argument("--arquivo", default=ARQUIVO_CHUNKS)
+    parser.add_argument("--latencia", type=float, default=0.15, help="Segundos por requisição de embedding simulada.")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.arquivo, 'r', encoding='utf-8') as f:
+        documentos = [Document(page_content=c['page_content'], metadata=c['metadata']) for c in json.load(f)]
+    perguntas = [item['pergunta'] for item in carregar_perguntas()]
+
+    # Os índices são montados sem latência; ela só vale nas consultas.
+    embeddings = EmbeddingsSimulados(dimensao=384)
+    pasta = tempfile.mkdtemp()
+    escritor = EscritorIndiceMapeado(pasta, embeddings)
+    escritor.adicionar(documentos)
+    escritor.finalizar("simulado", "simulado")
+    mapeado = IndiceMapeado(pasta, embeddings)
+    faiss_lc = FAISS.from_documents(documentos, embeddings)
+    embeddings.latencia = args.latencia
+
+    print(f"{len(perguntas)} perguntas x {len(MODELOS_VARIACAO)} consultas, "
+          f"{args.latencia * 1000:.0f} ms por requisição de embedding")
+    print(f"{'Retriever':<18} {'Seq. p50':>10} {'Lote p50':>10} {'Req. seq':>8} {'Req. lote':>8}")
+    medir("mapeado", mapeado.as_retriever(search_kwargs={"k": args.k}), embeddings, perguntas)
+    medir("faiss (langchain)", faiss_lc.as_retriever(search_kwargs={"k": args.k}), embeddings, perguntas)
+    medir("híbrido (bm25)", RetrieverHibrido(vectorstore=mapeado, lexico=IndiceLexico(pasta),
+                                             documento=documento_por_posicao(mapeado), k=args.k),
+          embeddings, perguntas)
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dotenv import load_dotenv
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from avaliacao import avaliar_ranking, carregar_perguntas, percentil
+from backends_embedding import BACKEND_LOCAL, BACKEND_OPENAI, MODELOS_PADRAO, criar_embeddings
+from cache_embeddings import CacheEmbeddings, EmbeddingsComCache
+from driver_embeddings import EmbeddingsSimulados
+from indice_lexico import IndiceLexico, salvar_indice_lexico
+from recuperacao_hibrida import RetrieverHibrido, documento_por_posicao
+
+ARQUIVO_CHUNKS = 'chunks_completos.json'
+BACKEND_SIMULADO = "simulado"
+
+
+def criar_backend(nome, modelo_local):
+    if nome == BACKEND_SIMULADO:
+        # Vetores aleatórios por texto: piso de referência para o recall.
+        return EmbeddingsSimulados(dimensao=384), "simulado"
+    modelo = modelo_local if nome == BACKEND_LOCAL else MODELOS_PADRAO[nome]
+    return criar_embeddings(nome, modelo), modelo
+
+
+def avaliar(nome, buscar, perguntas, k):
+    latencias, acertos, reciprocos = [], 0, []
+    for item in perguntas:
+        inicio = time.perf_counter()
+        resultado = buscar(item['pergunta'])
+        latencias.append(time.perf_counter() - inicio)
+        acertou, reciproco = avaliar_ranking(resultado, item['relevantes'], k)
+        acertos += acertou
+        reciprocos.append(reciproco)
+        if not acertou:
+            print(f"   -- [{nome}] sem relevante no top-{k}: {item['pergunta']}")
+    return (statistics.median(latencias) * 1000, percentil(latencias, 95) * 1000,
+            acertos / len(perguntas), statistics.mean(reciprocos))
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Latência e recall dos backends de embedding nas perguntas de avaliação.")
+    parser.add_argument("--arquivo", default=ARQUIVO_CHUNKS)
+    parser.add_argument("--backends", nargs="+", default=[BACKEND_OPENAI, BACKEND_LOCAL],
+                        choices=[BACKEND_OPENAI, BACKEND_LOCAL, BACKEND_SIMULADO])
+    parser.add_argument("--modelo-local", default=MODELOS_PADRAO[BACKEND_LOCAL])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--sem-cache", action="store_true", help="Mede a criação do índice sem o cache de embeddings.")
+    parser.add_argument("--hibrido", action="store_true",
+                        help="Avalia também o BM25 sozinho e cada backend fundido com o BM25 (RRF).")
+    args = parser.parse_args()
+
+    with open(args.arquivo, 'r', encoding='utf-8') as f:
+        documentos = [Document(page_content=c['page_content'], metadata=c['metadata']) for c in json.load(f)]
+    perguntas = carregar_perguntas()
+
+    linhas = []
+    lexico = None
+    if args.hibrido:
+        pasta_lexico = tempfile.mkdtemp()
+        inicio = time.perf_counter()
+        salvar_indice_lexico([d.page_content for d in documentos], pasta_lexico)
+        tempo_lexico = time.perf_counter() - inicio
+        lexico = IndiceLexico(pasta_lexico)
+        resultado = avaliar("bm25", lambda pergunta: [documentos[i] for i, _ in lexico.buscar(pergunta, args.k)],
+                            perguntas, args.k)
+        linhas.append(("bm25", "-", 0, tempo_lexico) + resultado)
+    for nome in args.backends:
+        try:
+            base, modelo = criar_backend(nome, args.modelo_local)
+            cache = CacheEmbeddings(tempfile.mkdtemp()) if args.sem_cache else CacheEmbeddings()
+            embeddings = EmbeddingsComCache(base, modelo, cache)
+
+            inicio = time.perf_counter()
+            db = FAISS.from_documents(documentos, embeddings)
+            tempo_indice = time.perf_counter() - inicio
+            embeddings.imprimir_estatisticas()
+
+            resultado = avaliar(nome, lambda pergunta: db.similarity_search(pergunta, k=args.k), perguntas, args.k)
+            linhas.append((nome, modelo, db.index.d, tempo_indice) + resultado)
+            if lexico is not None:
+                hibrido = RetrieverHibrido(vectorstore=db, lexico=lexico, documento=documento_por_posicao(db), k=args.k)
+                resultado = avaliar(f"{nome}+bm25", hibrido.invoke, perguntas, args.k)
+                linhas.append((f"{nome}+bm25", modelo, db.index.d, tempo_indice) + resultado)
+            cache.fechar()
+        except Exception as e:
+            print(f"   -- {nome}: indisponível ({type(e).__name__}: {e})")
+            continue
+
+    print(f"\n{len(perguntas)} perguntas, {len(documentos)} chunks, k={args.k}")
+    print(f"{'Backend':>14} {'Dim':>5} {'Índice (s)':>10} {'Consulta p50 (ms)':>18} {'p95 (ms)':>9} "
+          f"{'Recall@k':>9} {'MRR':>6}  Modelo")
+    for nome, modelo, dimensao, tempo_indice, p50, p95, recall, mrr in linhas:
+        print(f"{nome:>14} {dimensao:>5} {tempo_indice:>10.2f} {p50:>18.1f} {p95:>9.1f} {recall:>9.2f} {mrr:>6.2f}  {modelo}")
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+# Caches do lado da consulta, compartilhados entre as sessões, cada um limitado (LRU) e com TTL:
+#   variações:   pergunta normalizada -> variações geradas pelo LLM (multiquery)
+#   embeddings:  (modelo, texto) -> vetor da consulta
+#   resultados:  (versão do índice, k, texto) -> [(posição, distância)] da busca vetorial
+# Nenhum guarda respostas: uma pergunta popular só deixa de pagar as idas à rede antes do LLM respondedor.
+TTL_VARIACOES = 24 * 3600
+TTL_EMBEDDINGS = 24 * 3600
+TTL_RESULTADOS = 3600
+MAX_VARIACOES = 2000
+MAX_EMBEDDINGS = 10000
+MAX_RESULTADOS = 5000
+
+
+class CacheTTL:
+
+    def __init__(self, max_entradas, ttl, relogio=time.monotonic):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.relogio = relogio
+        self.entradas = OrderedDict()
+        self.consultas = 0
+        self.acertos = 0
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def obter(self, chave):
+        with self._trava:
+            self.consultas += 1
+            item = self.entradas.get(chave)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if expira_em <= self.relogio():
+                del self.entradas[chave]
+                return None
+            self.entradas.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave, valor):
+        with self._trava:
+            self.entradas[chave] = (self.relogio() + self.ttl, valor)
+            self.entradas.move_to_end(chave)
+            while len(self.entradas) > self.max_entradas:
+                self.entradas.popitem(last=False)
+
+    def estatisticas(self):
+        taxa = self.acertos / self.consultas if self.consultas else 0.0
+        return f"{self.acertos}/{self.consultas} ({taxa:.0%}), {len(self.entradas)} entradas"
+
+
+class CachesConsulta:
+
+    def __init__(self, ttl_variacoes=TTL_VARIACOES, ttl_embeddings=TTL_EMBEDDINGS, ttl_resultados=TTL_RESULTADOS,
+                 max_variacoes=MAX_VARIACOES, max_embeddings=MAX_EMBEDDINGS, max_resultados=MAX_RESULTADOS):
+        self.variacoes = CacheTTL(max_variacoes, ttl_variacoes)
+        self.embeddings = CacheTTL(max_embeddings, ttl_embeddings)
+        self.resultados = CacheTTL(max_resultados, ttl_resultados)
+
+    def estatisticas(self):
+        return (f"variações {self.variacoes.estatisticas()}; embeddings {self.embeddings.estatisticas()}; "
+                f"resultados {self.resultados.estatisticas()}")
+
+
+class EmbeddingsComCacheTTL(Embeddings):
+    # Embedder das consultas com o cache em memória na frente: só os textos ausentes vão ao
+    # modelo, num único pedido. O modelo entra na chave, porque outro índice pode usar outro embedder.
+
+    def __init__(self, embeddings, modelo, cache):
+        self.embeddings = embeddings
+        self.modelo = modelo
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        vetores = [self.cache.obter((self.modelo, texto)) for texto in texts]
+        faltantes = [i for i, vetor in enumerate(vetores) if vetor is None]
+        if faltantes:
+            novos = self.embeddings.embed_documents([texts[i] for i in faltantes])
+            for i, vetor in zip(faltantes, novos):
+                self.cache.guardar((self.modelo, texts[i]), vetor)
+                vetores[i] = vetor
+        return vetores
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
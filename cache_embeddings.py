@@ -0,0 +1,141 @@
+import hashlib
+import os
+import sqlite3
+import time
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+PASTA_CACHE_EMBEDDINGS = ".cache_embeddings"
+LIMITE_CACHE_EMBEDDINGS_BYTES = 200 * 1024 * 1024
+
+
+def hash_texto(texto):
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+class CacheEmbeddings:
+    # Cache em disco (SQLite) dos vetores, endereçado por (modelo, sha256 do page_content).
+    # Os vetores são gravados como float32, a mesma precisão guardada pelo FAISS. ultimo_acesso
+    # decide quem sai primeiro em aplicar_limite().
+
+    def __init__(self, pasta=PASTA_CACHE_EMBEDDINGS, limite_bytes=LIMITE_CACHE_EMBEDDINGS_BYTES):
+        self.pasta = pasta
+        self.limite_bytes = limite_bytes
+        self._conexao = None
+
+    @property
+    def conexao(self):
+        if self._conexao is None:
+            os.makedirs(self.pasta, exist_ok=True)
+            self._conexao = sqlite3.connect(os.path.join(self.pasta, "embeddings.sqlite"), timeout=60)
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    modelo TEXT NOT NULL,
+                    hash_texto TEXT NOT NULL,
+                    vetor BLOB NOT NULL,
+                    ultimo_acesso REAL NOT NULL,
+                    PRIMARY KEY (modelo, hash_texto)
+                )
+            """)
+            self._conexao.commit()
+        return self._conexao
+
+    def obter_varios(self, modelo, hashes):
+        # Devolve {hash: vetor} só para os hashes presentes no cache.
+        encontrados = {}
+        unicos = list(dict.fromkeys(hashes))
+        for i in range(0, len(unicos), 500):
+            lote = unicos[i:i + 500]
+            linhas = self.conexao.execute(
+                f"SELECT hash_texto, vetor FROM embeddings WHERE modelo = ? AND hash_texto IN ({','.join('?' * len(lote))})",
+                [modelo] + lote
+            ).fetchall()
+            for hash_encontrado, dados in linhas:
+                vetor = array('f')
+                vetor.frombytes(dados)
+                encontrados[hash_encontrado] = vetor.tolist()
+        if encontrados:
+            self.conexao.executemany(
+                "UPDATE embeddings SET ultimo_acesso = ? WHERE modelo = ? AND hash_texto = ?",
+                [(time.time(), modelo, h) for h in encontrados]
+            )
+            self.conexao.commit()
+        return encontrados
+
+    def gravar_varios(self, modelo, vetores_por_hash):
+        agora = time.time()
+        self.conexao.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+            [(modelo, h, array('f', vetor).tobytes(), agora) for h, vetor in vetores_por_hash.items()]
+        )
+        self.conexao.commit()
+
+    def tamanho_total(self):
+        return self.conexao.execute("SELECT COALESCE(SUM(LENGTH(vetor)), 0) FROM embeddings").fetchone()[0]
+
+    def aplicar_limite(self):
+        # Remove os vetores menos recentemente usados até caber em limite_bytes.
+        excedente = self.tamanho_total() - self.limite_bytes
+        if excedente <= 0:
+            return 0
+
+        removidas = 0
+        linhas = self.conexao.execute(
+            "SELECT rowid, LENGTH(vetor) FROM embeddings ORDER BY ultimo_acesso ASC"
+        ).fetchall()
+        for rowid, tamanho in linhas:
+            if excedente <= 0:
+                break
+            self.conexao.execute("DELETE FROM embeddings WHERE rowid = ?", (rowid,))
+            excedente -= tamanho
+            removidas += 1
+        self.conexao.commit()
+        print(f"   -- Cache de embeddings: {removidas} vetores antigos removidos (limite de {self.limite_bytes // (1024 * 1024)} MB).")
+        return removidas
+
+    def fechar(self):
+        if self._conexao is not None:
+            self._conexao.close()
+            self._conexao = None
+
+
+class EmbeddingsComCache(Embeddings):
+    # Envolve um modelo de embedding: embed_documents só chama o modelo para os textos
+    # que ainda não estão no cache. Consultas (embed_query) não passam pelo cache.
+
+    def __init__(self, embeddings, modelo, cache=None):
+        self.embeddings = embeddings
+        self.modelo = modelo
+        self.cache = cache or CacheEmbeddings()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts):
+        hashes = [hash_texto(texto) for texto in texts]
+        vetores = self.cache.obter_varios(self.modelo, hashes)
+
+        faltantes = {}
+        for h, texto in zip(hashes, texts):
+            if h not in vetores:
+                faltantes.setdefault(h, texto)
+        self.hits += len(texts) - sum(1 for h in hashes if h in faltantes)
+        self.misses += sum(1 for h in hashes if h in faltantes)
+
+        if faltantes:
+            novos = self.embeddings.embed_documents(list(faltantes.values()))
+            # Arredonda para float32 já aqui: hit e miss produzem exatamente o mesmo vetor.
+            novos = {h: array('f', vetor).tolist() for h, vetor in zip(faltantes, novos)}
+            self.cache.gravar_varios(self.modelo, novos)
+            vetores.update(novos)
+        return [vetores[h] for h in hashes]
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+    def imprimir_estatisticas(self):
+        total = self.hits + self.misses
+        taxa = (self.hits / total * 100) if total else 0.0
+        print(f"   -- Cache de embeddings ({self.modelo}): {self.hits} hits / {self.misses} misses "
+              f"({taxa:.1f}% reaproveitados)")
@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from indice_lexico import dobrar_acentos, tokenizar
+from roteador_consultas import semestre_citado
+
+# Cache semântico de respostas, compartilhado entre as sessões: uma pergunta nova cuja
+# similaridade de cosseno com uma já respondida passa do limiar recebe a mesma resposta.
+# Limitado por número de entradas e por bytes (LRU); esvaziado quando a versão do índice muda.
+LIMIAR_SIMILARIDADE = 0.95
+MAX_ENTRADAS_RESPOSTAS = 1000
+MAX_BYTES_RESPOSTAS = 16 * 1024 * 1024
+
+
+def assinatura_pergunta(pergunta, rota=None):
+    # Perguntas quase iguais sobre semestres, códigos ou entidades diferentes ("ementa de X" e
+    # "ementa de Y") não podem compartilhar a resposta: a assinatura precisa coincidir.
+    numeros = tuple(sorted(t for t in tokenizar(pergunta) if any(c.isdigit() for c in t)))
+    entidade = (rota['intencao'], tuple(rota['valores'] or ())) if rota else None
+    return (semestre_citado(dobrar_acentos(pergunta)), numeros, entidade)
+
+
+class CacheRespostas:
+
+    def __init__(self, limiar=LIMIAR_SIMILARIDADE, max_entradas=MAX_ENTRADAS_RESPOSTAS, max_bytes=MAX_BYTES_RESPOSTAS):
+        self.limiar = limiar
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.versao = None
+        # Vetores em posições fixas de uma matriz; a ordem de uso (LRU) fica no OrderedDict.
+        self.vetores = None
+        self.entradas = OrderedDict()
+        self.livres = list(range(max_entradas - 1, -1, -1))
+        self.bytes = 0
+        self.consultas = 0
+        self.acertos = 0
+        self.segundos_economizados = 0.0
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def _limpar(self, versao):
+        self.versao = versao
+        self.vetores = None
+        self.entradas.clear()
+        self.livres = list(range(self.max_entradas - 1, -1, -1))
+        self.bytes = 0
+
+    def _remover_mais_antiga(self):
+        posicao, entrada = self.entradas.popitem(last=False)
+        self.livres.append(posicao)
+        self.bytes -= entrada['bytes']
+
+    @staticmethod
+    def _normalizar(vetor):
+        vetor = np.asarray(vetor, dtype=np.float32)
+        return vetor / (np.linalg.norm(vetor) or 1.0)
+
+    def buscar(self, vetor, assinatura, versao):
+        # Devolve a entrada {"pergunta", "resposta", "similaridade", ...} ou None.
+        with self._trava:
+            self.consultas += 1
+            if versao != self.versao:
+                self._limpar(versao)
+            if not self.entradas:
+                return None
+            posicoes = np.fromiter(self.entradas, dtype=np.int64, count=len(self.entradas))
+            similaridades = self.vetores[posicoes] @ self._normalizar(vetor)
+            for i in np.argsort(-similaridades):
+                if similaridades[i] < self.limiar:
+                    return None
+                entrada = self.entradas[int(posicoes[i])]
+                if entrada['assinatura'] == assinatura:
+                    self.entradas.move_to_end(int(posicoes[i]))
+                    self.acertos += 1
+                    self.segundos_economizados += entrada['segundos']
+                    return dict(entrada, similaridade=float(similaridades[i]))
+            return None
+
+    def guardar(self, pergunta, vetor, assinatura, resposta, versao, segundos):
+        # segundos: quanto custou produzir a resposta, contado como economia a cada acerto.
+        vetor = self._normalizar(vetor)
+        tamanho = len(pergunta.encode('utf-8')) + len(resposta.encode('utf-8')) + vetor.nbytes
+        if tamanho > self.max_bytes:
+            return
+        with self._trava:
+            if versao != self.versao:
+                self._limpar(versao)
+            if self.vetores is None:
+                self.vetores = np.zeros((self.max_entradas, len(vetor)), dtype=np.float32)
+            while self.entradas and (not self.livres or self.bytes + tamanho > self.max_bytes):
+                self._remover_mais_antiga()
+            posicao = self.livres.pop()
+            self.vetores[posicao] = vetor
+            self.entradas[posicao] = {"pergunta": pergunta, "resposta": resposta, "assinatura": assinatura,
+                                      "segundos": segundos, "bytes": tamanho}
+            self.bytes += tamanho
+
+    def estatisticas(self):
+        taxa = self.acertos / self.consultas if self.consultas else 0.0
+        return (f"{self.acertos}/{self.consultas} acertos ({taxa:.0%}), {len(self.entradas)} respostas, "
+                f"{self.bytes / 1024:.0f} KiB, ~{self.segundos_economizados:.1f} s economizados")
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from indice_lexico import dobrar_acentos
+
+# Classificador local acadêmico x chitchat, na frente do classify_chain: regressão logística
+# sobre n-gramas de caracteres (por hashing) e palavras-chave. Decide sozinho os casos
+# confiantes; os demais vão ao LLM. Com REGISTRAR_CLASSIFICACOES=1, os rótulos do LLM ficam em
+# classificacoes.jsonl para o próximo treino.
+ARQUIVO_MODELO_INTENCAO = "classificador_intencao.json"
+ARQUIVO_SEMENTES_INTENCAO = "sementes_intencao.json"
+ARQUIVO_LOG_INTENCAO = "classificacoes.jsonl"
+# O log guarda o texto das perguntas dos usuários: desligado por padrão e limitado em tamanho.
+# Ao passar de MAX_BYTES_LOG_INTENCAO, o arquivo vira classificacoes.jsonl.1 (substituindo o anterior).
+VARIAVEL_LOG_INTENCAO = "REGISTRAR_CLASSIFICACOES"
+MAX_BYTES_LOG_INTENCAO = 2 * 1024 * 1024
+VERSAO_MODELO_INTENCAO = 2
+ACADEMICO = "academico"
+CHITCHAT = "chitchat"
+DIMENSAO_HASH = 2 ** 12
+TAMANHOS_NGRAMA = (2, 3, 4)
+# Probabilidade mínima da classe vencedora para dispensar o LLM.
+LIMIAR_CONFIANCA = 0.95
+# Palavras inteiras (ou sequências de palavras), já sem acentos; com '*' no fim, a última palavra
+# vale como prefixo ("obrigad*" pega obrigado e obrigada). Cada uma vira uma característica binária.
+PALAVRAS_CHAVE = (
+    "disciplina*", "materia*", "curso*", "ppc", "tcc", "estagio*", "semestre*", "periodo*", "ementa*", "matricula*",
+    "trancar", "trancamento", "carga horaria", "horas", "credito*", "professor*", "docente*", "coordena*",
+    "optativa*", "requisito*", "bibliografia*", "prova", "provas", "nota", "notas", "falta", "faltas", "frequencia",
+    "aprova*", "reprova*", "extensao", "atividades complementares", "equivalencia*", "curricul*", "colacao",
+    "diploma*", "enade", "jubilamento",
+    "oi", "ola", "bom dia", "boa tarde", "boa noite", "obrigad*", "obg", "valeu", "vlw", "tchau", "ate logo",
+    "tudo bem", "beleza", "blz", "quem e voce", "seu nome", "voce e", "piada*", "kk*", "haha*", "rs", "rsrs*",
+)
+# Padrão procurado no texto normalizado entre espaços: " chave " (palavras inteiras) ou " prefixo".
+PADROES_PALAVRAS_CHAVE = tuple(f" {chave[:-1]}" if chave.endswith("*") else f" {chave} " for chave in PALAVRAS_CHAVE)
+EPOCAS_TREINO = 3000
+TAXA_APRENDIZADO = 4.0
+REGULARIZACAO = 1e-4
+
+
+def normalizar_texto(texto):
+    return " ".join(re.findall(r"[a-z0-9]+", dobrar_acentos(texto)))
+
+
+def caracteristicas(texto):
+    # {índice: valor}: contagens de n-gramas normalizadas (norma L2) seguidas das palavras-chave.
+    texto = normalizar_texto(texto)
+    contagens = {}
+    ajustado = f" {texto} "
+    for n in TAMANHOS_NGRAMA:
+        for inicio in range(len(ajustado) - n + 1):
+            indice = zlib.crc32(ajustado[inicio:inicio + n].encode('utf-8')) % DIMENSAO_HASH
+            contagens[indice] = contagens.get(indice, 0.0) + 1.0
+    norma = sum(v * v for v in contagens.values()) ** 0.5 or 1.0
+    valores = {indice: v / norma for indice, v in contagens.items()}
+    for posicao, padrao in enumerate(PADROES_PALAVRAS_CHAVE):
+        if padrao in ajustado:
+            valores[DIMENSAO_HASH + posicao] = 1.0
+    return valores
+
+
+def matriz_caracteristicas(textos):
+    matriz = np.zeros((len(textos), DIMENSAO_HASH + len(PALAVRAS_CHAVE)), dtype=np.float32)
+    for linha, texto in enumerate(textos):
+        for indice, valor in caracteristicas(texto).items():
+            matriz[linha, indice] = valor
+    return matriz
+
+
+def treinar(textos, rotulos, epocas=EPOCAS_TREINO, taxa=TAXA_APRENDIZADO, regularizacao=REGULARIZACAO):
+    # Descida de gradiente em lote, com as classes pesadas pelo inverso da frequência.
+    x = matriz_caracteristicas(textos)
+    y = np.asarray([1.0 if rotulo == ACADEMICO else 0.0 for rotulo in rotulos], dtype=np.float32)
+    positivos = max(y.sum(), 1.0)
+    negativos = max(len(y) - y.sum(), 1.0)
+    pesos_amostra = np.where(y == 1.0, len(y) / (2 * positivos), len(y) / (2 * negativos)).astype(np.float32)
+    pesos = np.zeros(x.shape[1], dtype=np.float32)
+    vies = 0.0
+    for _ in range(epocas):
+        p = 1.0 / (1.0 + np.exp(-(x @ pesos + vies)))
+        erro = (p - y) * pesos_amostra / len(y)
+        pesos -= taxa * (x.T @ erro + regularizacao * pesos)
+        vies -= taxa * float(erro.sum())
+    return {"versao": VERSAO_MODELO_INTENCAO, "dimensao_hash": DIMENSAO_HASH, "palavras_chave": list(PALAVRAS_CHAVE),
+            "limiar": LIMIAR_CONFIANCA, "exemplos": len(textos), "vies": vies,
+            "pesos": [round(float(v), 6) for v in pesos]}
+
+
+def carregar_exemplos(caminho_sementes=ARQUIVO_SEMENTES_INTENCAO, caminho_log=ARQUIVO_LOG_INTENCAO):
+    # Sementes rotuladas à mão + perguntas rotuladas pelo LLM no app. Repetições (mesmo texto
+    # normalizado) ficam com o rótulo mais recente.
+    exemplos = {}
+    with open(caminho_sementes, 'r', encoding='utf-8') as f:
+        for rotulo, perguntas in json.load(f).items():
+            for pergunta in perguntas:
+                exemplos[normalizar_texto(pergunta)] = (pergunta, rotulo, "semente")
+    # O arquivo rotacionado é mais antigo: lido antes, para o rótulo recente prevalecer.
+    for caminho in ([caminho_log + ".1", caminho_log] if caminho_log else []):
+        if not os.path.exists(caminho):
+            continue
+        with open(caminho, 'r', encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    registro = json.loads(linha)
+                    exemplos[normalizar_texto(registro['pergunta'])] = (registro['pergunta'], registro['rotulo'], "llm")
+    return list(exemplos.values())
+
+
+class RegistroRotulos:
+    # Compartilhado entre as sessões do app; uma linha por pergunta decidida pelo LLM.
+
+    def __init__(self, caminho=ARQUIVO_LOG_INTENCAO, max_bytes=MAX_BYTES_LOG_INTENCAO):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self._trava = threading.Lock()
+
+    def registrar(self, pergunta, rotulo):
+        linha = (json.dumps({"pergunta": pergunta, "rotulo": rotulo}, ensure_ascii=False) + "\n").encode('utf-8')
+        with self._trava:
+            if os.path.exists(self.caminho) and os.path.getsize(self.caminho) + len(linha) > self.max_bytes:
+                os.replace(self.caminho, self.caminho + ".1")
+            with open(self.caminho, 'ab') as f:
+                f.write(linha)
+
+
+def criar_registro_rotulos(caminho=ARQUIVO_LOG_INTENCAO):
+    # None (nada é gravado) a menos que REGISTRAR_CLASSIFICACOES=1.
+    if os.environ.get(VARIAVEL_LOG_INTENCAO, "0") != "1":
+        return None
+    return RegistroRotulos(caminho)
+
+
+def carregar_classificador_intencao(caminho=ARQUIVO_MODELO_INTENCAO):
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    if dados.get('versao') != VERSAO_MODELO_INTENCAO or dados.get('dimensao_hash') != DIMENSAO_HASH \
+            or dados.get('palavras_chave') != list(PALAVRAS_CHAVE):
+        return None
+    return ClassificadorIntencao(dados)
+
+
+class ClassificadorIntencao:
+
+    def __init__(self, dados, limiar=None):
+        self.pesos = np.asarray(dados['pesos'], dtype=np.float32)
+        self.vies = dados['vies']
+        self.limiar = limiar if limiar is not None else dados['limiar']
+
+    def probabilidade_academico(self, pergunta):
+        valores = caracteristicas(pergunta)
+        z = self.vies + sum(float(self.pesos[indice]) * valor for indice, valor in valores.items())
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def classificar(self, pergunta):
+        # (rótulo, probabilidade de acadêmico); rótulo None quando a confiança é baixa.
+        p = self.probabilidade_academico(pergunta)
+        if p >= self.limiar:
+            return ACADEMICO, p
+        if p <= 1.0 - self.limiar:
+            return CHITCHAT, p
+        return None, p
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treina ou consulta o classificador local de intenção.")
+    parser.add_argument("pergunta", nargs="?", help="Pergunta a classificar com o modelo salvo.")
+    parser.add_argument("--treinar", action="store_true", help="Treina com as sementes e o log do app.")
+    parser.add_argument("--sementes", default=ARQUIVO_SEMENTES_INTENCAO)
+    parser.add_argument("--log", default=ARQUIVO_LOG_INTENCAO)
+    parser.add_argument("--modelo", default=ARQUIVO_MODELO_INTENCAO)
+    args = parser.parse_args()
+
+    if args.treinar:
+        exemplos = carregar_exemplos(args.sementes, args.log)
+        modelo = treinar([e[0] for e in exemplos], [e[1] for e in exemplos])
+        with open(args.modelo, 'w', encoding='utf-8') as f:
+            json.dump(modelo, f, ensure_ascii=False)
+        do_llm = sum(1 for e in exemplos if e[2] == "llm")
+        print(f"Modelo salvo em '{args.modelo}': {len(exemplos)} exemplos ({do_llm} rotulados pelo LLM).")
+    if args.pergunta:
+        classificador = carregar_classificador_intencao(args.modelo)
+        if classificador is None:
+            print(f"Erro: '{args.modelo}' não encontrado ou desatualizado. Rode com --treinar.")
+            exit()
+        inicio = time.perf_counter()
+        rotulo, p = classificador.classificar(args.pergunta)
+        print(f"{rotulo or 'incerto (LLM)'}: p(acadêmico)={p:.3f} em {(time.perf_counter() - inicio) * 1e6:.0f} µs")
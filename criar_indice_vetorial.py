@@ -1,73 +1,199 @@
 
+import argparse
 import json
 import os
 import shutil
 from dotenv import load_dotenv
 from langchain_core.documents import Document
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
+
+from armazem_chunks import ArmazemChunks, EXTENSAO_ARMAZEM
+from backends_embedding import BACKEND_LOCAL, BACKEND_OPENAI, MODELOS_PADRAO, criar_embeddings, salvar_identidade
+from cache_embeddings import CacheEmbeddings, EmbeddingsComCache
+from driver_embeddings import DriverEmbeddings
+from empacotador_contexto import anotar_tokens
+from indice_lexico import salvar_indice_lexico
+from indice_metadados import salvar_indice_metadados
+from indice_mapeado import BUSCA_EXATA, EscritorIndiceMapeado, TIPOS_BUSCA, TIPOS_VETORES
+from recuperacao_hibrida import documento_por_posicao
 
 load_dotenv()
 
 PASTA_INDICE_FAISS = "faiss_index"
-MODELO_EMBEDDING_OPENAI = "text-embedding-3-small"
 ARQUIVO_JSON_CHUNKS = "chunks_completos.json"
-
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-
-if not OPENAI_API_KEY:
-    print("Erro: A chave OPENAI_API_KEY não foi encontrada no arquivo .env")
-    exit()
-    
-print("API Key da OpenAI carregada com sucesso do arquivo .env.")
+TAMANHO_LOTE_INDEXACAO = 200
+FORMATO_MAPEADO = "mapeado"
+FORMATO_FAISS = "faiss"
+
+def verificar_api_key_openai():
+    if not os.environ.get("OPENAI_API_KEY"):
+        print("Erro: A chave OPENAI_API_KEY não foi encontrada no arquivo .env")
+        return False
+    print("API Key da OpenAI carregada com sucesso do arquivo .env.")
+    return True
+
+def iterar_chunks_do_jsonl(caminho_jsonl):
+    # Lê um chunk por linha, sem carregar o arquivo inteiro.
+    with open(caminho_jsonl, 'r', encoding='utf-8') as f:
+        for linha in f:
+            if linha.strip():
+                chunk = json.loads(linha)
+                yield Document(page_content=chunk['page_content'], metadata=chunk['metadata'])
+
+def iterar_chunks_do_armazem(caminho_armazem):
+    # O armazém é mapeado em memória: cada chunk só é decodificado quando consumido.
+    with ArmazemChunks(caminho_armazem) as armazem:
+        for chunk in armazem:
+            yield Document(page_content=chunk['page_content'], metadata=chunk['metadata'])
 
 def carregar_chunks_do_json(caminho_json):
     print(f"Carregando chunks do arquivo: {caminho_json}...")
+    if caminho_json.endswith('.jsonl'):
+        # Em JSON Lines os documentos são entregues sob demanda.
+        return iterar_chunks_do_jsonl(caminho_json)
+    if caminho_json.endswith(EXTENSAO_ARMAZEM):
+        return iterar_chunks_do_armazem(caminho_json)
     with open(caminho_json, 'r', encoding='utf-8') as f:
         dados_chunks = json.load(f)
     documentos = [ Document(page_content=chunk['page_content'], metadata=chunk['metadata']) for chunk in dados_chunks ]
     print(f"Total de {len(documentos)} documentos carregados.")
     return documentos
 
-def criar_e_salvar_indice_faiss_openai(documentos, pasta_indice):
-    
-    if not documentos:
-        print("Nenhum documento para indexar. Encerrando.")
-        return
-
-    print("Inicializando modelo de embedding da OpenAI (text-embedding-3-small)...")
+def iterar_lotes(documentos, tamanho_lote=TAMANHO_LOTE_INDEXACAO):
+    lote = []
+    for documento in documentos:
+        lote.append(documento)
+        if len(lote) == tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def criar_e_salvar_indice_faiss(documentos, pasta_indice, backend=BACKEND_OPENAI, modelo=None, processos=1,
+                                formato=FORMATO_MAPEADO, tipo_vetores="float32", tipo_busca=BUSCA_EXATA, parametros_busca=None):
+    # 'documentos' pode ser uma lista ou um gerador (JSON Lines); o índice é montado em lotes.
+    # No formato mapeado os vetores e chunks vão para arquivos sem pickle (ver indice_mapeado.py);
+    # no formato faiss, para o index.faiss + index.pkl do LangChain. tipo_busca escolhe a estrutura
+    # de busca do formato mapeado (exata, sq8, ivf ou hnsw) e fica registrado no manifesto.
+    modelo = modelo or MODELOS_PADRAO[backend]
+
+    print(f"Inicializando modelo de embedding '{backend}' ({modelo})...")
     try:
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        print("Modelo de embedding OpenAI inicializado.")
+        base = criar_embeddings(backend, modelo, processos=processos, max_retries=0)
+        # Na OpenAI, os textos vão em lotes paralelos e as novas tentativas ficam a cargo do driver;
+        # o modelo local já agrupa os textos em lotes.
+        driver = DriverEmbeddings(base, modelo) if backend == BACKEND_OPENAI else None
+        # Só os textos ausentes do cache local chegam ao modelo.
+        cache = CacheEmbeddings()
+        embeddings = EmbeddingsComCache(driver or base, modelo, cache)
+        print("Modelo de embedding inicializado.")
     except Exception as e:
-        print(f"Erro ao inicializar OpenAIEmbeddings: {e}")
-        print("Verifique se sua API Key da OpenAI é válida e se o pacote 'langchain-openai' está instalado.")
+        print(f"Erro ao inicializar o modelo de embedding: {e}")
+        print("Verifique a API Key da OpenAI ou se 'langchain-openai' / 'sentence-transformers' estão instalados.")
         return
 
-    print("Criando o índice FAISS com embeddings da OpenAI (requer conexão com a internet)...")
+    print(f"Criando o índice ({formato})...")
+    escritor = EscritorIndiceMapeado(pasta_indice, embeddings, tipo_vetores, tipo_busca, parametros_busca) \
+        if formato == FORMATO_MAPEADO else None
+    db = None
+    total = 0
     try:
-        db = FAISS.from_documents(documentos, embeddings)
-        print("Índice FAISS criado com sucesso.")
+        for lote in iterar_lotes(documentos):
+            # Tokens contados uma vez aqui, para o empacotador de contexto do app.
+            anotar_tokens(lote)
+            if escritor is not None:
+                escritor.adicionar(lote)
+            elif db is None:
+                db = FAISS.from_documents(lote, embeddings)
+            else:
+                db.add_documents(lote)
+            total += len(lote)
+            print(f"   -- {total} documentos indexados...")
     except Exception as e:
-        print(f"Erro ao criar o índice FAISS com OpenAI: {e}")
-        print("Isso pode ocorrer devido a problemas de conexão, API Key inválida ou limites de uso.")
+        if escritor is not None:
+            escritor.descartar()
+        print(f"Erro ao criar o índice FAISS: {e}")
+        print("Com a OpenAI, isso pode ocorrer devido a problemas de conexão, API Key inválida ou limites de uso.")
+        return
+    finally:
+        # Os vetores já obtidos ficam no cache mesmo se a indexação falhar no meio.
+        embeddings.imprimir_estatisticas()
+        if driver is not None:
+            driver.imprimir_estatisticas()
+        if hasattr(base, 'fechar'):
+            base.fechar()
+        cache.aplicar_limite()
+        cache.fechar()
+
+    if total == 0:
+        if escritor is not None:
+            escritor.descartar()
+        print("Nenhum documento para indexar. Encerrando.")
+        return
+    print(f"Índice criado com sucesso ({total} documentos).")
+
+    if escritor is not None:
+        # Os índices léxico (BM25) e de metadados são gravados pelo escritor e trocados junto com o vetorial.
+        manifesto = escritor.finalizar(backend, modelo)
+        print(f"Índice salvo localmente na pasta: '{pasta_indice}' ({backend}, {modelo}, "
+              f"{manifesto['dimensao']} dimensões em {tipo_vetores}, busca {manifesto['busca']})")
         return
 
     db.save_local(pasta_indice)
-    print(f"Índice salvo localmente na pasta: '{pasta_indice}'")
+    salvar_identidade(pasta_indice, backend, modelo, db.index.d)
+    print(f"Índice salvo localmente na pasta: '{pasta_indice}' ({backend}, {modelo}, {db.index.d} dimensões)")
+    # No formato faiss os chunks já estão no docstore do LangChain, na ordem do índice.
+    indexados = documento_por_posicao(db)
+    lexico = salvar_indice_lexico((indexados(i).page_content for i in range(db.index.ntotal)), pasta_indice)
+    print(f"Índice léxico (BM25) salvo: {lexico['total_termos']} termos em {lexico['total_documentos']} chunks.")
+    metadados = salvar_indice_metadados((indexados(i) for i in range(db.index.ntotal)), pasta_indice)
+    print(f"Índice de metadados salvo: {sum(len(v) for v in metadados['campos'].values())} valores, "
+          f"{len(metadados['codigos'])} códigos de disciplina.")
 
 
 if __name__ == "__main__":
 
-    if os.path.exists(PASTA_INDICE_FAISS):
+    parser = argparse.ArgumentParser(description="Cria o índice FAISS a partir dos chunks.")
+    parser.add_argument("arquivo_chunks", nargs="?", default=ARQUIVO_JSON_CHUNKS,
+                        help="Arquivo de chunks (.json, .jsonl ou .chunks).")
+    parser.add_argument("--backend", choices=[BACKEND_OPENAI, BACKEND_LOCAL],
+                        default=os.environ.get("BACKEND_EMBEDDING", BACKEND_OPENAI))
+    parser.add_argument("--modelo", help="Nome do modelo de embedding (padrão depende do backend).")
+    parser.add_argument("--processos", type=int, default=1,
+                        help="Processos usados pelo backend local para gerar os embeddings.")
+    parser.add_argument("--formato-indice", choices=[FORMATO_MAPEADO, FORMATO_FAISS], default=FORMATO_MAPEADO,
+                        help="mapeado: vetores e chunks sem pickle, abertos com mmap; faiss: index.faiss + index.pkl.")
+    parser.add_argument("--tipo-vetores", choices=list(TIPOS_VETORES), default="float32",
+                        help="Precisão dos vetores no formato mapeado.")
+    parser.add_argument("--busca", choices=TIPOS_BUSCA, default=BUSCA_EXATA,
+                        help="Estrutura de busca do formato mapeado: exata, sq8 (int8), ivf ou hnsw.")
+    parser.add_argument("--nlist", type=int, help="ivf: número de partições (padrão ~4·√n).")
+    parser.add_argument("--nprobe", type=int, help="ivf: partições visitadas por consulta.")
+    parser.add_argument("--hnsw-m", type=int, help="hnsw: vizinhos por nó.")
+    parser.add_argument("--ef-construction", type=int, help="hnsw: largura da busca na construção.")
+    parser.add_argument("--ef-search", type=int, help="hnsw: largura da busca na consulta.")
+    args = parser.parse_args()
+
+    if args.busca != BUSCA_EXATA and args.formato_indice != FORMATO_MAPEADO:
+        parser.error("--busca só se aplica ao formato mapeado.")
+    parametros_busca = {"nlist": args.nlist, "nprobe": args.nprobe, "m": args.hnsw_m,
+                        "ef_construction": args.ef_construction, "ef_search": args.ef_search}
+
+    if args.backend == BACKEND_OPENAI and not verificar_api_key_openai():
+        exit()
+
+    # No formato mapeado o índice novo é montado em '<pasta>.tmp' e só substitui o atual no fim
+    # (EscritorIndiceMapeado.finalizar): uma falha no meio mantém o índice em uso.
+    if args.formato_indice == FORMATO_FAISS and os.path.exists(PASTA_INDICE_FAISS):
         print(f"Removendo a pasta '{PASTA_INDICE_FAISS}' antiga...")
         shutil.rmtree(PASTA_INDICE_FAISS)
 
-    documentos_para_indexar = carregar_chunks_do_json(ARQUIVO_JSON_CHUNKS)
+    documentos_para_indexar = carregar_chunks_do_json(args.arquivo_chunks)
 
     if documentos_para_indexar:
-        criar_e_salvar_indice_faiss_openai(documentos_para_indexar, PASTA_INDICE_FAISS)
+        criar_e_salvar_indice_faiss(documentos_para_indexar, PASTA_INDICE_FAISS, args.backend, args.modelo, args.processos,
+                                    args.formato_indice, args.tipo_vetores, args.busca, parametros_busca)
     else:
         print("Nenhum documento foi carregado.")
 
-    print("\n--- PROCESSO DE CRIAÇÃO DO ÍNDICE COM OPENAI CONCLUÍDO ---")
\ No newline at end of file
+    print(f"\n--- PROCESSO DE CRIAÇÃO DO ÍNDICE ({args.backend.upper()}) CONCLUÍDO ---")
\ No newline at end of file
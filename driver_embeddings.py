@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import math
+import random
+import struct
+import time
+from functools import lru_cache
+
+from langchain_core.embeddings import Embeddings
+
+MAX_TOKENS_LOTE = 8000
+MAX_TEXTOS_LOTE = 100
+MAX_REQUISICOES_EM_VOO = 4
+MAX_TENTATIVAS = 6
+ESPERA_BASE = 1.0
+ESPERA_MAXIMA = 60.0
+# Sem o tiktoken (ou sem rede para baixar a codificação), estima 1 token a cada 3 caracteres.
+CARACTERES_POR_TOKEN_ESTIMADO = 3
+
+
+@lru_cache(maxsize=None)
+def contador_de_tokens(modelo):
+    try:
+        import tiktoken
+        try:
+            codificacao = tiktoken.encoding_for_model(modelo)
+        except KeyError:
+            codificacao = tiktoken.get_encoding("cl100k_base")
+        return lambda texto: len(codificacao.encode(texto, disallowed_special=()))
+    except Exception as e:
+        print(f"   -- AVISO: tiktoken indisponível para '{modelo}' ({type(e).__name__}). Estimando tokens pelo tamanho do texto.")
+        return lambda texto: math.ceil(len(texto) / CARACTERES_POR_TOKEN_ESTIMADO)
+
+
+def montar_lotes(textos, contar_tokens, max_tokens=MAX_TOKENS_LOTE, max_textos=MAX_TEXTOS_LOTE):
+    # Lotes de índices consecutivos; um texto maior que max_tokens vai sozinho no seu lote.
+    lotes = []
+    lote, tokens_lote = [], 0
+    for i, texto in enumerate(textos):
+        tokens = contar_tokens(texto)
+        if lote and (tokens_lote + tokens > max_tokens or len(lote) >= max_textos):
+            lotes.append(lote)
+            lote, tokens_lote = [], 0
+        lote.append(i)
+        tokens_lote += tokens
+    if lote:
+        lotes.append(lote)
+    return lotes
+
+
+def status_do_erro(erro):
+    status = getattr(erro, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(erro, 'response', None), 'status_code', None)
+    return status
+
+
+def eh_erro_transitorio(erro):
+    # 429 e 5xx, além de falhas de conexão e timeout, valem uma nova tentativa.
+    status = status_do_erro(erro)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+    return isinstance(erro, (ConnectionError, TimeoutError, asyncio.TimeoutError)) or \
+        type(erro).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+class DriverEmbeddings(Embeddings):
+    # Envolve um modelo de embedding: divide os textos em lotes por número de tokens,
+    # mantém no máximo max_em_voo requisições simultâneas e repete as que falham com
+    # erro transitório, com espera exponencial e jitter. A ordem dos vetores é a dos textos.
+
+    def __init__(self, embeddings, modelo, max_tokens_lote=MAX_TOKENS_LOTE, max_textos_lote=MAX_TEXTOS_LOTE,
+                 max_em_voo=MAX_REQUISICOES_EM_VOO, max_tentativas=MAX_TENTATIVAS,
+                 espera_base=ESPERA_BASE, espera_maxima=ESPERA_MAXIMA, semente=None):
+        self.embeddings = embeddings
+        self.modelo = modelo
+        self.max_tokens_lote = max_tokens_lote
+        self.max_textos_lote = max_textos_lote
+        self.max_em_voo = max_em_voo
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self._contar_tokens = contador_de_tokens(modelo)
+        self._aleatorio = random.Random(semente)
+        self.textos = 0
+        self.requisicoes = 0
+        self.novas_tentativas = 0
+        self.tempo_total = 0.0
+
+    def _espera(self, tentativa):
+        # "Full jitter": espera aleatória entre 0 e o teto exponencial da tentativa.
+        return self._aleatorio.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** tentativa))
+
+    async def _embed_lote(self, textos, semaforo):
+        for tentativa in range(self.max_tentativas):
+            async with semaforo:
+                try:
+                    self.requisicoes += 1
+                    return await self.embeddings.aembed_documents(textos)
+                except Exception as e:
+                    if not eh_erro_transitorio(e) or tentativa == self.max_tentativas - 1:
+                        raise
+                    espera = self._espera(tentativa)
+                    print(f"   -- Erro transitório ({status_do_erro(e) or type(e).__name__}) em lote de "
+                          f"{len(textos)} textos. Nova tentativa em {espera:.1f}s...")
+            # A espera acontece fora do semáforo para liberar a vaga a outros lotes.
+            self.novas_tentativas += 1
+            await asyncio.sleep(espera)
+
+    async def aembed_documents(self, texts):
+        inicio = time.perf_counter()
+        semaforo = asyncio.Semaphore(self.max_em_voo)
+        lotes = montar_lotes(texts, self._contar_tokens, self.max_tokens_lote, self.max_textos_lote)
+        resultados = await asyncio.gather(*(self._embed_lote([texts[i] for i in lote], semaforo) for lote in lotes))
+
+        vetores = [None] * len(texts)
+        for lote, vetores_lote in zip(lotes, resultados):
+            for i, vetor in zip(lote, vetores_lote):
+                vetores[i] = vetor
+        self.textos += len(texts)
+        self.tempo_total += time.perf_counter() - inicio
+        return vetores
+
+    def embed_documents(self, texts):
+        return asyncio.run(self.aembed_documents(texts))
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text):
+        return await self.embeddings.aembed_query(text)
+
+    def imprimir_estatisticas(self):
+        vazao = self.textos / self.tempo_total if self.tempo_total else 0.0
+        print(f"   -- Driver de embeddings ({self.modelo}): {self.textos} textos em {self.requisicoes} requisições "
+              f"({self.novas_tentativas} novas tentativas), {vazao:.1f} chunks/s")
+
+
+class ErroSimulado(Exception):
+
+    def __init__(self, status_code):
+        super().__init__(f"Erro simulado {status_code}")
+        self.status_code = status_code
+
+
+class EmbeddingsSimulados(Embeddings):
+    # Substituto local e determinístico de um modelo de embedding, para testes e benchmarks:
+    # o vetor depende só do texto; latência e falhas 429/5xx são opcionais.
+
+    def __init__(self, dimensao=64, latencia=0.0, taxa_falhas=0.0, semente=0):
+        self.dimensao = dimensao
+        self.latencia = latencia
+        self.taxa_falhas = taxa_falhas
+        self._aleatorio = random.Random(semente)
+        self.chamadas = 0
+
+    def _vetor(self, texto):
+        valores = []
+        contador = 0
+        while len(valores) < self.dimensao:
+            bloco = hashlib.sha256(f"{contador}:{texto}".encode('utf-8')).digest()
+            valores.extend(v / 2 ** 31 - 1.0 for v in struct.unpack('<8I', bloco))
+            contador += 1
+        valores = valores[:self.dimensao]
+        norma = math.sqrt(sum(v * v for v in valores)) or 1.0
+        return [v / norma for v in valores]
+
+    def _talvez_falhar(self):
+        self.chamadas += 1
+        if self.taxa_falhas and self._aleatorio.random() < self.taxa_falhas:
+            raise ErroSimulado(self._aleatorio.choice([429, 429, 500, 503]))
+
+    def embed_documents(self, texts):
+        if self.latencia:
+            time.sleep(self.latencia)
+        self._talvez_falhar()
+        return [self._vetor(texto) for texto in texts]
+
+    async def aembed_documents(self, texts):
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        self._talvez_falhar()
+        return [self._vetor(texto) for texto in texts]
+
+    def embed_query(self, text):
+        if self.latencia:
+            time.sleep(self.latencia)
+        self.chamadas += 1
+        return self._vetor(text)
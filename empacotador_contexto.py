@@ -0,0 +1,139 @@
+from langchain_core.documents import Document
+
+from driver_embeddings import contador_de_tokens
+from indice_lexico import dobrar_acentos, tokenizar
+
+# Monta o contexto do prompt RAG dentro de um orçamento de tokens, na ordem de relevância:
+#   - chunks vizinhos da mesma seção (o splitter repete até chunk_overlap caracteres) viram um só bloco;
+#   - registros redundantes da mesma disciplina e chunks quase iguais são descartados;
+#   - um bloco que não cabe é pulado, e os seguintes (menores) ainda podem entrar.
+# O respondedor é o Gemini; a codificação do tiktoken serve de aproximação da contagem dele.
+CODIFICACAO_TOKENS = "cl100k_base"
+ORCAMENTO_TOKENS_CONTEXTO = 1500
+# Sobreposição mínima (em caracteres) para juntar dois chunks, e até onde procurá-la no fim do anterior.
+MIN_SOBREPOSICAO = 40
+MAX_SOBREPOSICAO = 600
+# Fração dos trigramas de palavras de um chunk já presentes num bloco escolhido para considerá-lo repetido.
+LIMIAR_QUASE_DUPLICADO = 0.8
+# Tipos que descrevem o mesmo registro de uma disciplina (Tabela 9.6 e Ementário): basta o mais relevante.
+TIPOS_MESMA_DISCIPLINA = {"disciplina_detalhe": "nome_disciplina", "detalhes_disciplina": "disciplina"}
+
+
+def contar_tokens(texto):
+    return contador_de_tokens(CODIFICACAO_TOKENS)(texto)
+
+
+def anotar_tokens(documentos):
+    # Na indexação: a contagem fica nos metadados do chunk e não é refeita a cada pergunta.
+    for documento in documentos:
+        documento.metadata['tokens'] = contar_tokens(documento.page_content)
+    return documentos
+
+
+def tokens_do_documento(documento):
+    tokens = documento.metadata.get('tokens')
+    return tokens if tokens is not None else contar_tokens(documento.page_content)
+
+
+def sobreposicao(anterior, seguinte):
+    # Tamanho do fim de 'anterior' que reaparece no início de 'seguinte' (0 se não houver).
+    inicio = anterior.find(seguinte[:MIN_SOBREPOSICAO], max(0, len(anterior) - MAX_SOBREPOSICAO))
+    while inicio != -1:
+        if seguinte.startswith(anterior[inicio:]):
+            return len(anterior) - inicio
+        inicio = anterior.find(seguinte[:MIN_SOBREPOSICAO], inicio + 1)
+    return 0
+
+
+def _secao(documento):
+    metadata = documento.metadata
+    if not metadata.get('secao'):
+        return None
+    return (metadata.get('fonte') or metadata.get('source'), metadata['secao'])
+
+
+def _registro_disciplina(documento):
+    campo = TIPOS_MESMA_DISCIPLINA.get(documento.metadata.get('tipo'))
+    nome = documento.metadata.get(campo) if campo else None
+    return dobrar_acentos(nome).strip() if nome else None
+
+
+def _trigramas(texto):
+    palavras = tokenizar(texto)
+    return {tuple(palavras[i:i + 3]) for i in range(max(len(palavras) - 2, 1))}
+
+
+class _Bloco:
+
+    def __init__(self, documento, tokens, trigramas):
+        self.documento = documento
+        self.texto = documento.page_content
+        self.tokens = tokens
+        self.secao = _secao(documento)
+        self.trigramas = trigramas
+
+    def juntar(self, secao, texto):
+        # Texto do bloco estendido com 'texto' se os dois forem vizinhos na seção, ou None.
+        if self.secao is None or secao != self.secao:
+            return None
+        depois = sobreposicao(self.texto, texto)
+        if depois:
+            return self.texto + texto[depois:]
+        antes = sobreposicao(texto, self.texto)
+        if antes:
+            return texto + self.texto[antes:]
+        return None
+
+    def estender(self, texto, tokens):
+        self.texto, self.tokens, self.trigramas = texto, tokens, _trigramas(texto)
+
+
+def _quase_duplicado(trigramas, blocos):
+    if not trigramas:
+        return False
+    return any(len(trigramas & bloco.trigramas) >= LIMIAR_QUASE_DUPLICADO * len(trigramas) for bloco in blocos)
+
+
+def _vizinho(blocos, secao, texto):
+    for bloco in blocos:
+        junto = bloco.juntar(secao, texto)
+        if junto is not None:
+            return bloco, junto
+    return None, None
+
+
+def empacotar_contexto(documentos, orcamento=ORCAMENTO_TOKENS_CONTEXTO):
+    # Devolve (documentos do contexto, tokens usados). O primeiro bloco entra mesmo acima do orçamento.
+    blocos = []
+    registros = set()
+    usados = 0
+    for documento in documentos:
+        registro = _registro_disciplina(documento)
+        if registro is not None and registro in registros:
+            continue
+        bloco, junto = _vizinho(blocos, _secao(documento), documento.page_content)
+        if bloco is not None:
+            # Vizinho que não cabe: o trecho já escolhido continua e o resto da seção fica de fora.
+            tokens = contar_tokens(junto)
+            if usados + tokens - bloco.tokens <= orcamento:
+                usados += tokens - bloco.tokens
+                bloco.estender(junto, tokens)
+                # O chunk do meio pode ligar dois blocos da mesma seção.
+                outro, junto = _vizinho([b for b in blocos if b is not bloco], bloco.secao, bloco.texto)
+                if outro is not None:
+                    tokens = contar_tokens(junto)
+                    usados += tokens - bloco.tokens - outro.tokens
+                    outro.estender(junto, tokens)
+                    blocos.remove(bloco)
+            continue
+        trigramas = _trigramas(documento.page_content)
+        if _quase_duplicado(trigramas, blocos):
+            continue
+        tokens = tokens_do_documento(documento)
+        if blocos and usados + tokens > orcamento:
+            continue
+        blocos.append(_Bloco(documento, tokens, trigramas))
+        usados += tokens
+        if registro is not None:
+            registros.add(registro)
+    return [Document(page_content=b.texto, metadata=b.documento.metadata) for b in blocos], usados
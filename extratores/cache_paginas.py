@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+PASTA_CACHE_PAGINAS = ".cache_paginas"
+LIMITE_CACHE_BYTES = 200 * 1024 * 1024
+
+
+def hash_arquivo(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+class CachePaginas:
+    # Cache em disco (SQLite) dos resultados de extração, endereçado por
+    # (impressão da página, página, operação, settings). Os valores são JSON comprimido com zlib.
+    # A coluna hash_pdf guarda a impressão da página (ver documento_pdf.impressao_pagina).
+
+    def __init__(self, pasta=PASTA_CACHE_PAGINAS, limite_bytes=LIMITE_CACHE_BYTES):
+        self.pasta = pasta
+        self.limite_bytes = limite_bytes
+        self._conexao = None
+
+    def __getstate__(self):
+        # A conexão não atravessa processos; cada worker reabre o banco.
+        estado = self.__dict__.copy()
+        estado['_conexao'] = None
+        return estado
+
+    @property
+    def conexao(self):
+        if self._conexao is None:
+            os.makedirs(self.pasta, exist_ok=True)
+            self._conexao = sqlite3.connect(os.path.join(self.pasta, "paginas.sqlite"), timeout=60)
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute("PRAGMA synchronous=NORMAL")
+            self._conexao.execute("""
+                CREATE TABLE IF NOT EXISTS extracoes (
+                    hash_pdf TEXT NOT NULL,
+                    pagina INTEGER NOT NULL,
+                    operacao TEXT NOT NULL,
+                    settings TEXT NOT NULL,
+                    dados BLOB NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    ultimo_acesso REAL NOT NULL,
+                    PRIMARY KEY (hash_pdf, pagina, operacao, settings)
+                )
+            """)
+            self._conexao.commit()
+        return self._conexao
+
+    def obter(self, hash_pdf, pagina, operacao, settings):
+        chave = (hash_pdf, pagina, operacao, settings)
+        linha = self.conexao.execute(
+            "SELECT dados FROM extracoes WHERE hash_pdf = ? AND pagina = ? AND operacao = ? AND settings = ?",
+            chave
+        ).fetchone()
+        if linha is None:
+            return False, None
+
+        self.conexao.execute(
+            "UPDATE extracoes SET ultimo_acesso = ? WHERE hash_pdf = ? AND pagina = ? AND operacao = ? AND settings = ?",
+            (time.time(),) + chave
+        )
+        self.conexao.commit()
+        return True, json.loads(zlib.decompress(linha[0]).decode('utf-8'))
+
+    def gravar(self, hash_pdf, pagina, operacao, settings, valor):
+        dados = zlib.compress(json.dumps(valor, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO extracoes VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (hash_pdf, pagina, operacao, settings, dados, len(dados), time.time())
+        )
+        self.conexao.commit()
+
+    def tamanho_total(self):
+        return self.conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM extracoes").fetchone()[0]
+
+    def aplicar_limite(self):
+        # Remove as entradas menos recentemente usadas até caber em limite_bytes.
+        excedente = self.tamanho_total() - self.limite_bytes
+        if excedente <= 0:
+            return 0
+
+        removidas = 0
+        linhas = self.conexao.execute(
+            "SELECT rowid, tamanho FROM extracoes ORDER BY ultimo_acesso ASC"
+        ).fetchall()
+        for rowid, tamanho in linhas:
+            if excedente <= 0:
+                break
+            self.conexao.execute("DELETE FROM extracoes WHERE rowid = ?", (rowid,))
+            excedente -= tamanho
+            removidas += 1
+        self.conexao.commit()
+        print(f"   -- Cache de páginas: {removidas} entradas antigas removidas (limite de {self.limite_bytes // (1024 * 1024)} MB).")
+        return removidas
+
+    def fechar(self):
+        if self._conexao is not None:
+            self._conexao.close()
+            self._conexao = None
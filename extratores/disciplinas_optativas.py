@@ -1,4 +1,3 @@
-import pdfplumber
 import os
 
 def desempilhar_linha_complexa(linha):
@@ -29,37 +28,34 @@ def desempilhar_linha_complexa(linha):
     return disciplinas_desempilhadas
 
 
-def extrair_disciplinas_optativas(caminho_pdf):
-    import pdfplumber, os
-
+def extrair_disciplinas_optativas(documento, paginas=None):
     print("-> Executando: extrair_disciplinas_optativas...")
 
-    if not os.path.exists(caminho_pdf):
-        print(f"   -- Erro: O arquivo '{caminho_pdf}' não foi encontrado.")
-        return []
-
     tabela_grupo_1, tabela_grupo_2 = None, []
 
     MARCADOR_PAGINA = "Tabela 9.7: Disciplinas Optativas Grupo I"
 
-    with pdfplumber.open(caminho_pdf) as pdf:
-        for i, pagina in enumerate(pdf.pages):
-            texto = pagina.extract_text(x_tolerance=2)
-            if texto and MARCADOR_PAGINA in texto:
-                print(f"   -- Tabelas de optativas encontradas na página {i + 1}.")
-                tabelas = pagina.extract_tables()
-                if tabelas and len(tabelas) >= 2:
-                    tabela_grupo_1 = tabelas[0]
-                    tabela_grupo_2 = tabelas[1]
-                else:
-                    tabela_grupo_1 = tabelas[0] if tabelas else None
-                
-                if i + 1 < len(pdf.pages):
-                    prox = pdf.pages[i + 1]
-                    tabelas_prox = prox.extract_tables()
-                    if tabelas_prox:
-                        tabela_grupo_2.extend(tabelas_prox[0])
-                break
+    if paginas is None:
+        paginas = documento.intervalo('disciplinas_optativas')
+
+    for i in paginas:
+        pagina = documento.paginas[i]
+        texto = pagina.extract_text(x_tolerance=2)
+        if texto and MARCADOR_PAGINA in texto:
+            print(f"   -- Tabelas de optativas encontradas na página {i + 1}.")
+            tabelas = pagina.extract_tables()
+            if tabelas and len(tabelas) >= 2:
+                tabela_grupo_1 = tabelas[0]
+                tabela_grupo_2 = list(tabelas[1])
+            else:
+                tabela_grupo_1 = tabelas[0] if tabelas else None
+            
+            if i + 1 < len(documento.paginas):
+                prox = documento.paginas[i + 1]
+                tabelas_prox = prox.extract_tables()
+                if tabelas_prox:
+                    tabela_grupo_2.extend(tabelas_prox[0])
+            break
 
     if not tabela_grupo_1 or not tabela_grupo_2:
         print("   -- AVISO: Não foi possível encontrar ambas as tabelas 9.7 e 9.8.")
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+
+import pdfminer
+import pdfplumber
+from pdfminer.pdftypes import PDFStream, resolve1
+
+from extratores.indice_marcadores import INTERVALOS_PADRAO, calcular_intervalos_ppc, construir_indice_marcadores
+
+
+# Outra versão do pdfplumber/pdfminer pode extrair outro texto das mesmas páginas.
+VERSOES_EXTRACAO = f"pdfplumber {pdfplumber.__version__} / pdfminer {pdfminer.__version__}"
+
+
+def chave_settings(settings):
+    # Serialização canônica: {"x_tolerance": 2} e x_tolerance=2 geram a mesma chave.
+    return json.dumps(settings or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _descrever_fonte(fonte):
+    # O que altera o texto extraído: nome (sem o prefixo de subset), codificação, larguras e ToUnicode.
+    fonte = resolve1(fonte) or {}
+    partes = [re.sub(r"^[A-Z]{6}\+", "", str(resolve1(fonte.get('BaseFont')))),
+              repr(resolve1(fonte.get('Encoding'))), repr(resolve1(fonte.get('Widths')))]
+    for descendente in resolve1(fonte.get('DescendantFonts')) or []:
+        partes.append(repr(resolve1((resolve1(descendente) or {}).get('W'))))
+    to_unicode = resolve1(fonte.get('ToUnicode'))
+    dados = to_unicode.get_data() if isinstance(to_unicode, PDFStream) else b''
+    return "|".join(partes).encode('utf-8') + dados
+
+
+def _atualizar_com_recursos(sha, recursos, vistos):
+    # Fontes e XObjects; um Form XObject entra com os próprios recursos. 'vistos' evita ciclos.
+    recursos = resolve1(recursos) or {}
+    fontes = resolve1(recursos.get('Font')) or {}
+    for nome in sorted(fontes):
+        sha.update(str(nome).encode('utf-8'))
+        sha.update(_descrever_fonte(fontes[nome]))
+    xobjects = resolve1(recursos.get('XObject')) or {}
+    for nome in sorted(xobjects):
+        sha.update(str(nome).encode('utf-8'))
+        objid = getattr(xobjects[nome], 'objid', None)
+        xobject = resolve1(xobjects[nome])
+        if not isinstance(xobject, PDFStream) or (objid is not None and objid in vistos):
+            continue
+        vistos.add(objid)
+        if getattr(resolve1(xobject.get('Subtype')), 'name', None) == 'Form':
+            sha.update(xobject.get_data())
+            sha.update(repr((resolve1(xobject.get('BBox')), resolve1(xobject.get('Matrix')))).encode('utf-8'))
+            _atualizar_com_recursos(sha, xobject.get('Resources'), vistos)
+        else:
+            # Imagens não têm texto: o dicionário (dimensões, filtro, tamanho) basta, sem descomprimi-las.
+            sha.update(repr(sorted(xobject.attrs.items())).encode('utf-8'))
+
+
+def impressao_pagina(page):
+    # Impressão digital da camada de texto de uma página: streams de conteúdo, fontes, XObjects,
+    # geometria e as versões do pdfplumber/pdfminer. Os recursos herdados da árvore de páginas já
+    # vêm em page_obj.resources. Não depende da posição da página no arquivo nem do restante do documento.
+    sha = hashlib.sha256(VERSOES_EXTRACAO.encode('utf-8'))
+    for stream in page.page_obj.contents:
+        sha.update(stream.get_data())
+    _atualizar_com_recursos(sha, page.page_obj.resources, set())
+    sha.update(repr((page.mediabox, page.rotation)).encode('utf-8'))
+    return sha.hexdigest()
+
+
+class TabelaEncontrada:
+    # Resultado serializável de find_tables: só o bbox e as linhas já extraídas.
+
+    def __init__(self, bbox, linhas):
+        self.bbox = tuple(bbox)
+        self.linhas = linhas
+
+    def extract(self):
+        return self.linhas
+
+
+def _serializar_tabelas(tabelas):
+    return [{"bbox": list(tabela.bbox), "linhas": tabela.linhas} for tabela in tabelas]
+
+
+def _desserializar_tabelas(dados):
+    return [TabelaEncontrada(tabela["bbox"], tabela["linhas"]) for tabela in dados]
+
+
+class PaginaPDF:
+    # Envolve uma página do pdfplumber memoizando os resultados por (operação, settings).
+    # Os resultados são compartilhados entre os extratores: não devem ser modificados.
+
+    def __init__(self, documento, indice):
+        self.documento = documento
+        self.indice = indice
+        self._memo = {}
+
+    @property
+    def page(self):
+        return self.documento.pdf.pages[self.indice]
+
+    @property
+    def impressao(self):
+        return self.documento.impressoes[self.indice]
+
+    @property
+    def width(self):
+        return self.memoizar('width', None, lambda: self.page.width)
+
+    def memoizar(self, operacao, settings, calcular, serializar=None, desserializar=None):
+        chave = (operacao, chave_settings(settings))
+        contador = self.documento.contadores[self.indice]
+        self.documento.paginas_acessadas.add(self.indice)
+        if chave in self._memo:
+            contador['hits'] += 1
+            return self._memo[chave]
+
+        cache = self.documento.cache
+        if cache is not None:
+            encontrado, dados = cache.obter(self.impressao, self.indice, *chave)
+            if encontrado:
+                contador['disco'] += 1
+                resultado = desserializar(dados) if desserializar else dados
+                self._memo[chave] = resultado
+                return resultado
+
+        contador['misses'] += 1
+        resultado = calcular()
+        self._memo[chave] = resultado
+        if cache is not None:
+            cache.gravar(self.impressao, self.indice, *chave,
+                         serializar(resultado) if serializar else resultado)
+        return resultado
+
+    def extract_text(self, **settings):
+        return self.memoizar('extract_text', settings, lambda: self.page.extract_text(**settings))
+
+    def extract_tables(self, table_settings=None):
+        return self.memoizar('extract_tables', table_settings, lambda: self.page.extract_tables(table_settings))
+
+    def extract_table(self, table_settings=None):
+        return self.memoizar('extract_table', table_settings, lambda: self.page.extract_table(table_settings))
+
+    def find_tables(self, table_settings=None):
+        def calcular():
+            return [TabelaEncontrada(tabela.bbox, tabela.extract()) for tabela in self.page.find_tables(table_settings)]
+        return self.memoizar('find_tables', table_settings, calcular,
+                             serializar=_serializar_tabelas, desserializar=_desserializar_tabelas)
+
+    def extract_words(self, **settings):
+        return self.memoizar('extract_words', settings, lambda: self.page.extract_words(**settings))
+
+    def filter(self, test_function):
+        return self.page.filter(test_function)
+
+
+class DocumentoPDF:
+    # Documento aberto uma única vez e compartilhado por todos os extratores do PPC.
+    # O cache em disco é endereçado pela impressão de cada página: numa revisão do PDF,
+    # as páginas que não mudaram continuam sendo lidas do cache.
+
+    def __init__(self, caminho_pdf, cache=None, intervalos=None):
+        if not os.path.exists(caminho_pdf):
+            raise FileNotFoundError(f"O arquivo '{caminho_pdf}' não foi encontrado.")
+
+        self.caminho = caminho_pdf
+        self.cache = cache
+        self._pdf = None
+        self._impressoes = None
+        self.contadores = defaultdict(lambda: {'hits': 0, 'disco': 0, 'misses': 0})
+        self.paginas_acessadas = set()
+        self.paginas = [PaginaPDF(self, i) for i in range(len(self.impressoes))]
+        self._intervalos = intervalos
+
+    @property
+    def pdf(self):
+        if self._pdf is None:
+            self._pdf = pdfplumber.open(self.caminho)
+        return self._pdf
+
+    @property
+    def impressoes(self):
+        # Só lê os streams das páginas, sem interpretar o layout (~0,5 ms por página).
+        if self._impressoes is None:
+            self._impressoes = [impressao_pagina(page) for page in self.pdf.pages]
+        return self._impressoes
+
+    def intervalos(self):
+        # O índice de marcadores é construído na primeira consulta; as seguintes são O(1).
+        if self._intervalos is None:
+            indice = construir_indice_marcadores(self)
+            self._intervalos = calcular_intervalos_ppc(indice, len(self.paginas))
+        return self._intervalos
+
+    def intervalo(self, nome):
+        intervalos = self.intervalos()
+        if nome in intervalos:
+            return intervalos[nome]
+
+        padrao = INTERVALOS_PADRAO.get(nome, range(len(self.paginas)))
+        padrao = range(padrao.start, min(padrao.stop, len(self.paginas)))
+        print(f"   -- AVISO: Marcador de '{nome}' não encontrado no índice. Usando páginas fixas {padrao.start + 1}-{padrao.stop}.")
+        return padrao
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.fechar()
+
+    def fechar(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    def imprimir_estatisticas(self):
+        print(f"\n-> Cache de páginas ({os.path.basename(self.caminho)}):")
+        total_hits = total_disco = total_misses = 0
+        for indice in sorted(self.contadores):
+            contador = self.contadores[indice]
+            total_hits += contador['hits']
+            total_disco += contador['disco']
+            total_misses += contador['misses']
+            print(f"   -- Página {indice + 1}: {contador['hits']} hits / {contador['disco']} disco / {contador['misses']} misses")
+
+        total = total_hits + total_disco + total_misses
+        taxa = ((total_hits + total_disco) / total * 100) if total else 0.0
+        print(f"   -- Total: {total_hits} hits / {total_disco} disco / {total_misses} misses "
+              f"({taxa:.1f}% das extrações reaproveitadas)")
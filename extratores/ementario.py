@@ -1,16 +1,14 @@
 
-import pdfplumber
 import re
 import os
 
-def extrair_introducao_robotica(pdf_path):
+def extrair_introducao_robotica(documento):
     print("   -> Extraindo disciplina 'Introdução à Robótica' manualmente...")
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            texto = "\n".join(
-                pdf.pages[i].extract_text(x_tolerance=2) or ""
-                for i in range(69, min(71, len(pdf.pages)))
-            )
+        texto = "\n".join(
+            documento.paginas[i].extract_text(x_tolerance=2) or ""
+            for i in documento.intervalo('introducao_robotica')
+        )
 
         bloco = re.search(r"Introdução a Robótica[\s\S]*?(?=(Mineração de Texto|$))", texto, re.IGNORECASE)
         if not bloco:
@@ -88,42 +86,38 @@ def parse_discipline_block(block):
 
     return data
 
-def extrair_ementario(pdf_path, start_page=45, end_page=78): 
+def extrair_ementario(documento, paginas=None): 
     print("-> Executando: extrair_ementario...")
     dados_extraidos = []
 
-    if not os.path.exists(pdf_path):
-        print(f"   -- Erro: O arquivo '{pdf_path}' não foi encontrado.")
-        return []
+    if paginas is None:
+        paginas = documento.intervalo('ementario')
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = ""
-            end_page_safe = min(end_page, len(pdf.pages))
-
-            for i in range(start_page - 1, end_page_safe):
-                text += pdf.pages[i].extract_text(x_tolerance=2) + "\n"
-
-            text = text.encode("utf-8", "ignore").decode("utf-8")
-            text = text.replace("\r", "")
-            text = text.replace("-\n", "")          
-            text = re.sub(r"\s+\n", "\n", text)     
-            text = re.sub(r"\n{2,}", "\n", text)
-
-            blocks = re.split(r"\n(?=[A-ZÁÉÍÓÚÂÊÔÇ][^\n]{2,120}\nCréditos\s)", text)
-            blocks = [blk for blk in blocks if 'Créditos' in blk]
-
-            for block in blocks:
-                parsed_data = parse_discipline_block(block)
-                parsed_data["tipo_info"] = "ementario"
-                dados_extraidos.append(parsed_data)
-            
-            nomes = [d.get("disciplina", "") for d in dados_extraidos]
-            if "Introdução à Robótica" not in nomes:
-                print("   ** 'Introdução à Robótica' não detectada, aplicando extração manual...")
-                extra = extrair_introducao_robotica(pdf_path)
-                if extra:
-                    dados_extraidos.append(extra)
+        text = ""
+        for i in paginas:
+            text += documento.paginas[i].extract_text(x_tolerance=2) + "\n"
+
+        text = text.encode("utf-8", "ignore").decode("utf-8")
+        text = text.replace("\r", "")
+        text = text.replace("-\n", "")          
+        text = re.sub(r"\s+\n", "\n", text)     
+        text = re.sub(r"\n{2,}", "\n", text)
+
+        blocks = re.split(r"\n(?=[A-ZÁÉÍÓÚÂÊÔÇ][^\n]{2,120}\nCréditos\s)", text)
+        blocks = [blk for blk in blocks if 'Créditos' in blk]
+
+        for block in blocks:
+            parsed_data = parse_discipline_block(block)
+            parsed_data["tipo_info"] = "ementario"
+            dados_extraidos.append(parsed_data)
+        
+        nomes = [d.get("disciplina", "") for d in dados_extraidos]
+        if "Introdução à Robótica" not in nomes:
+            print("   ** 'Introdução à Robótica' não detectada, aplicando extração manual...")
+            extra = extrair_introducao_robotica(documento)
+            if extra:
+                dados_extraidos.append(extra)
 
     except Exception as e:
         print(f"   -- Erro ao processar o ementário: {e}")
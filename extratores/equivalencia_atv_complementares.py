@@ -1,5 +1,4 @@
 
-import pdfplumber
 import re
 import os
 from collections import defaultdict # Importa o defaultdict aqui
@@ -97,83 +96,79 @@ def _criar_dados_de_resumo_atividades(dados_atividades_corrigidos):
     print(f"   ... {count_resumos_criados} dados de resumo foram criados.")
     return lista_de_resumos
 
-def extrair_atividades_complementares(caminho_pdf):
+def extrair_atividades_complementares(documento, paginas=None):
     print("-> Executando: extrair_atividades_complementares (v17 - Final)...")
     dados_extraidos = [] 
-    pagina_inicial = 118
-    pagina_final = 120
 
-    if not os.path.exists(caminho_pdf):
-        print(f"   -- Erro: O arquivo '{caminho_pdf}' não foi encontrado.")
-        return []
+    if paginas is None:
+        paginas = documento.intervalo('atividades_complementares')
 
     print("--- Fase 1: Extraindo linhas de dados (Lógica v15) ---")
     item_regex = re.compile(r'^(I|II|III|IV|V|VI|VII|VIII)[\s\.]?$', re.IGNORECASE) 
 
-    with pdfplumber.open(caminho_pdf) as pdf:
-        for i in range(pagina_inicial - 1, min(pagina_final, len(pdf.pages))):
-            page = pdf.pages[i]
-            page_num = i + 1
-            print(f"   Processando Página {page_num}...")
+    for i in paginas:
+        page = documento.paginas[i]
+        page_num = i + 1
+        print(f"   Processando Página {page_num}...")
 
-            page_tables = page.find_tables()
-            if not page_tables: continue
+        page_tables = page.find_tables()
+        if not page_tables: continue
 
-            for tbl_idx, table_obj in enumerate(page_tables):
-                table_data = table_obj.extract()
-                if not table_data: continue
-                
-                header_idx_tbl = find_table_header_row_index(table_data, TABLE_HEADER_KEYWORDS)
-                if header_idx_tbl is None: continue 
-                
-                header_row = [clean_text(h) for h in table_data[header_idx_tbl]]
-                col_map = {name: h_idx for h_idx, name in enumerate(header_row) if name}
-                
-                col_item = col_map.get('Item', -1)
-                col_atividade = col_map.get('Atividades', -1)
-                col_ch = col_map.get('Carga Horária (CH)', -1)
-                col_ch_max = col_map.get('CH Máxima', -1)
+        for tbl_idx, table_obj in enumerate(page_tables):
+            table_data = table_obj.extract()
+            if not table_data: continue
+            
+            header_idx_tbl = find_table_header_row_index(table_data, TABLE_HEADER_KEYWORDS)
+            if header_idx_tbl is None: continue 
+            
+            header_row = [clean_text(h) for h in table_data[header_idx_tbl]]
+            col_map = {name: h_idx for h_idx, name in enumerate(header_row) if name}
+            
+            col_item = col_map.get('Item', -1)
+            col_atividade = col_map.get('Atividades', -1)
+            col_ch = col_map.get('Carga Horária (CH)', -1)
+            col_ch_max = col_map.get('CH Máxima', -1)
 
-                if col_atividade == -1 or col_item == -1: continue
+            if col_atividade == -1 or col_item == -1: continue
 
-                data_rows = table_data[header_idx_tbl + 1:]
+            data_rows = table_data[header_idx_tbl + 1:]
 
-                for row_idx, row in enumerate(data_rows):
-                    if not row or not any(cell for cell in row if cell is not None): continue
-                    
-                    item_texto = clean_text(row[col_item]) if col_item < len(row) else ""
-                    atividade_texto = clean_text(row[col_atividade]) if col_atividade < len(row) else ""
-                    
-                    if atividade_texto.lower() == 'atividades' or item_texto.lower() == 'item':
-                        continue
-
-                    if item_regex.match(item_texto):
-                        carga_horaria_texto = clean_text(row[col_ch]) if col_ch != -1 and col_ch < len(row) else ""
-                        ch_maxima_texto = clean_text(row[col_ch_max]) if col_ch_max != -1 and col_ch_max < len(row) else ""
-                        
-                        dados_extraidos.append({
-                            'tipo_info': 'atividades_complementares',
-                            'grupo': DEFAULT_GROUP_NAME,
-                            'item': item_texto,
-                            'atividade': atividade_texto,
-                            'carga_horaria': carga_horaria_texto,
-                            'ch_maxima': ch_maxima_texto
-                        })
+            for row_idx, row in enumerate(data_rows):
+                if not row or not any(cell for cell in row if cell is not None): continue
+                
+                item_texto = clean_text(row[col_item]) if col_item < len(row) else ""
+                atividade_texto = clean_text(row[col_atividade]) if col_atividade < len(row) else ""
+                
+                if atividade_texto.lower() == 'atividades' or item_texto.lower() == 'item':
+                    continue
+
+                if item_regex.match(item_texto):
+                    carga_horaria_texto = clean_text(row[col_ch]) if col_ch != -1 and col_ch < len(row) else ""
+                    ch_maxima_texto = clean_text(row[col_ch_max]) if col_ch_max != -1 and col_ch_max < len(row) else ""
                     
-                    elif len(dados_extraidos) > 0:
-                        last_item = dados_extraidos[-1]
-                        carga_horaria_texto = clean_text(row[col_ch]) if col_ch != -1 and col_ch < len(row) else ""
-                        ch_maxima_texto = clean_text(row[col_ch_max]) if col_ch_max != -1 and col_ch_max < len(row) else ""
-
-                        last_item['atividade'] += ' ' + item_texto
-                        last_item['atividade'] += ' ' + atividade_texto
-                        last_item['carga_horaria'] += ' ' + carga_horaria_texto
-                        last_item['ch_maxima'] += ' ' + ch_maxima_texto
-                        
-                        last_item['atividade'] = clean_text(last_item['atividade'])
-                        last_item['carga_horaria'] = clean_text(last_item['carga_horaria'])
-                        last_item['ch_maxima'] = clean_text(last_item['ch_maxima'])
+                    dados_extraidos.append({
+                        'tipo_info': 'atividades_complementares',
+                        'grupo': DEFAULT_GROUP_NAME,
+                        'item': item_texto,
+                        'atividade': atividade_texto,
+                        'carga_horaria': carga_horaria_texto,
+                        'ch_maxima': ch_maxima_texto
+                    })
+                
+                elif len(dados_extraidos) > 0:
+                    last_item = dados_extraidos[-1]
+                    carga_horaria_texto = clean_text(row[col_ch]) if col_ch != -1 and col_ch < len(row) else ""
+                    ch_maxima_texto = clean_text(row[col_ch_max]) if col_ch_max != -1 and col_ch_max < len(row) else ""
+
+                    last_item['atividade'] += ' ' + item_texto
+                    last_item['atividade'] += ' ' + atividade_texto
+                    last_item['carga_horaria'] += ' ' + carga_horaria_texto
+                    last_item['ch_maxima'] += ' ' + ch_maxima_texto
                     
+                    last_item['atividade'] = clean_text(last_item['atividade'])
+                    last_item['carga_horaria'] = clean_text(last_item['carga_horaria'])
+                    last_item['ch_maxima'] = clean_text(last_item['ch_maxima'])
+                
     print(f"\n-> Extração (v15) concluída: {len(dados_extraidos)} atividades encontradas.")
     
     print("--- Fase 2: Atribuindo grupos por contagem fixa (v11) ---")
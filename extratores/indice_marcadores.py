@@ -0,0 +1,108 @@
+import re
+
+# Títulos de seções, tabelas e quadros do PPC usados para localizar os trechos de cada extrator.
+MARCADORES_PPC = {
+    "sumario": "Sumário",
+    "secao_1": "1. Apresentação",
+    "tabela_9_6": "Tabela 9.6: Disciplinas por semestre",
+    "secao_9_1_6": "9.1.6 Disciplinas Optativas",
+    "tabela_9_7": "Tabela 9.7: Disciplinas Optativas Grupo I",
+    "secao_19": "19. Ementário e Bibliografias",
+    "introducao_robotica": "Introdução a Robótica",
+    "secao_20": "20. Corpo Docente e Corpo Administrativo",
+    "quadro_19_1": "Quadro 19.1 - Docentes do DComp",
+    "quadro_1_atividades": "Quadro 1 - Equivalência das Atividades Complementares",
+    "anexo_ii": "ANEXO II: MATRIZ DE EQUIVALÊNCIA",
+    "optativas_grupo": "Optativas - GRUPO",
+}
+
+# Posições usadas antes do índice (base 0); valem só quando algum marcador não é encontrado.
+# Intervalos ausentes daqui voltam a varrer o documento inteiro.
+INTERVALOS_PADRAO = {
+    "sumario": range(4, 6),
+    "pagina_optativas": range(28, 29),
+    "ementario": range(44, 78),
+    "introducao_robotica": range(69, 71),
+    "corpo_docente": range(78, 79),
+    "atividades_complementares": range(117, 120),
+    "equivalencia_obrigatorias": range(120, 122),
+    "equivalencia_optativas": range(122, 124),
+}
+
+
+def _normalizar_linha(linha):
+    return re.sub(r'\s+', ' ', linha).strip()
+
+
+def _eh_linha_de_sumario(linha, marcador):
+    # "19. Ementário e Bibliografias 45" é a entrada do sumário, não o título da seção.
+    return re.fullmatch(re.escape(marcador) + r'[\s.]*\d+', linha) is not None
+
+
+def construir_indice_marcadores(documento, marcadores=MARCADORES_PPC):
+    # Uma única passada pelo texto das páginas: marcador -> páginas (base 0) em que aparece como título.
+    indice = {chave: [] for chave in marcadores}
+    for i, pagina in enumerate(documento.paginas):
+        texto = pagina.extract_text(x_tolerance=2) or ""
+        for linha in texto.split('\n'):
+            linha = _normalizar_linha(linha)
+            if not linha:
+                continue
+            for chave, marcador in marcadores.items():
+                if linha.startswith(marcador) and not _eh_linha_de_sumario(linha, marcador):
+                    if not indice[chave] or indice[chave][-1] != i:
+                        indice[chave].append(i)
+    return indice
+
+
+def _primeira(indice, chave, depois_de=None):
+    for pagina in indice.get(chave, []):
+        if depois_de is None or pagina >= depois_de:
+            return pagina
+    return None
+
+
+def calcular_intervalos_ppc(indice, num_paginas):
+    # Converte o índice de marcadores nos intervalos de páginas lidos por cada extrator.
+    intervalos = {}
+
+    sumario = _primeira(indice, "sumario")
+    apresentacao = _primeira(indice, "secao_1", sumario)
+    if sumario is not None and apresentacao is not None:
+        intervalos["sumario"] = range(sumario, apresentacao)
+
+    tabela_9_6 = _primeira(indice, "tabela_9_6")
+    secao_9_1_6 = _primeira(indice, "secao_9_1_6", tabela_9_6)
+    if tabela_9_6 is not None and secao_9_1_6 is not None:
+        intervalos["matriz_curricular"] = range(tabela_9_6, secao_9_1_6 + 1)
+    if secao_9_1_6 is not None:
+        intervalos["pagina_optativas"] = range(secao_9_1_6, secao_9_1_6 + 1)
+
+    tabela_9_7 = _primeira(indice, "tabela_9_7")
+    if tabela_9_7 is not None:
+        intervalos["disciplinas_optativas"] = range(tabela_9_7, min(tabela_9_7 + 2, num_paginas))
+
+    secao_19 = _primeira(indice, "secao_19")
+    secao_20 = _primeira(indice, "secao_20", secao_19)
+    if secao_19 is not None and secao_20 is not None:
+        intervalos["ementario"] = range(secao_19, secao_20 + 1)
+
+    robotica = _primeira(indice, "introducao_robotica", secao_19)
+    if secao_19 is not None and robotica is not None:
+        intervalos["introducao_robotica"] = range(robotica, min(robotica + 2, num_paginas))
+
+    quadro_19_1 = _primeira(indice, "quadro_19_1")
+    if quadro_19_1 is not None:
+        intervalos["corpo_docente"] = range(quadro_19_1, quadro_19_1 + 1)
+
+    quadro_atividades = _primeira(indice, "quadro_1_atividades")
+    anexo_ii = _primeira(indice, "anexo_ii", quadro_atividades)
+    if quadro_atividades is not None and anexo_ii is not None:
+        intervalos["atividades_complementares"] = range(quadro_atividades, anexo_ii)
+
+    optativas_grupo = _primeira(indice, "optativas_grupo", anexo_ii)
+    if anexo_ii is not None and optativas_grupo is not None:
+        intervalos["equivalencia_obrigatorias"] = range(anexo_ii, optativas_grupo)
+        intervalos["equivalencia_optativas"] = range(optativas_grupo, num_paginas)
+
+    return intervalos
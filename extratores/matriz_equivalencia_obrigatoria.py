@@ -1,22 +1,20 @@
 
-import pdfplumber
 import pandas
 import re
 import os
 
-def extrair_equivalencia_obrigatorias(pdf_path: str):
+def extrair_equivalencia_obrigatorias(documento, paginas=None):
     print("-> Executando: extrair_equivalencia_obrigatorias...")   
-    paginas_alvo = [120, 121] 
+    paginas_alvo = paginas if paginas is not None else documento.intervalo('equivalencia_obrigatorias')
     all_table_rows = []
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num in paginas_alvo:
-                if page_num < len(pdf.pages):
-                    page = pdf.pages[page_num]
-                    table = page.extract_table(table_settings={"vertical_strategy": "text", "horizontal_strategy": "text"})
-                    if table:
-                        all_table_rows.extend(table)
+        for page_num in paginas_alvo:
+            if page_num < len(documento.paginas):
+                page = documento.paginas[page_num]
+                table = page.extract_table(table_settings={"vertical_strategy": "text", "horizontal_strategy": "text"})
+                if table:
+                    all_table_rows.extend(table)
     except Exception as e:
         print(f"   -- Erro ao ler PDF na extração de equivalência: {e}")
         return []
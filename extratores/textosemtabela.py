@@ -1,44 +1,111 @@
 
-import pdfplumber
 import re
 import os
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from extratores.documento_pdf import DocumentoPDF
+
+_documento_worker = None
+
+# 'linhas_sem_tabelas' é derivado por este módulo: o hash do código entra nos settings do cache em
+# disco, e qualquer alteração aqui deixa de reaproveitar as linhas calculadas pela versão anterior.
+with open(__file__, 'rb') as _f:
+    VERSAO_CODIGO = hashlib.sha256(_f.read()).hexdigest()[:16]
 
 def normalize_string(s):
     s = re.sub(r'\s+', ' ', s)
     return s.strip()
 
-def tratar_pagina_29_excecao(pdf_path):
-    print("    -- Aplicando regra de exceção para a página 29...")
+class IndiceBBoxes:
+    # Faixas verticais de altura fixa; cada faixa guarda as tabelas que a cobrem.
+    # Um objeto só pode estar dentro de uma tabela que cubra o seu 'top', então
+    # cada teste olha apenas as tabelas daquela faixa (em geral zero ou uma).
+
+    def __init__(self, bboxes, altura_faixa=20):
+        self.altura_faixa = altura_faixa
+        self.faixas = defaultdict(list)
+        for bbox in bboxes:
+            for faixa in range(int(bbox[1] // altura_faixa), int(bbox[3] // altura_faixa) + 1):
+                self.faixas[faixa].append(bbox)
+
+    def contem(self, obj):
+        for bbox in self.faixas.get(int(obj["top"] // self.altura_faixa), ()):
+            if (obj["x0"] >= bbox[0] and obj["top"] >= bbox[1] and
+                    obj["x1"] <= bbox[2] and obj["bottom"] <= bbox[3]):
+                return True
+        return False
+
+def extrair_linhas_sem_tabelas(page):
+    def calcular():
+        tables = page.find_tables()
+        if not tables:
+            texto_pagina = page.page.extract_text(x_tolerance=2, keep_blank_chars=False) or ""
+            return texto_pagina.split('\n')
+
+        indice_tabelas = IndiceBBoxes([table.bbox for table in tables])
+
+        def is_outside_tables(obj):
+            return not indice_tabelas.contem(obj)
+
+        page_sem_tabelas = page.filter(is_outside_tables)
+        texto_pagina = page_sem_tabelas.extract_text(x_tolerance=2, keep_blank_chars=False) or "" 
+        return texto_pagina.split('\n')
+
+    return page.memoizar('linhas_sem_tabelas', {"x_tolerance": 2, "keep_blank_chars": False, "codigo": VERSAO_CODIGO},
+                         calcular)
+
+def _iniciar_worker(caminho_pdf, cache):
+    global _documento_worker
+    _documento_worker = DocumentoPDF(caminho_pdf, cache=cache)
+
+def _extrair_linhas_worker(indice):
+    return extrair_linhas_sem_tabelas(_documento_worker.paginas[indice])
+
+def coletar_linhas_por_pagina(documento, indices, workers=1):
+    # O trabalho por página é independente; só a máquina de seções precisa rodar em ordem.
+    if workers <= 1 or len(indices) < 2:
+        return [extrair_linhas_sem_tabelas(documento.paginas[i]) for i in indices]
+
+    print(f"    -- Extraindo {len(indices)} páginas em {workers} processos...")
+    chunksize = max(1, len(indices) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker, initargs=(documento.caminho, documento.cache)) as pool:
+        return list(pool.map(_extrair_linhas_worker, indices, chunksize=chunksize))
+
+def tratar_pagina_29_excecao(documento):
+    # A página da seção 9.1.6 (29 no PPC 2023) mistura texto e tabelas e é tratada à parte.
+    indice_pagina = documento.intervalo('pagina_optativas').start
+    print(f"    -- Aplicando regra de exceção para a página {indice_pagina + 1}...")
     conteudo_excecao = {}
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            if len(pdf.pages) <= 28:
-                print("    -- AVISO: Página 29 não encontrada na exceção.")
-                return {}
-
-            page = pdf.pages[28]  
-            texto_pagina = page.extract_text(x_tolerance=2) or ""
-
-            marcador_inicio = "9.1.6 Disciplinas Optativas"
-            start_index = texto_pagina.find(marcador_inicio)
-
-            if start_index != -1:
-                bloco = texto_pagina[start_index:]
-                secao = "9.1.6 Disciplinas Optativas"
-                conteudo_excecao[secao] = bloco.strip()
-            else:
-                print("    -- AVISO: Marcador '9.1.6 Disciplinas Optativas' não encontrado na página 29.")
+        if len(documento.paginas) <= indice_pagina:
+            print(f"    -- AVISO: Página {indice_pagina + 1} não encontrada na exceção.")
+            return {}
+
+        page = documento.paginas[indice_pagina]
+        texto_pagina = page.extract_text(x_tolerance=2) or ""
+
+        marcador_inicio = "9.1.6 Disciplinas Optativas"
+        start_index = texto_pagina.find(marcador_inicio)
+
+        if start_index != -1:
+            bloco = texto_pagina[start_index:]
+            secao = "9.1.6 Disciplinas Optativas"
+            conteudo_excecao[secao] = bloco.strip()
+        else:
+            print(f"    -- AVISO: Marcador '9.1.6 Disciplinas Optativas' não encontrado na página {indice_pagina + 1}.")
     except Exception as e:
-        print(f"    -- Erro na exceção da página 29: {e}")
+        print(f"    -- Erro na exceção da página {indice_pagina + 1}: {e}")
         return {}
 
     return conteudo_excecao
 
 
-def extrair_texto_corrido_por_topicos(pdf_path, paginas_pular=None):
+def extrair_texto_corrido_por_topicos(documento, paginas_pular=None, workers=1):
     if paginas_pular is None:
-        paginas_pular = [4, 5, 28]
+        paginas_pular = list(documento.intervalo('sumario')) + list(documento.intervalo('pagina_optativas'))
 
     topicos_importantes = [
         "IDENTIFICAÇÃO DO CURSO", 
@@ -85,62 +152,50 @@ def extrair_texto_corrido_por_topicos(pdf_path, paginas_pular=None):
 
     prefixos_topicos_importantes = [t.split()[0].rstrip('.') for t in topicos_importantes if t[0].isdigit()] 
 
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f"    -- Páginas a serem puladas (índices): {paginas_pular}")
-        for i, page in enumerate(pdf.pages):
-            if i in paginas_pular:
-                print(f"    -- Pulando página {i+1} (índice {i})")
-                continue
-            print(f"    -- Processando página {i+1} (índice {i})")
-
-            tables = page.find_tables()
-            table_bboxes = [table.bbox for table in tables]
-
-            def is_outside_tables(obj):
-                def is_within_bbox(obj, bbox):
-                    obj_bbox = (obj["x0"], obj["top"], obj["x1"], obj["bottom"])
-                    return (obj_bbox[0] >= bbox[0] and obj_bbox[1] >= bbox[1] and
-                            obj_bbox[2] <= bbox[2] and obj_bbox[3] <= bbox[3])
-                return not any(is_within_bbox(obj, bbox) for bbox in table_bboxes)
-
-            page_sem_tabelas = page.filter(is_outside_tables)
-            texto_pagina = page_sem_tabelas.extract_text(x_tolerance=2, keep_blank_chars=False) or "" 
-            linhas_pagina = texto_pagina.split('\n')
-
-            for linha in linhas_pagina:
-                linha_norm = normalize_string(linha)
-                if not linha_norm: 
-                    continue
-
-                if linha_norm in topicos_normalizados:
-                    secao_atual = topicos_normalizados[linha_norm]
-                    print(f"        -- Encontrado Tópico/Seção: '{secao_atual}'")
-                    if secao_atual in topicos_importantes:
-                        capturando = True
-                        if secao_atual not in conteudo_extraido: 
-                           conteudo_extraido[secao_atual] = ""
-
-                        if secao_atual[0].isdigit() or secao_atual.startswith("ANEXO") or secao_atual == "IDENTIFICAÇÃO DO CURSO":
-                           topico_pai_atual = secao_atual
-                    else:
-                        capturando = False
-                        topico_pai_atual = None
-                    continue 
+    print(f"    -- Páginas a serem puladas (índices): {paginas_pular}")
+    indices_processados = [i for i in range(len(documento.paginas)) if i not in paginas_pular]
+    linhas_por_pagina = dict(zip(indices_processados, coletar_linhas_por_pagina(documento, indices_processados, workers)))
+
+    for i in range(len(documento.paginas)):
+        if i in paginas_pular:
+            print(f"    -- Pulando página {i+1} (índice {i})")
+            continue
+        print(f"    -- Processando página {i+1} (índice {i})")
 
-                match_subtopico = re.match(r'^(\d+(\.\d+)+)\s+(.*)', linha_norm)
-                if match_subtopico and topico_pai_atual and topico_pai_atual[0].isdigit(): 
-                    prefixo_num = match_subtopico.group(1)
-                    texto_subtopico = match_subtopico.group(3)
-                    prefixo_pai = topico_pai_atual.split('.')[0]
+        for linha in linhas_por_pagina[i]:
+            linha_norm = normalize_string(linha)
+            if not linha_norm: 
+                continue
 
-                    if prefixo_num.startswith(prefixo_pai + "."):
-                        if capturando and topico_pai_atual in conteudo_extraido:
-                           conteudo_extraido[topico_pai_atual] += "\n" + linha.strip() + "\n"
-                           print(f"          -- Adicionando subtópico '{prefixo_num}' ao pai '{topico_pai_atual}'")
-                        continue 
+            if linha_norm in topicos_normalizados:
+                secao_atual = topicos_normalizados[linha_norm]
+                print(f"        -- Encontrado Tópico/Seção: '{secao_atual}'")
+                if secao_atual in topicos_importantes:
+                    capturando = True
+                    if secao_atual not in conteudo_extraido: 
+                       conteudo_extraido[secao_atual] = ""
+
+                    if secao_atual[0].isdigit() or secao_atual.startswith("ANEXO") or secao_atual == "IDENTIFICAÇÃO DO CURSO":
+                       topico_pai_atual = secao_atual
+                else:
+                    capturando = False
+                    topico_pai_atual = None
+                continue 
+
+            match_subtopico = re.match(r'^(\d+(\.\d+)+)\s+(.*)', linha_norm)
+            if match_subtopico and topico_pai_atual and topico_pai_atual[0].isdigit(): 
+                prefixo_num = match_subtopico.group(1)
+                texto_subtopico = match_subtopico.group(3)
+                prefixo_pai = topico_pai_atual.split('.')[0]
+
+                if prefixo_num.startswith(prefixo_pai + "."):
+                    if capturando and topico_pai_atual in conteudo_extraido:
+                       conteudo_extraido[topico_pai_atual] += "\n" + linha.strip() + "\n"
+                       print(f"          -- Adicionando subtópico '{prefixo_num}' ao pai '{topico_pai_atual}'")
+                    continue 
 
-                if capturando and secao_atual and secao_atual in conteudo_extraido:
-                    conteudo_extraido[secao_atual] += linha.strip() + "\n" 
+            if capturando and secao_atual and secao_atual in conteudo_extraido:
+                conteudo_extraido[secao_atual] += linha.strip() + "\n" 
 
     for secao in conteudo_extraido:
          conteudo_extraido[secao] = '\n'.join(line for line in conteudo_extraido[secao].split('\n') if line.strip()) 
@@ -148,15 +203,11 @@ def extrair_texto_corrido_por_topicos(pdf_path, paginas_pular=None):
 
     return conteudo_extraido
 
-def extrair_chunks_de_texto(pdf_path):
+def extrair_chunks_de_texto(documento, workers=1):
     print("-> Executando: extrair_chunks_de_texto...")
 
-    if not os.path.exists(pdf_path):
-        print(f"    -- Erro: O arquivo '{pdf_path}' não foi encontrado.")
-        return []
-
-    conteudo_texto_puro = extrair_texto_corrido_por_topicos(pdf_path)
-    conteudo_pagina_29 = tratar_pagina_29_excecao(pdf_path)
+    conteudo_texto_puro = extrair_texto_corrido_por_topicos(documento, workers=workers)
+    conteudo_pagina_29 = tratar_pagina_29_excecao(documento)
 
     for secao in conteudo_pagina_29:
         conteudo_pagina_29[secao] = normalize_string(conteudo_pagina_29[secao].replace('\n', ' '))
@@ -10,7 +10,7 @@ text_splitter = RecursiveCharacterTextSplitter(chunk_size=1300, chunk_overlap=23
 
 def gerar_chunks_matriz_curricular(itens_matriz):
     print("\n-> Gerando Chunks para Matriz Curricular (Detalhe + Sumário + MESTRE)...")
-    chunks_matriz = []
+    total_chunks = 0
     
     codigo_para_nome = {dado.get('codigo'): dado.get('nome') for dado in itens_matriz if dado.get('codigo') and dado.get('nome')}
     semestres_map = defaultdict(list)
@@ -42,7 +42,8 @@ def gerar_chunks_matriz_curricular(itens_matriz):
                 f"{dado.get('creditos_praticos', '?')} créditos práticos. Sobre os pré-requisitos, {pre_req_texto}."
             )
             metadata = {"fonte": "PPC - Tabela 9.6", "tipo": "disciplina_detalhe", "semestre": dado.get('semestre'), "nome_disciplina": dado.get('nome')}
-            chunks_matriz.append({"page_content": page_content, "metadata": metadata})
+            yield {"page_content": page_content, "metadata": metadata}
+            total_chunks += 1
         except Exception as e:
             print(f"   -- ERRO: {e}")
 
@@ -55,7 +56,8 @@ def gerar_chunks_matriz_curricular(itens_matriz):
             nomes_str = ", ".join([f"'{n}'" for n in nomes_disciplinas])
             page_content = f"As disciplinas do {semestre}º semestre são: {nomes_str}."
             metadata = {"fonte": "PPC - Tabela 9.6", "tipo": "disciplina_sumario_semestre", "semestre": semestre}
-            chunks_matriz.append({"page_content": page_content, "metadata": metadata})
+            yield {"page_content": page_content, "metadata": metadata}
+            total_chunks += 1
         except Exception as e:
             print(f"   -- ERRO: {e}")
 
@@ -77,19 +79,19 @@ def gerar_chunks_matriz_curricular(itens_matriz):
             "conteudo": "todas_disciplinas_obrigatorias_grade_materias"
         }
         
-        chunks_matriz.append({"page_content": page_content, "metadata": metadata})
+        yield {"page_content": page_content, "metadata": metadata}
+        total_chunks += 1
         print("   -- Chunk Mestre criado com sucesso!")
         
     except Exception as e:
         print(f"   -- ERRO ao criar Chunk Mestre: {e}")
 
-    return chunks_matriz
 
 
 def gerar_chunks_optativa_detalhe(itens_optativas):
   
     print("\n-> Gerando Chunks para Optativas (Detalhe)...")
-    chunks_optativas = []
+    total_chunks = 0
     
     for dado in itens_optativas:
         try:
@@ -103,19 +105,19 @@ def gerar_chunks_optativa_detalhe(itens_optativas):
                         "tipo": "disciplina_optativa",
                         "grupo": dado.get('grupo'),
                         "nome_disciplina": dado.get('nome')}
-            chunks_optativas.append({"page_content": page_content, "metadata": metadata})
+            yield {"page_content": page_content, "metadata": metadata}
+            total_chunks += 1
         except KeyError as e:
             print(f"   -- ERRO (Detalhe Optativa): Chave {e} faltando. Pulando item: {dado}")
         except Exception as e:
              print(f"   -- ERRO (Detalhe Optativa): Falha ao processar {dado.get('nome')}: {e}")
              
-    print(f"   -- {len(chunks_optativas)} Chunks de Detalhe de Optativa criados.")
-    return chunks_optativas
+    print(f"   -- {total_chunks} Chunks de Detalhe de Optativa criados.")
 
 def gerar_chunks_optativa_resumo(itens_resumo):
 
     print("\n-> Gerando Chunks para Optativas (Resumo)...")
-    chunks_resumo = []
+    total_chunks = 0
     
     for dado in itens_resumo:
         try:
@@ -130,17 +132,17 @@ def gerar_chunks_optativa_resumo(itens_resumo):
                         "tipo": "resumo_grupo_optativas", # Nome de tipo mais específico
                         "grupo": grupo
                        }
-            chunks_resumo.append({"page_content": page_content, "metadata": metadata})
+            yield {"page_content": page_content, "metadata": metadata}
+            total_chunks += 1
         except Exception as e:
             print(f"   -- ERRO (Resumo Optativa): Falha ao processar resumo do {dado.get('grupo')}: {e}")
 
-    print(f"   -- {len(chunks_resumo)} Chunks de Resumo de Optativa criados.")
-    return chunks_resumo
+    print(f"   -- {total_chunks} Chunks de Resumo de Optativa criados.")
 
 def gerar_chunks_ementario(itens_ementario):
   
     print("\n-> Gerando Chunks para Ementário (Granular)...")
-    chunks_ementario = []
+    total_chunks = 0
     
     for dado in itens_ementario:
         try:
@@ -148,48 +150,52 @@ def gerar_chunks_ementario(itens_ementario):
             
             # Chunk 1: Ementa
             if dado.get('ementa'):
-                chunks_ementario.append({
+                yield {
                     "page_content": f"A ementa da disciplina '{disciplina}' é: {dado['ementa']}", 
                     "metadata": {"fonte": "PPC - Ementário", "tipo": "ementa", "disciplina": disciplina}
-                })
+                }
+                total_chunks += 1
             
             if dado.get('objetivo'):
-                chunks_ementario.append({
+                yield {
                     "page_content": f"O objetivo da disciplina '{disciplina}' é: {dado['objetivo']}", 
                     "metadata": {"fonte": "PPC - Ementário", "tipo": "objetivo_disciplina", "disciplina": disciplina}
-                })
+                }
+                total_chunks += 1
             
             if dado.get('bibliografia_basica'):
-                chunks_ementario.append({
+                yield {
                     "page_content": f"A bibliografia básica para a disciplina '{disciplina}' é: {'; '.join(dado['bibliografia_basica'])}.", 
                     "metadata": {"fonte": "PPC - Ementário", "tipo": "bibliografia_basica", "disciplina": disciplina}
-                })
+                }
+                total_chunks += 1
                 
             if dado.get('bibliografia_complementar'):
-                chunks_ementario.append({
+                yield {
                     "page_content": f"A bibliografia complementar para a disciplina '{disciplina}' é: {'; '.join(dado['bibliografia_complementar'])}.", 
                     "metadata": {"fonte": "PPC - Ementário", "tipo": "bibliografia_complementar", "disciplina": disciplina}
-                })
+                }
+                total_chunks += 1
             
             page_content = f"Detalhes da disciplina '{disciplina}': Créditos: {dado.get('creditos', 'N/A')}, Carga Horária: {dado.get('carga_horaria', 'N/A')}, Departamento: {dado.get('departamento', 'N/A')}, Pré-requisito(s): {dado.get('pre_requisitos', 'Nenhum')}."
-            chunks_ementario.append({
+            yield {
                 "page_content": page_content, 
                 "metadata": {"fonte": "PPC - Ementário", "tipo": "detalhes_disciplina", "disciplina": disciplina}
-            })
+            }
+            total_chunks += 1
         
         except KeyError as e:
             print(f"   -- ERRO (Ementário): Chave {e} não encontrada. Pulando item: {dado.get('disciplina')}")
         except Exception as e:
              print(f"   -- ERRO (Ementário): Falha ao processar {dado.get('disciplina')}: {e}")
 
-    print(f"   -- {len(chunks_ementario)} Chunks granulares de Ementário criados.")
-    return chunks_ementario
+    print(f"   -- {total_chunks} Chunks granulares de Ementário criados.")
 
 
 def gerar_chunks_atividades_comp(itens_atividades):
  
     print("\n-> Gerando Chunks para Atividades Complementares (Detalhe)...")
-    chunks_detalhe = []
+    total_chunks = 0
     
     for dado in itens_atividades:
         try:
@@ -211,34 +217,34 @@ def gerar_chunks_atividades_comp(itens_atividades):
                         "item": item_num,
                         "atividade": atividade}
 
-            chunks_detalhe.append({"page_content": page_content, "metadata": metadata})
+            yield {"page_content": page_content, "metadata": metadata}
+            total_chunks += 1
         except Exception as e:
              print(f"   -- ERRO (Atv Comp Detalhe): Falha ao processar {dado.get('atividade')}: {e}")
              
-    print(f"   -- {len(chunks_detalhe)} Chunks de Detalhe de Atividades Comp. criados.")
-    return chunks_detalhe
+    print(f"   -- {total_chunks} Chunks de Detalhe de Atividades Comp. criados.")
 
 def gerar_chunks_atividades_resumo(itens_resumo):
     
     print("\n-> Gerando Chunks para Atividades Complementares (Resumo)...")
-    chunks_resumo = []
+    total_chunks = 0
     
     for dado in itens_resumo:
         try:
-            chunks_resumo.append({
+            yield {
                 "page_content": dado.get('page_content'),
                 "metadata": dado.get('metadata')
-            })
+            }
+            total_chunks += 1
         except Exception as e:
              print(f"   -- ERRO (Atv Comp Resumo): Falha ao processar {dado.get('grupo')}: {e}")
 
-    print(f"   -- {len(chunks_resumo)} Chunks de Resumo de Atividades Comp. criados.")
-    return chunks_resumo
+    print(f"   -- {total_chunks} Chunks de Resumo de Atividades Comp. criados.")
 
 def gerar_chunks_equivalencia_obrigatoria(itens_equivalencia):
 
     print("\n-> Gerando Chunks para Equivalência de Obrigatórias...")
-    chunks_equivalencia = []
+    total_chunks = 0
     
     for dado in itens_equivalencia:
         try:
@@ -254,20 +260,20 @@ def gerar_chunks_equivalencia_obrigatoria(itens_equivalencia):
                 page_content = base_info + " No PPC 2023, ela foi desmembrada ou é equivalente às seguintes disciplinas: " + ", ".join([f"\"{nova['disciplina']}\" (Carga Horária: {nova['ch']}h, Natureza: {nova['nat']})" for nova in aproveitamento]) + "."
             
             metadata = {"fonte": "PPC - Matriz de Equivalência", "tipo": "equivalencia_obrigatoria", "disciplina_2012": dado.get('disciplina_2012')}
-            chunks_equivalencia.append({"page_content": page_content, "metadata": metadata})
+            yield {"page_content": page_content, "metadata": metadata}
+            total_chunks += 1
         
         except KeyError as e:
             print(f"   -- ERRO (Equiv Obrigatória): Chave {e} faltando. Pulando item: {dado.get('disciplina_2012')}")
         except Exception as e:
             print(f"   -- ERRO (Equiv Obrigatória): Falha ao processar {dado.get('disciplina_2012')}: {e}")
             
-    print(f"   -- {len(chunks_equivalencia)} Chunks de Equivalência Obrigatória criados.")
-    return chunks_equivalencia
+    print(f"   -- {total_chunks} Chunks de Equivalência Obrigatória criados.")
 
 def gerar_chunks_equivalencia_optativa(itens_equivalencia_opt):
   
     print("\n-> Gerando Chunks para Equivalência de Optativas...")
-    chunks_equivalencia_opt = []
+    total_chunks = 0
     
     for dado in itens_equivalencia_opt:
         try:
@@ -279,20 +285,20 @@ def gerar_chunks_equivalencia_optativa(itens_equivalencia_opt):
                 page_content = base_info + " Ela não possui uma equivalência direta listada para o PPC 2023."
             
             metadata = {"fonte": "PPC - Equivalência de Optativas", "tipo": "equivalencia_optativa", "disciplina_2012": dado.get('disciplina_2012')}
-            chunks_equivalencia_opt.append({"page_content": page_content, "metadata": metadata})
+            yield {"page_content": page_content, "metadata": metadata}
+            total_chunks += 1
         
         except KeyError as e:
             print(f"   -- ERRO (Equiv Optativa): Chave {e} faltando. Pulando item: {dado.get('disciplina_2012')}")
         except Exception as e:
             print(f"   -- ERRO (Equiv Optativa): Falha ao processar {dado.get('disciplina_2012')}: {e}")
             
-    print(f"   -- {len(chunks_equivalencia_opt)} Chunks de Equivalência Optativa criados.")
-    return chunks_equivalencia_opt
+    print(f"   -- {total_chunks} Chunks de Equivalência Optativa criados.")
 
 def gerar_chunks_corpo_docente_resumo(itens_resumo_docente):
    
     print("\n-> Gerando Chunks para Corpo Docente (Resumo)...")
-    chunks_resumo_docente = []
+    total_chunks = 0
     
     for dado in itens_resumo_docente:
         try:
@@ -310,17 +316,17 @@ def gerar_chunks_corpo_docente_resumo(itens_resumo_docente):
                     "fonte": "PPC - Quadro 19.1",
                     "tipo": "corpo_docente_lista"
                 }
-                chunks_resumo_docente.append({"page_content": page_content, "metadata": metadata})
+                yield {"page_content": page_content, "metadata": metadata}
+                total_chunks += 1
         except Exception as e:
              print(f"   -- ERRO (Resumo Docente): Falha ao processar resumo: {e}")
              
-    print(f"   -- {len(chunks_resumo_docente)} Chunks de Resumo de Docentes criados.")
-    return chunks_resumo_docente
+    print(f"   -- {total_chunks} Chunks de Resumo de Docentes criados.")
 
 def gerar_chunks_corpo_docente_individual(itens_docentes):
  
     print("\n-> Gerando Chunks para Corpo Docente (Detalhe)...")
-    chunks_detalhe_docente = []
+    total_chunks = 0
     
     for dado in itens_docentes:
         try:
@@ -346,17 +352,17 @@ def gerar_chunks_corpo_docente_individual(itens_docentes):
                 "tipo": "corpo_docente_detalhe",
                 "nome_professor": nome
             }
-            chunks_detalhe_docente.append({"page_content": page_content, "metadata": metadata})
+            yield {"page_content": page_content, "metadata": metadata}
+            total_chunks += 1
         except Exception as e:
              print(f"   -- ERRO (Detalhe Docente): Falha ao processar {dado.get('nome')}: {e}")
 
-    print(f"   -- {len(chunks_detalhe_docente)} Chunks de Detalhe de Docentes criados.")
-    return chunks_detalhe_docente
+    print(f"   -- {total_chunks} Chunks de Detalhe de Docentes criados.")
 
 def gerar_chunks_texto_corrido(itens_texto_corrido):
     
     print("\n-> Gerando Chunks para Texto Corrido (Splitter)...")
-    chunks_texto = []
+    total_chunks = 0
     
     for dado in itens_texto_corrido:
         try:
@@ -367,28 +373,36 @@ def gerar_chunks_texto_corrido(itens_texto_corrido):
             docs_divididos = text_splitter.split_documents([doc])
             
             for doc_chunk in docs_divididos:
-                chunks_texto.append({
+                yield {
                     "page_content": doc_chunk.page_content,
                     "metadata": doc_chunk.metadata
-                })
+                }
+                total_chunks += 1
         except Exception as e:
              print(f"   -- ERRO (Texto Corrido): Falha ao dividir a seção {dado.get('secao')}: {e}")
 
-    print(f"   -- {len(chunks_texto)} Chunks de Texto Corrido criados.")
-    return chunks_texto
+    print(f"   -- {total_chunks} Chunks de Texto Corrido criados.")
 
 
-def gerar_chunks(lista_de_dados_unificada):
-    
-    print("\n-> Iniciando Geração de Chunks (Modo Despachante)...")
-    chunks_finais = []
-    
+# Ordem de despacho: define a ordem dos chunks no arquivo final.
+PRODUTORES_POR_TIPO = [
+    ('matriz_curricular', gerar_chunks_matriz_curricular),
+    ('disciplina_optativa', gerar_chunks_optativa_detalhe),
+    ('resumo_grupo', gerar_chunks_optativa_resumo),
+    ('ementario', gerar_chunks_ementario),
+    ('atividades_complementares', gerar_chunks_atividades_comp),
+    ('resumo_categoria_atividades', gerar_chunks_atividades_resumo),
+    ('equivalencia_obrigatoria', gerar_chunks_equivalencia_obrigatoria),
+    ('equivalencia_optativa', gerar_chunks_equivalencia_optativa),
+    ('corpo_docente_resumo', gerar_chunks_corpo_docente_resumo),
+    ('corpo_docente_individual', gerar_chunks_corpo_docente_individual),
+    ('texto_corrido', gerar_chunks_texto_corrido),
+]
+
+
+def despachar_por_tipo(lista_de_dados):
     dados_por_tipo = defaultdict(list)
-    if not isinstance(lista_de_dados_unificada, list):
-          print("Erro: Entrada principal não é uma lista.")
-          return []
-          
-    for dado in lista_de_dados_unificada:
+    for dado in lista_de_dados:
         if isinstance(dado, dict) and 'tipo_info' in dado:
             dados_por_tipo[dado['tipo_info']].append(dado)
         else:
@@ -396,44 +410,19 @@ def gerar_chunks(lista_de_dados_unificada):
             
     print(f"   -- Dados separados por tipo: {list(dados_por_tipo.keys())}")
 
-    if 'matriz_curricular' in dados_por_tipo:
-        itens_matriz = dados_por_tipo['matriz_curricular']
-        chunks_finais.extend(gerar_chunks_matriz_curricular(itens_matriz))
-        
-    if 'disciplina_optativa' in dados_por_tipo: 
-        itens_optativas = dados_por_tipo['disciplina_optativa']
-        chunks_finais.extend(gerar_chunks_optativa_detalhe(itens_optativas))
-
-    if 'resumo_grupo' in dados_por_tipo:
-        itens_resumo = dados_por_tipo['resumo_grupo']
-        chunks_finais.extend(gerar_chunks_optativa_resumo(itens_resumo))
-
-    if 'ementario' in dados_por_tipo:
-        itens_ementario = dados_por_tipo['ementario']
-        chunks_finais.extend(gerar_chunks_ementario(itens_ementario))
-
-    if 'atividades_complementares' in dados_por_tipo:
-        itens_atividades = dados_por_tipo['atividades_complementares']
-        chunks_finais.extend(gerar_chunks_atividades_comp(itens_atividades))
-        
-    if 'resumo_categoria_atividades' in dados_por_tipo:
-        itens_resumo_atv = dados_por_tipo['resumo_categoria_atividades']
-        chunks_finais.extend(gerar_chunks_atividades_resumo(itens_resumo_atv))
-
-    if 'equivalencia_obrigatoria' in dados_por_tipo:
-        chunks_finais.extend(gerar_chunks_equivalencia_obrigatoria(dados_por_tipo['equivalencia_obrigatoria']))
+    for tipo, produtor in PRODUTORES_POR_TIPO:
+        if tipo in dados_por_tipo:
+            yield from produtor(dados_por_tipo[tipo])
 
-    if 'equivalencia_optativa' in dados_por_tipo:
-        chunks_finais.extend(gerar_chunks_equivalencia_optativa(dados_por_tipo['equivalencia_optativa']))
 
-    if 'corpo_docente_resumo' in dados_por_tipo:
-        chunks_finais.extend(gerar_chunks_corpo_docente_resumo(dados_por_tipo['corpo_docente_resumo']))
-
-    if 'corpo_docente_individual' in dados_por_tipo:
-        chunks_finais.extend(gerar_chunks_corpo_docente_individual(dados_por_tipo['corpo_docente_individual']))
+def gerar_chunks(lista_de_dados_unificada):
+    
+    print("\n-> Iniciando Geração de Chunks (Modo Despachante)...")
+    if not isinstance(lista_de_dados_unificada, list):
+          print("Erro: Entrada principal não é uma lista.")
+          return []
 
-    if 'texto_corrido' in dados_por_tipo:
-        chunks_finais.extend(gerar_chunks_texto_corrido(dados_por_tipo['texto_corrido']))
+    chunks_finais = list(despachar_por_tipo(lista_de_dados_unificada))
         
     print(f"\n-> Geração de Chunks CONCLUÍDA. Total geral: {len(chunks_finais)} chunks.")
     return chunks_finais
\ No newline at end of file
@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import re
+
+from langchain_core.documents import Document
+
+from indice_lexico import tokenizar
+from indice_metadados import agrupar_por_radicais, resolver_por_radicais
+
+# Grafo de pré-requisitos da matriz curricular (Tabela 9.6) e das optativas (Tabelas 9.7 e 9.8),
+# montado a partir dos registros extraídos e gravado ao lado de chunks_completos.json.
+# Na carga, os fechos transitivos são calculados uma vez, como bitsets (int), e as consultas
+# viram operações de bits.
+ARQUIVO_GRADE = "grade_curricular.json"
+VERSAO_GRADE = 1
+FONTE_GRAFO = "Grafo curricular (PPC - Tabelas 9.6, 9.7 e 9.8)"
+PADRAO_CODIGO = re.compile(r'[A-Z]\d+')
+# "Optativa G2" na matriz é uma vaga a ser preenchida por uma optativa, não uma disciplina.
+PADRAO_VAGA_OPTATIVA = re.compile(r'^Optativa\b')
+
+
+def _sem_requisito(texto):
+    return not texto or texto.strip() in ('-', 'Nenhum')
+
+
+def montar_grafo(registros):
+    disciplinas = []
+    por_codigo = {}
+    for dado in registros:
+        if dado.get('tipo_info') == 'matriz_curricular' and dado.get('nome'):
+            vaga = bool(PADRAO_VAGA_OPTATIVA.match(dado['nome']))
+            por_codigo[dado.get('codigo')] = len(disciplinas)
+            disciplinas.append({
+                "codigo": dado.get('codigo'), "nome": dado['nome'], "semestre": dado.get('semestre'),
+                "tipo": "vaga_optativa" if vaga else "obrigatoria", "grupo": None,
+                "carga_horaria": dado.get('carga_horaria'), "creditos_teoricos": dado.get('creditos_teoricos'),
+                "creditos_praticos": dado.get('creditos_praticos'), "requisitos": dado.get('pre_requisitos'),
+            })
+    for dado in registros:
+        if dado.get('tipo_info') == 'disciplina_optativa' and dado.get('nome'):
+            disciplinas.append({
+                "codigo": None, "nome": dado['nome'], "semestre": None, "tipo": "optativa",
+                "grupo": dado.get('grupo'), "carga_horaria": dado.get('carga_horaria'),
+                "creditos_teoricos": dado.get('creditos_teoricos'),
+                "creditos_praticos": dado.get('creditos_praticos'), "requisitos": dado.get('pre_requisitos'),
+            })
+
+    # Na matriz os pré-requisitos são códigos; nas optativas, nomes separados por "/".
+    grupos = agrupar_por_radicais(d['nome'] for d in disciplinas if d['tipo'] != "vaga_optativa")
+    indice_por_nome = {d['nome']: i for i, d in enumerate(disciplinas)}
+    for disciplina in disciplinas:
+        requisitos = disciplina.pop('requisitos')
+        disciplina['pre_requisitos'] = []
+        disciplina['outros_requisitos'] = []
+        if _sem_requisito(requisitos):
+            continue
+        if disciplina['tipo'] != "optativa":
+            disciplina['pre_requisitos'] = [por_codigo[c] for c in PADRAO_CODIGO.findall(requisitos) if c in por_codigo]
+            continue
+        # Partes seguidas que não são disciplinas ("2100 horas/aula") voltam a ser um requisito só.
+        avulsas = []
+        for parte in re.split(r'\s*([/,])\s*', requisitos) + [","]:
+            if parte in ("/", ","):
+                if avulsas and parte == ",":
+                    disciplina['outros_requisitos'].append("".join(avulsas).strip("/"))
+                    avulsas = []
+                elif avulsas:
+                    avulsas.append(parte)
+                continue
+            nomes = resolver_por_radicais(grupos, frozenset(tokenizar(parte)))
+            if nomes:
+                disciplina['pre_requisitos'].append(indice_por_nome[nomes[0]])
+                if avulsas:
+                    disciplina['outros_requisitos'].append("".join(avulsas).strip("/"))
+                    avulsas = []
+            elif parte:
+                avulsas.append(parte)
+    return {"versao": VERSAO_GRADE, "disciplinas": disciplinas}
+
+
+def salvar_grafo(registros, caminho=ARQUIVO_GRADE):
+    dados = montar_grafo(registros)
+    if not dados['disciplinas']:
+        print("   -- AVISO: nenhum registro da matriz curricular; grafo curricular não gravado.")
+        return None
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=4)
+    print(f"Grafo curricular salvo em '{caminho}' ({len(dados['disciplinas'])} disciplinas).")
+    return dados
+
+
+def carregar_grafo(caminho=ARQUIVO_GRADE):
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    if dados.get('versao') != VERSAO_GRADE:
+        return None
+    return GrafoCurricular(dados)
+
+
+def _bits(mascara):
+    i = 0
+    while mascara:
+        if mascara & 1:
+            yield i
+        mascara >>= 1
+        i += 1
+
+
+class GrafoCurricular:
+
+    def __init__(self, dados):
+        self.disciplinas = dados['disciplinas']
+        total = len(self.disciplinas)
+        self.diretos = [0] * total
+        self.dependentes_diretos = [0] * total
+        for i, disciplina in enumerate(self.disciplinas):
+            for j in disciplina['pre_requisitos']:
+                self.diretos[i] |= 1 << j
+                self.dependentes_diretos[j] |= 1 << i
+        memo, memo_dependentes = {}, {}
+        self.fecho = [self._fechar(i, self.diretos, memo) for i in range(total)]
+        self.fecho_dependentes = [self._fechar(i, self.dependentes_diretos, memo_dependentes) for i in range(total)]
+
+        self.por_codigo = {d['codigo']: i for i, d in enumerate(self.disciplinas) if d['codigo']}
+        self.grupos = agrupar_por_radicais(d['nome'] for d in self.disciplinas if d['tipo'] != "vaga_optativa")
+        self.por_nome = {d['nome']: i for i, d in enumerate(self.disciplinas)}
+        self.carga_por_semestre = {}
+        for disciplina in self.disciplinas:
+            if disciplina['semestre'] is None:
+                continue
+            carga = self.carga_por_semestre.setdefault(disciplina['semestre'], {
+                "disciplinas": 0, "carga_horaria": 0, "creditos_teoricos": 0, "creditos_praticos": 0})
+            carga['disciplinas'] += 1
+            for chave in ("carga_horaria", "creditos_teoricos", "creditos_praticos"):
+                carga[chave] += disciplina[chave] or 0
+
+    def _fechar(self, i, arestas, memo, visitando=frozenset()):
+        # Fecho transitivo por DFS com memória; um ciclo (dado inconsistente) é apenas interrompido.
+        if i in memo:
+            return memo[i]
+        fecho = 0
+        for j in _bits(arestas[i]):
+            if j not in visitando:
+                fecho |= (1 << j) | self._fechar(j, arestas, memo, visitando | {i})
+        memo[i] = fecho
+        return fecho
+
+    def encontrar(self, pergunta, ignorar=frozenset()):
+        # Código da matriz ("E5") ou nome citado na pergunta -> índice da disciplina, ou None.
+        for codigo in re.findall(r'\b([A-Za-z]\d{1,2})\b', pergunta):
+            if codigo.upper() in self.por_codigo:
+                return self.por_codigo[codigo.upper()]
+        nomes = resolver_por_radicais(self.grupos, frozenset(tokenizar(pergunta)), ignorar)
+        return self.por_nome[nomes[0]] if nomes else None
+
+    def _ordenar(self, mascara):
+        return sorted(_bits(mascara), key=lambda i: (self.disciplinas[i]['semestre'] or 99, self.disciplinas[i]['codigo'] or "", i))
+
+    def pre_requisitos(self, i, transitivo=True):
+        return self._ordenar(self.fecho[i] if transitivo else self.diretos[i])
+
+    def dependentes(self, i, transitivo=True):
+        return self._ordenar(self.fecho_dependentes[i] if transitivo else self.dependentes_diretos[i])
+
+    def descrever(self, i):
+        disciplina = self.disciplinas[i]
+        if disciplina['tipo'] == "optativa":
+            return f"'{disciplina['nome']}' (optativa do {disciplina['grupo']})"
+        return f"'{disciplina['nome']}' ({disciplina['codigo']}, {disciplina['semestre']}º semestre)"
+
+    def _ligacoes(self, indices):
+        linhas = []
+        for i in indices:
+            if self.diretos[i]:
+                exigidas = ", ".join(self.descrever(j) for j in self._ordenar(self.diretos[i]))
+                linhas.append(f"- {self.descrever(i)} exige: {exigidas}.")
+        return linhas
+
+    def texto_pre_requisitos(self, i):
+        disciplina = self.disciplinas[i]
+        linhas = [f"Pré-requisitos de {self.descrever(i)}, segundo a matriz curricular do PPC 2023:"]
+        if not self.fecho[i]:
+            linhas.append("Não possui pré-requisitos entre as disciplinas do curso.")
+        else:
+            linhas.append("Diretos: " + ", ".join(self.descrever(j) for j in self.pre_requisitos(i, False)) + ".")
+            linhas.append("Todas as disciplinas que precisam ser cursadas antes (cadeia completa): "
+                          + ", ".join(self.descrever(j) for j in self.pre_requisitos(i)) + ".")
+            linhas.append("Ligações da cadeia:")
+            linhas.extend(self._ligacoes(self.pre_requisitos(i) + [i]))
+        if disciplina['outros_requisitos']:
+            linhas.append("Outros requisitos: " + "; ".join(disciplina['outros_requisitos']) + ".")
+        return "\n".join(linhas)
+
+    def texto_dependentes(self, i):
+        linhas = [f"Disciplinas que dependem de {self.descrever(i)}, segundo a matriz curricular do PPC 2023:"]
+        if not self.fecho_dependentes[i]:
+            linhas.append("Nenhuma disciplina a exige como pré-requisito.")
+        else:
+            linhas.append("Diretamente: " + ", ".join(self.descrever(j) for j in self.dependentes(i, False)) + ".")
+            linhas.append("Direta ou indiretamente (ficam bloqueadas sem ela): "
+                          + ", ".join(self.descrever(j) for j in self.dependentes(i)) + ".")
+        return "\n".join(linhas)
+
+    def texto_semestre(self, semestre):
+        carga = self.carga_por_semestre.get(semestre)
+        if carga is None:
+            return None
+        nomes = ", ".join(self.descrever(i) for i in self._ordenar(sum(
+            1 << i for i, d in enumerate(self.disciplinas) if d['semestre'] == semestre)))
+        return (f"O {semestre}º semestre tem {carga['disciplinas']} componentes, somando {carga['carga_horaria']} horas "
+                f"({carga['creditos_teoricos']} créditos teóricos e {carga['creditos_praticos']} práticos): {nomes}.")
+
+    def documento(self, texto, consulta):
+        return Document(page_content=texto, metadata={"fonte": FONTE_GRAFO, "tipo": "grafo_curricular",
+                                                      "consulta": consulta})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta o grafo de pré-requisitos da matriz curricular.")
+    parser.add_argument("disciplina", nargs="?", help="Nome ou código da disciplina.")
+    parser.add_argument("--semestre", type=int, help="Mostra a carga do semestre.")
+    parser.add_argument("--arquivo", default=ARQUIVO_GRADE)
+    args = parser.parse_args()
+
+    grafo = carregar_grafo(args.arquivo)
+    if grafo is None:
+        print(f"Erro: '{args.arquivo}' não encontrado. Rode processar_documento_completo.py.")
+        exit()
+    if args.semestre:
+        print(grafo.texto_semestre(args.semestre))
+    if args.disciplina:
+        i = grafo.encontrar(args.disciplina)
+        if i is None:
+            print(f"Disciplina não encontrada: '{args.disciplina}'.")
+        else:
+            print(grafo.texto_pre_requisitos(i))
+            print()
+            print(grafo.texto_dependentes(i))
@@ -0,0 +1,161 @@
+import json
+import math
+import os
+import re
+import shutil
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+# Índice invertido BM25 sobre os mesmos chunks do índice vetorial, na mesma ordem: a posição
+# de um chunk aqui é a sua posição no índice vetorial. Gravado como arrays .npy (sem pickle),
+# abertos com mmap; os termos ficam ordenados e são localizados por busca binária.
+PASTA_LEXICO = "lexico"
+ARQUIVO_METADADOS_LEXICO = "lexico.json"
+VERSAO_LEXICO = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset("""
+a ao aos as com como da das de del do dos e ela elas ele eles em entre era essa esse esta este eu foi
+for ha isso isto ja la lhe mais mas me mesmo meu minha muito na nas nem no nos nossa nosso num numa
+o os ou para pela pelas pelo pelos por qual quais quando que quem se sem ser seu seus sua suas so sobre
+tambem te tem ter um uma umas uns voce
+""".split())
+
+# Sufixos do português, já sem acento, do mais longo para o mais curto. É um removedor leve
+# (inspirado no RSLP): basta que variações da mesma palavra caiam no mesmo radical.
+SUFIXOS_PLURAL = (("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ores", "or"),
+                  ("res", "r"), ("les", "l"), ("ns", "m"), ("s", ""))
+SUFIXOS_NOMINAIS = ("amento", "imento", "mente", "idade", "acao", "icao", "ucao", "encia", "ancia",
+                    "ismo", "ista", "avel", "ivel", "ador", "edor", "idor", "ante", "mento",
+                    "ivo", "iva", "ico", "ica")
+TAMANHO_MINIMO_RADICAL = 3
+
+
+def dobrar_acentos(texto):
+    # Mesma normalização de normalizar() no streamlit_app.py: minúsculas e sem acentos.
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    return texto.encode('ASCII', 'ignore').decode('ASCII')
+
+
+def _remover_sufixo(palavra, sufixos):
+    for sufixo in sufixos:
+        substituto = ""
+        if isinstance(sufixo, tuple):
+            sufixo, substituto = sufixo
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) + len(substituto) >= TAMANHO_MINIMO_RADICAL:
+            return palavra[:len(palavra) - len(sufixo)] + substituto
+    return palavra
+
+
+def radical(palavra):
+    # Códigos de disciplina ("c1", "b12") e números são mantidos como estão.
+    if not palavra.isalpha():
+        return palavra
+    if not palavra.endswith(("ss", "us", "is")):
+        palavra = _remover_sufixo(palavra, SUFIXOS_PLURAL)
+    palavra = _remover_sufixo(palavra, SUFIXOS_NOMINAIS)
+    if palavra[-1] in "aeo" and len(palavra) > TAMANHO_MINIMO_RADICAL:
+        palavra = palavra[:-1]
+    return palavra
+
+
+def tokenizar(texto):
+    return [radical(palavra) for palavra in re.findall(r'[a-z0-9]+', dobrar_acentos(texto))
+            if palavra not in STOPWORDS and (len(palavra) > 1 or palavra.isdigit())]
+
+
+def existe_indice_lexico(pasta_indice):
+    return os.path.exists(os.path.join(pasta_indice, PASTA_LEXICO, ARQUIVO_METADADOS_LEXICO))
+
+
+def salvar_indice_lexico(textos, pasta_indice):
+    # 'textos' na mesma ordem em que os chunks entraram no índice vetorial.
+    frequencias_por_termo = {}
+    tamanhos = []
+    for posicao, texto in enumerate(textos):
+        termos = Counter(tokenizar(texto))
+        tamanhos.append(sum(termos.values()))
+        for termo, frequencia in termos.items():
+            frequencias_por_termo.setdefault(termo, []).append((posicao, frequencia))
+
+    termos = sorted(frequencias_por_termo)
+    inicios = np.zeros(len(termos) + 1, dtype=np.int64)
+    np.cumsum([len(frequencias_por_termo[t]) for t in termos], out=inicios[1:])
+    postings = [par for termo in termos for par in frequencias_por_termo[termo]]
+
+    pasta = os.path.join(pasta_indice, PASTA_LEXICO)
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.makedirs(pasta)
+    np.save(os.path.join(pasta, "termos.npy"), np.array(termos, dtype=str))
+    np.save(os.path.join(pasta, "inicios.npy"), inicios)
+    np.save(os.path.join(pasta, "documentos.npy"), np.array([p for p, _ in postings], dtype=np.int32))
+    np.save(os.path.join(pasta, "frequencias.npy"), np.array([f for _, f in postings], dtype=np.float32))
+    np.save(os.path.join(pasta, "tamanhos.npy"), np.array(tamanhos, dtype=np.float32))
+    metadados = {
+        "versao": VERSAO_LEXICO,
+        "total_documentos": len(tamanhos),
+        "total_termos": len(termos),
+        "tamanho_medio": float(np.mean(tamanhos)) if tamanhos else 0.0,
+        "k1": BM25_K1,
+        "b": BM25_B,
+    }
+    with open(os.path.join(pasta, ARQUIVO_METADADOS_LEXICO), 'w', encoding='utf-8') as f:
+        json.dump(metadados, f, ensure_ascii=False, indent=4)
+    return metadados
+
+
+class IndiceLexico:
+
+    def __init__(self, pasta_indice):
+        pasta = os.path.join(pasta_indice, PASTA_LEXICO)
+        with open(os.path.join(pasta, ARQUIVO_METADADOS_LEXICO), 'r', encoding='utf-8') as f:
+            self.metadados = json.load(f)
+        if self.metadados.get('versao') != VERSAO_LEXICO:
+            raise ValueError(f"Índice léxico em '{pasta}' não está na versão {VERSAO_LEXICO}.")
+
+        def carregar(nome):
+            return np.load(os.path.join(pasta, nome), mmap_mode='r')
+
+        self.termos = carregar("termos.npy")
+        self.inicios = carregar("inicios.npy")
+        self.documentos = carregar("documentos.npy")
+        self.frequencias = carregar("frequencias.npy")
+        self.tamanhos = carregar("tamanhos.npy")
+        self.total_documentos = self.metadados['total_documentos']
+        k1, b = self.metadados['k1'], self.metadados['b']
+        # Parte do denominador do BM25 que só depende do tamanho do chunk.
+        self._normalizacao = k1 * (1 - b + b * self.tamanhos / (self.metadados['tamanho_medio'] or 1.0))
+
+    def __len__(self):
+        return self.total_documentos
+
+    def _postings(self, termo):
+        i = int(np.searchsorted(self.termos, termo))
+        if i == len(self.termos) or self.termos[i] != termo:
+            return None, None
+        inicio, fim = self.inicios[i], self.inicios[i + 1]
+        return self.documentos[inicio:fim], self.frequencias[inicio:fim]
+
+    def pontuar(self, consulta):
+        k1 = self.metadados['k1']
+        pontos = np.zeros(self.total_documentos, dtype=np.float32)
+        for termo in set(tokenizar(consulta)):
+            documentos, frequencias = self._postings(termo)
+            if documentos is None:
+                continue
+            idf = math.log(1 + (self.total_documentos - len(documentos) + 0.5) / (len(documentos) + 0.5))
+            pontos[documentos] += idf * frequencias * (k1 + 1) / (frequencias + self._normalizacao[documentos])
+        return pontos
+
+    def buscar(self, consulta, k=10):
+        # Devolve [(posição, pontuação BM25)] dos chunks com algum termo da consulta.
+        if k <= 0:
+            return []
+        pontos = self.pontuar(consulta)
+        candidatos = np.flatnonzero(pontos)
+        if len(candidatos) > k:
+            candidatos = candidatos[np.argpartition(-pontos[candidatos], k - 1)[:k]]
+        return sorted(((int(i), float(pontos[i])) for i in candidatos), key=lambda par: (-par[1], par[0]))
@@ -0,0 +1,355 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from armazem_chunks import ArmazemChunks, EscritorArmazem
+from indice_lexico import salvar_indice_lexico
+from indice_metadados import salvar_indice_metadados
+
+# Índice sem pickle: vetores crus (float32 ou float16), chunks no armazém binário
+# e um manifesto JSON. Vetores e chunks são abertos com mmap: nenhum código é
+# executado na carga e as páginas ficam compartilhadas entre processos.
+FORMATO_INDICE = "indice_mapeado"
+VERSAO_INDICE = 1
+ARQUIVO_MANIFESTO = "manifesto.json"
+ARQUIVO_VETORES = "vetores.bin"
+ARQUIVO_CHUNKS = "chunks.chunks"
+TIPOS_VETORES = {"float32": np.float32, "float16": np.float16}
+LINHAS_POR_BLOCO = 8192
+
+# Estrutura de busca gravada ao lado dos vetores. "exata" percorre os vetores mapeados;
+# as demais são índices FAISS aproximados (arquivo binário do FAISS, também aberto com mmap):
+#   sq8:  quantização escalar de 8 bits por dimensão (1/4 da memória do float32)
+#   ivf:  listas invertidas; cada consulta visita só nprobe das nlist partições
+#   hnsw: grafo de vizinhança navegável
+BUSCA_EXATA = "exata"
+TIPOS_BUSCA = (BUSCA_EXATA, "sq8", "ivf", "hnsw")
+ARQUIVO_BUSCA = "busca.faiss"
+PARAMETROS_BUSCA = {
+    "sq8": {},
+    "ivf": {"nlist": None, "nprobe": 16},
+    "hnsw": {"m": 32, "ef_construction": 200, "ef_search": 64},
+}
+# O FAISS recomenda ao menos 39 pontos de treino por partição.
+PONTOS_POR_PARTICAO = 39
+MAX_PONTOS_TREINO = 100_000
+
+
+def eh_indice_mapeado(pasta_indice):
+    return os.path.exists(os.path.join(pasta_indice, ARQUIVO_MANIFESTO))
+
+
+def ler_manifesto(pasta_indice):
+    with open(os.path.join(pasta_indice, ARQUIVO_MANIFESTO), 'r', encoding='utf-8') as f:
+        manifesto = json.load(f)
+    if manifesto.get('formato') != FORMATO_INDICE or manifesto.get('versao') != VERSAO_INDICE:
+        raise ValueError(f"'{pasta_indice}' não é um índice mapeado (versão {VERSAO_INDICE}).")
+    return manifesto
+
+
+def versao_do_indice(pasta_indice):
+    # Muda a cada recriação do índice: hash do manifesto (que registra criado_em) ou, no formato
+    # antigo do LangChain, do tamanho e da data dos arquivos. None se a pasta não existe.
+    if not os.path.isdir(pasta_indice):
+        return None
+    resumo = hashlib.sha1()
+    if eh_indice_mapeado(pasta_indice):
+        with open(os.path.join(pasta_indice, ARQUIVO_MANIFESTO), 'rb') as f:
+            resumo.update(f.read())
+    else:
+        for nome in sorted(os.listdir(pasta_indice)):
+            estado = os.stat(os.path.join(pasta_indice, nome))
+            resumo.update(f"{nome}:{estado.st_size}:{estado.st_mtime_ns};".encode('utf-8'))
+    return resumo.hexdigest()[:16]
+
+
+def sugerir_nlist(total):
+    # ~4·√n partições, limitado pelo número de pontos disponíveis para o treino.
+    return max(1, min(int(4 * np.sqrt(total)), total // PONTOS_POR_PARTICAO))
+
+
+def resolver_parametros_busca(tipo_busca, total, parametros=None):
+    resolvidos = dict(PARAMETROS_BUSCA.get(tipo_busca, {}))
+    resolvidos.update({chave: valor for chave, valor in (parametros or {}).items()
+                       if chave in resolvidos and valor is not None})
+    if tipo_busca == "ivf":
+        resolvidos['nlist'] = min(resolvidos['nlist'] or sugerir_nlist(total), max(1, total))
+        resolvidos['nprobe'] = min(resolvidos['nprobe'], resolvidos['nlist'])
+    return resolvidos
+
+
+def ajustar_busca(indice, tipo_busca, parametros):
+    # Parâmetros de consulta não são gravados pelo FAISS; reaplicados a cada carga.
+    if tipo_busca == "ivf":
+        indice.nprobe = parametros['nprobe']
+    elif tipo_busca == "hnsw":
+        indice.hnsw.efSearch = parametros['ef_search']
+
+
+def construir_indice_busca(vetores, tipo_busca, parametros):
+    # 'vetores' pode ser um np.memmap: o treino usa uma amostra e a inserção vai em blocos.
+    total, dimensao = vetores.shape
+    if tipo_busca == "sq8":
+        indice = faiss.IndexScalarQuantizer(dimensao, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    elif tipo_busca == "ivf":
+        indice = faiss.IndexIVFFlat(faiss.IndexFlatL2(dimensao), dimensao, parametros['nlist'], faiss.METRIC_L2)
+    elif tipo_busca == "hnsw":
+        indice = faiss.IndexHNSWFlat(dimensao, parametros['m'], faiss.METRIC_L2)
+        indice.hnsw.efConstruction = parametros['ef_construction']
+    else:
+        raise ValueError(f"Tipo de busca desconhecido: '{tipo_busca}'.")
+
+    if not indice.is_trained:
+        amostra = np.arange(total)
+        if total > MAX_PONTOS_TREINO:
+            amostra = np.sort(np.random.default_rng(0).choice(total, MAX_PONTOS_TREINO, replace=False))
+        indice.train(np.ascontiguousarray(vetores[amostra], dtype=np.float32))
+    for inicio in range(0, total, LINHAS_POR_BLOCO):
+        indice.add(np.ascontiguousarray(vetores[inicio:inicio + LINHAS_POR_BLOCO], dtype=np.float32))
+    ajustar_busca(indice, tipo_busca, parametros)
+    return indice
+
+
+def abrir_indice_busca(caminho, tipo_busca, parametros):
+    indice = faiss.read_index(caminho, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    ajustar_busca(indice, tipo_busca, parametros)
+    return indice
+
+
+class EscritorIndiceMapeado:
+    # Recebe os documentos em lotes; os vetores e os chunks vão direto para o disco. O índice (com os índices
+    # léxico e de metadados) é montado numa pasta temporária e só substitui a pasta final em finalizar().
+
+    def __init__(self, pasta_indice, embeddings, tipo_vetores="float32", tipo_busca=BUSCA_EXATA, parametros_busca=None):
+        if tipo_busca not in TIPOS_BUSCA:
+            raise ValueError(f"Tipo de busca desconhecido: '{tipo_busca}'. Opções: {', '.join(TIPOS_BUSCA)}.")
+        self.pasta_indice = pasta_indice
+        self.pasta_temporaria = pasta_indice + ".tmp"
+        self.embeddings = embeddings
+        self.tipo_vetores = tipo_vetores
+        self.tipo_busca = tipo_busca
+        self.parametros_busca = parametros_busca
+        self.dimensao = None
+        self.total = 0
+        shutil.rmtree(self.pasta_temporaria, ignore_errors=True)
+        os.makedirs(self.pasta_temporaria)
+        self._arquivo_vetores = open(os.path.join(self.pasta_temporaria, ARQUIVO_VETORES), 'wb')
+        self._armazem = EscritorArmazem(os.path.join(self.pasta_temporaria, ARQUIVO_CHUNKS))
+
+    def adicionar(self, documentos):
+        self.adicionar_vetores(documentos, self.embeddings.embed_documents([d.page_content for d in documentos]))
+
+    def adicionar_vetores(self, documentos, vetores):
+        vetores = np.asarray(vetores, dtype=np.float32)
+        if self.dimensao is None:
+            self.dimensao = vetores.shape[1]
+        self._arquivo_vetores.write(vetores.astype(TIPOS_VETORES[self.tipo_vetores]).tobytes())
+        for documento in documentos:
+            self._armazem.adicionar({"page_content": documento.page_content, "metadata": documento.metadata})
+        self.total += len(documentos)
+
+    def finalizar(self, backend, modelo):
+        self._arquivo_vetores.close()
+        self._armazem.fechar()
+        self._salvar_indices_auxiliares()
+        arquivos = {"vetores": ARQUIVO_VETORES, "chunks": ARQUIVO_CHUNKS}
+        busca = {"tipo": self.tipo_busca}
+        if self.tipo_busca != BUSCA_EXATA:
+            # Os vetores completos continuam gravados: permitem a busca exata e reconstruir a estrutura.
+            vetores = np.memmap(os.path.join(self.pasta_temporaria, ARQUIVO_VETORES), mode='r',
+                                dtype=TIPOS_VETORES[self.tipo_vetores], shape=(self.total, self.dimensao))
+            busca.update(resolver_parametros_busca(self.tipo_busca, self.total, self.parametros_busca))
+            print(f"   -- Construindo a estrutura de busca '{self.tipo_busca}' ({self.total} vetores)...")
+            indice = construir_indice_busca(vetores, self.tipo_busca, busca)
+            faiss.write_index(indice, os.path.join(self.pasta_temporaria, ARQUIVO_BUSCA))
+            arquivos["busca"] = ARQUIVO_BUSCA
+            del vetores
+        manifesto = {
+            "formato": FORMATO_INDICE,
+            "versao": VERSAO_INDICE,
+            "backend": backend,
+            "modelo": modelo,
+            "dimensao": self.dimensao,
+            "total_chunks": self.total,
+            "tipo_vetores": self.tipo_vetores,
+            "metrica": "l2",
+            "busca": busca,
+            "criado_em": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "arquivos": arquivos,
+        }
+        with open(os.path.join(self.pasta_temporaria, ARQUIVO_MANIFESTO), 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=4)
+        # Troca por renomes: a pasta em uso vai para <pasta>.old, a nova entra no lugar e só então a
+        # antiga é apagada. Se a troca falhar, a antiga volta; quem já a tinha aberto (mmap) segue lendo.
+        antiga = self.pasta_indice + ".old"
+        shutil.rmtree(antiga, ignore_errors=True)
+        if os.path.exists(self.pasta_indice):
+            os.replace(self.pasta_indice, antiga)
+        try:
+            os.replace(self.pasta_temporaria, self.pasta_indice)
+        except OSError:
+            if os.path.exists(antiga):
+                os.replace(antiga, self.pasta_indice)
+            raise
+        shutil.rmtree(antiga, ignore_errors=True)
+        return manifesto
+
+    def _salvar_indices_auxiliares(self):
+        # Lidos de volta do armazém recém-gravado (mmap), na ordem das posições dos vetores.
+        with ArmazemChunks(os.path.join(self.pasta_temporaria, ARQUIVO_CHUNKS)) as armazem:
+            lexico = salvar_indice_lexico((armazem.texto(i) for i in range(len(armazem))), self.pasta_temporaria)
+            metadados = salvar_indice_metadados((Document(page_content=chunk['page_content'], metadata=chunk['metadata'])
+                                                 for chunk in armazem), self.pasta_temporaria)
+        print(f"   -- Índice léxico (BM25): {lexico['total_termos']} termos em {lexico['total_documentos']} chunks.")
+        print(f"   -- Índice de metadados: {sum(len(v) for v in metadados['campos'].values())} valores, "
+              f"{len(metadados['codigos'])} códigos de disciplina.")
+
+    def descartar(self):
+        self._arquivo_vetores.close()
+        self._armazem.descartar()
+        shutil.rmtree(self.pasta_temporaria, ignore_errors=True)
+
+
+class IndiceMapeado(VectorStore):
+    # Busca exata por distância L2 (a mesma do IndexFlatL2 usado pelo FAISS do LangChain),
+    # percorrendo os vetores mapeados em blocos, ou pela estrutura aproximada registrada no manifesto.
+
+    def __init__(self, pasta_indice, embeddings):
+        self.pasta_indice = pasta_indice
+        self.manifesto = ler_manifesto(pasta_indice)
+        self._embeddings = embeddings
+        self.vetores = np.memmap(os.path.join(pasta_indice, self.manifesto['arquivos']['vetores']),
+                                 dtype=TIPOS_VETORES[self.manifesto['tipo_vetores']], mode='r',
+                                 shape=(self.manifesto['total_chunks'], self.manifesto['dimensao']))
+        self.chunks = ArmazemChunks(os.path.join(pasta_indice, self.manifesto['arquivos']['chunks']))
+        if len(self.chunks) != self.manifesto['total_chunks']:
+            raise ValueError(f"Manifesto registra {self.manifesto['total_chunks']} chunks, o armazém tem {len(self.chunks)}.")
+        self._normas = None
+        # Manifestos sem "busca" são anteriores às estruturas aproximadas.
+        self.busca = self.manifesto.get('busca', {"tipo": BUSCA_EXATA})
+        self.indice_busca = None
+        if self.busca['tipo'] != BUSCA_EXATA:
+            self.indice_busca = abrir_indice_busca(os.path.join(pasta_indice, self.manifesto['arquivos']['busca']),
+                                                   self.busca['tipo'], self.busca)
+
+    @property
+    def embeddings(self):
+        return self._embeddings
+
+    @property
+    def dimensao(self):
+        return self.manifesto['dimensao']
+
+    def _normas_quadradas(self):
+        # Calculadas na primeira busca, não na carga.
+        if self._normas is None:
+            normas = np.empty(len(self.vetores), dtype=np.float32)
+            for inicio in range(0, len(self.vetores), LINHAS_POR_BLOCO):
+                bloco = np.asarray(self.vetores[inicio:inicio + LINHAS_POR_BLOCO], dtype=np.float32)
+                normas[inicio:inicio + len(bloco)] = np.einsum('ij,ij->i', bloco, bloco)
+            self._normas = normas
+        return self._normas
+
+    def distancias(self, vetor):
+        return self.distancias_varias([vetor])[0]
+
+    def distancias_varias(self, vetores):
+        # ||v - q||² = ||v||² - 2 v·q + ||q||², bloco a bloco; várias consultas numa só passada
+        # pelos vetores (uma multiplicação de matrizes por bloco).
+        consultas = np.asarray(vetores, dtype=np.float32)
+        produtos = np.empty((len(consultas), len(self.vetores)), dtype=np.float32)
+        for inicio in range(0, len(self.vetores), LINHAS_POR_BLOCO):
+            bloco = np.asarray(self.vetores[inicio:inicio + LINHAS_POR_BLOCO], dtype=np.float32)
+            produtos[:, inicio:inicio + len(bloco)] = consultas @ bloco.T
+        normas_consultas = np.einsum('ij,ij->i', consultas, consultas)[:, None]
+        return np.maximum(self._normas_quadradas() - 2 * produtos + normas_consultas, 0)
+
+    def documento(self, indice):
+        chunk = self.chunks[int(indice)]
+        return Document(page_content=chunk['page_content'], metadata=chunk['metadata'])
+
+    def buscar_varios(self, vetores, k):
+        # Uma lista [(posição, distância)] por consulta, com uma única busca para todas.
+        k = min(k, len(self.chunks))
+        if k <= 0 or not len(vetores):
+            return [[] for _ in vetores]
+        if self.indice_busca is not None:
+            distancias, indices = self.indice_busca.search(np.asarray(vetores, dtype=np.float32), k)
+            # -1 marca vagas não preenchidas (ex.: IVF com poucas partições visitadas).
+            return [[(int(i), float(d)) for i, d in zip(linha_i, linha_d) if i >= 0]
+                    for linha_i, linha_d in zip(indices, distancias)]
+        resultados = []
+        for distancias in self.distancias_varias(vetores):
+            melhores = np.argpartition(distancias, k - 1)[:k]
+            # Desempate pelo índice, como no FAISS.
+            melhores = sorted(melhores, key=lambda i: (distancias[i], i))
+            resultados.append([(int(i), float(distancias[i])) for i in melhores])
+        return resultados
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+        return [(self.documento(i), d) for i, d in self.buscar_varios([embedding], k)[0]]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [documento for documento, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_with_score_by_vector(self._embeddings.embed_query(query), k)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [documento for documento, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return self._euclidean_relevance_score_fn
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("O índice mapeado é somente leitura; recrie-o com criar_indice_vetorial.py.")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Use EscritorIndiceMapeado para criar um índice mapeado.")
+
+    def fechar(self):
+        self.chunks.fechar()
+        self.vetores = None
+        self.indice_busca = None
+
+
+def converter_faiss_legado(pasta_origem, pasta_destino, tipo_vetores="float32", tipo_busca=BUSCA_EXATA):
+    # Lê o índice FAISS + index.pkl uma única vez (arquivo local e confiável) e grava o formato mapeado.
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.embeddings import FakeEmbeddings
+
+    from backends_embedding import ler_identidade
+    from empacotador_contexto import anotar_tokens
+
+    identidade = ler_identidade(pasta_origem)
+    # O embedder não é usado na conversão; os vetores já estão no índice.
+    db = FAISS.load_local(pasta_origem, FakeEmbeddings(size=1), allow_dangerous_deserialization=True)
+    vetores = db.index.reconstruct_n(0, db.index.ntotal) if isinstance(db.index, faiss.IndexFlat) else \
+        np.vstack([db.index.reconstruct(i) for i in range(db.index.ntotal)])
+    documentos = anotar_tokens([db.docstore.search(db.index_to_docstore_id[i]) for i in range(db.index.ntotal)])
+
+    escritor = EscritorIndiceMapeado(pasta_destino, None, tipo_vetores, tipo_busca)
+    escritor.adicionar_vetores(documentos, vetores)
+    return escritor.finalizar(identidade['backend'], identidade['modelo'])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte um índice FAISS (index.faiss + index.pkl) para o formato mapeado.")
+    parser.add_argument("origem")
+    parser.add_argument("destino")
+    parser.add_argument("--tipo-vetores", choices=list(TIPOS_VETORES), default="float32")
+    parser.add_argument("--busca", choices=TIPOS_BUSCA, default=BUSCA_EXATA)
+    args = parser.parse_args()
+
+    manifesto = converter_faiss_legado(args.origem, args.destino, args.tipo_vetores, args.busca)
+    print(f"-> {manifesto['total_chunks']} chunks convertidos ({manifesto['dimensao']} dimensões, "
+          f"{manifesto['tipo_vetores']}): '{args.origem}' -> '{args.destino}'")
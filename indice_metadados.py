@@ -0,0 +1,119 @@
+import json
+import os
+import re
+
+from indice_lexico import tokenizar
+
+# Índice invertido dos metadados dos chunks: (campo, valor) -> posições no índice vetorial.
+# Gravado como JSON ao lado do índice; se não existir, é montado na carga a partir dos chunks.
+ARQUIVO_METADADOS = "metadados.json"
+VERSAO_METADADOS = 1
+# O ementário grava o nome em 'disciplina'; as tabelas da matriz, em 'nome_disciplina'.
+CAMPOS_INDEXADOS = {
+    "tipo": ("tipo",),
+    "semestre": ("semestre",),
+    "grupo": ("grupo",),
+    "disciplina": ("nome_disciplina", "disciplina"),
+    "nome_professor": ("nome_professor",),
+}
+CAMPOS_DE_NOMES = ("disciplina", "nome_professor")
+PADRAO_CODIGO = re.compile(r"\(código ([A-Z]\d+)\)")
+# Numerais ("II", "2") distinguem disciplinas da mesma sequência mesmo fora do vocabulário dos nomes.
+PADRAO_NUMERAL = re.compile(r"^(?:\d+|[ivx]+)$")
+
+
+def resolver_por_radicais(grupos, termos, ignorar=frozenset()):
+    # grupos: {radicais do nome: [nomes]}. Devolve os nomes da entidade citada nos termos, ou None.
+    # Preferência para o nome mais longo citado por inteiro; sem nenhum, aceita uma citação
+    # parcial desde que uma única entidade tenha a maior sobreposição.
+    escolhido = _escolher_por_radicais(grupos, termos, ignorar)
+    if escolhido is None:
+        return None
+    # Termos de nomes (ou numerais) que sobram fora do escolhido citam outra entidade: "Banco de
+    # Dados II" não pode virar "Banco de Dados" quando não existe a II.
+    vocabulario = frozenset().union(*grupos)
+    sobras = {termo for termo in termos - ignorar - escolhido if termo in vocabulario or PADRAO_NUMERAL.match(termo)}
+    return None if sobras else grupos[escolhido]
+
+
+def _escolher_por_radicais(grupos, termos, ignorar):
+    completos = [radicais for radicais in grupos if radicais <= termos]
+    if completos:
+        maior = max(len(radicais) for radicais in completos)
+        melhores = [radicais for radicais in completos if len(radicais) == maior]
+        return melhores[0] if len(melhores) == 1 else None
+
+    termos = termos - ignorar
+    sobreposicoes = {radicais: len(radicais & termos) for radicais in grupos}
+    maior = max(sobreposicoes.values(), default=0)
+    melhores = [radicais for radicais, total in sobreposicoes.items() if total == maior]
+    return melhores[0] if maior > 0 and len(melhores) == 1 else None
+
+
+def agrupar_por_radicais(nomes):
+    grupos = {}
+    for nome in nomes:
+        radicais = frozenset(tokenizar(nome))
+        if radicais:
+            grupos.setdefault(radicais, []).append(nome)
+    return grupos
+
+
+def montar_indice_metadados(documentos):
+    campos = {campo: {} for campo in CAMPOS_INDEXADOS}
+    codigos = {}
+    total = 0
+    for posicao, documento in enumerate(documentos):
+        total += 1
+        metadata = documento.metadata
+        for campo, chaves in CAMPOS_INDEXADOS.items():
+            valor = next((metadata[chave] for chave in chaves if metadata.get(chave) not in (None, "")), None)
+            if valor is not None:
+                campos[campo].setdefault(str(valor), []).append(posicao)
+        if metadata.get('tipo') == 'disciplina_detalhe':
+            codigo = PADRAO_CODIGO.search(documento.page_content)
+            if codigo and metadata.get('nome_disciplina'):
+                codigos[codigo.group(1)] = metadata['nome_disciplina']
+    return {"versao": VERSAO_METADADOS, "total_documentos": total, "campos": campos, "codigos": codigos}
+
+
+def salvar_indice_metadados(documentos, pasta_indice):
+    dados = montar_indice_metadados(documentos)
+    with open(os.path.join(pasta_indice, ARQUIVO_METADADOS), 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False)
+    return dados
+
+
+def carregar_indice_metadados(pasta_indice):
+    caminho = os.path.join(pasta_indice, ARQUIVO_METADADOS)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    if dados.get('versao') != VERSAO_METADADOS:
+        return None
+    return IndiceMetadados(dados)
+
+
+class IndiceMetadados:
+
+    def __init__(self, dados):
+        self.total_documentos = dados['total_documentos']
+        self.campos = dados['campos']
+        self.codigos = dados['codigos']
+        # Nomes agrupados pelo conjunto de radicais: "Estrutura de Dados II" e "Estruturas de
+        # Dados II" (ou a mesma disciplina com outra caixa) caem na mesma entidade.
+        self.entidades = {campo: agrupar_por_radicais(self.campos.get(campo, {})) for campo in CAMPOS_DE_NOMES}
+
+    def __len__(self):
+        return self.total_documentos
+
+    def posicoes(self, campo, valores):
+        encontradas = set()
+        for valor in valores:
+            encontradas.update(self.campos.get(campo, {}).get(str(valor), ()))
+        return encontradas
+
+    def resolver_entidade(self, campo, termos, ignorar=frozenset()):
+        # Devolve os nomes (variantes) da entidade citada nos termos da pergunta, ou None.
+        return resolver_por_radicais(self.entidades.get(campo, {}), termos, ignorar)
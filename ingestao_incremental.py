@@ -0,0 +1,189 @@
+import hashlib
+import inspect
+import json
+import os
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from extratores.cache_paginas import hash_arquivo
+
+VERSAO_ESTADO = 1
+MAX_CHUNKS_NO_RELATORIO = 10
+# Código compartilhado pelos extratores (e o gerador de chunks): alterá-lo invalida todos os registros.
+MODULOS_COMPARTILHADOS = ("extratores/documento_pdf.py", "extratores/indice_marcadores.py",
+                          "extratores/cache_paginas.py", "gerador_chunks.py")
+
+
+def caminho_estado(caminho_saida):
+    # chunks_completos.json -> chunks_completos.estado.json
+    return os.path.splitext(caminho_saida)[0] + ".estado.json"
+
+
+@lru_cache(maxsize=None)
+def _conteudo_compartilhado():
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    conteudo = b""
+    for modulo in MODULOS_COMPARTILHADOS:
+        with open(os.path.join(pasta, modulo), 'rb') as f:
+            conteudo += modulo.encode('utf-8') + b"\0" + f.read()
+    return conteudo
+
+
+def impressao_extrator(funcao):
+    # Alterar o código de um extrator, ou o código comum de que ele depende, invalida os registros que ele gerou.
+    with open(inspect.getsourcefile(funcao), 'rb') as f:
+        return hashlib.sha256(f.read() + _conteudo_compartilhado()).hexdigest()
+
+
+def carregar_estado(caminho):
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            estado = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"   -- AVISO: Estado da ingestão anterior ilegível ({e}). Reprocessando tudo.")
+        return None
+    if estado.get('versao') != VERSAO_ESTADO:
+        return None
+    return estado
+
+
+def salvar_estado(caminho, tarefas, impressoes, resultados):
+    estado = {"versao": VERSAO_ESTADO, "arquivos": {}, "extratores": {}}
+    for tarefa in tarefas:
+        arquivo = tarefa['arquivo']
+        if arquivo in impressoes:
+            estado['arquivos'][arquivo] = {"paginas": impressoes[arquivo]}
+        elif os.path.exists(arquivo):
+            estado['arquivos'][arquivo] = {"arquivo": hash_arquivo(arquivo)}
+        else:
+            estado['arquivos'][arquivo] = {"arquivo": None}
+
+        paginas = tarefa.get('paginas')
+        estado['extratores'][tarefa['nome']] = {
+            "arquivo": arquivo,
+            "codigo": impressao_extrator(tarefa['funcao']),
+            "paginas": None if paginas is None else list(paginas),
+            "registros": resultados[tarefa['nome']],
+        }
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, ensure_ascii=False)
+
+
+def paginas_alteradas(anteriores, atuais):
+    # Índices (base 0) cujo conteúdo mudou, incluindo páginas novas e removidas.
+    alteradas = {i for i, impressao in enumerate(atuais) if i >= len(anteriores) or anteriores[i] != impressao}
+    alteradas.update(range(len(atuais), len(anteriores)))
+    return alteradas
+
+
+def _motivo_para_reprocessar(tarefa, anterior, arquivo_anterior, impressoes):
+    if anterior is None or arquivo_anterior is None:
+        return "sem resultado anterior"
+    if anterior['codigo'] != impressao_extrator(tarefa['funcao']):
+        return "código do extrator alterado"
+
+    arquivo = tarefa['arquivo']
+    if arquivo not in impressoes:
+        # Arquivo lido sem o DocumentoPDF (Guia): compara o arquivo inteiro.
+        atual = hash_arquivo(arquivo) if os.path.exists(arquivo) else None
+        return None if atual == arquivo_anterior.get('arquivo') else "arquivo alterado"
+
+    if 'paginas' not in arquivo_anterior:
+        return "sem resultado anterior"
+    alteradas = paginas_alteradas(arquivo_anterior['paginas'], impressoes[arquivo])
+    if not alteradas:
+        return None
+
+    paginas = tarefa.get('paginas')
+    if paginas is None or anterior['paginas'] is None:
+        return f"{len(alteradas)} página(s) alterada(s) no documento"
+    if list(paginas) != anterior['paginas']:
+        return "intervalo de páginas mudou"
+    afetadas = sorted(alteradas.intersection(paginas))
+    if afetadas:
+        return f"páginas alteradas: {[p + 1 for p in afetadas]}"
+    return None
+
+
+def selecionar_tarefas(tarefas, estado, impressoes):
+    # Separa as tarefas que precisam rodar das que podem reaproveitar os registros anteriores.
+    # As tarefas já devem ter as páginas resolvidas (agendador_extracao.preparar_documentos).
+    a_rodar = []
+    reaproveitados = {}
+    print("\n-> Ingestão incremental:")
+    for arquivo, atuais in impressoes.items():
+        anteriores = (estado or {}).get('arquivos', {}).get(arquivo, {}).get('paginas')
+        if anteriores is None:
+            continue
+        alteradas = sorted(paginas_alteradas(anteriores, atuais))
+        if alteradas:
+            print(f"   -- {os.path.basename(arquivo)}: {len(alteradas)} página(s) alterada(s): {[p + 1 for p in alteradas]}")
+        else:
+            print(f"   -- {os.path.basename(arquivo)}: nenhuma página alterada")
+
+    for tarefa in tarefas:
+        anterior = (estado or {}).get('extratores', {}).get(tarefa['nome'])
+        arquivo_anterior = (estado or {}).get('arquivos', {}).get(tarefa['arquivo'])
+        motivo = _motivo_para_reprocessar(tarefa, anterior, arquivo_anterior, impressoes)
+        if motivo is None:
+            reaproveitados[tarefa['nome']] = anterior['registros']
+            print(f"   -- {tarefa['nome']}: reaproveitado ({len(anterior['registros'])} registros)")
+        else:
+            a_rodar.append(tarefa)
+            print(f"   -- {tarefa['nome']}: reprocessando ({motivo})")
+    return a_rodar, reaproveitados
+
+
+def _chave_chunk(chunk):
+    return json.dumps(chunk, ensure_ascii=False, sort_keys=True)
+
+
+def _sobras(chunks, outros):
+    # Chunks de 'chunks' sem um idêntico correspondente em 'outros' (multiconjunto).
+    disponiveis = Counter(_chave_chunk(chunk) for chunk in outros)
+    sobras = []
+    for chunk in chunks:
+        chave = _chave_chunk(chunk)
+        if disponiveis[chave]:
+            disponiveis[chave] -= 1
+        else:
+            sobras.append(chunk)
+    return sobras
+
+
+def comparar_chunks(antigos, novos):
+    # Chunks idênticos são ignorados; entre os restantes, os que têm o mesmo metadata
+    # (na ordem em que aparecem) contam como modificados.
+    removidos_por_metadata = defaultdict(list)
+    for chunk in _sobras(antigos, novos):
+        removidos_por_metadata[_chave_chunk(chunk['metadata'])].append(chunk)
+
+    adicionados, modificados = [], []
+    for chunk in _sobras(novos, antigos):
+        candidatos = removidos_por_metadata.get(_chave_chunk(chunk['metadata']))
+        if candidatos:
+            modificados.append((candidatos.pop(0), chunk))
+        else:
+            adicionados.append(chunk)
+    removidos = [chunk for candidatos in removidos_por_metadata.values() for chunk in candidatos]
+    return {"adicionados": adicionados, "removidos": removidos, "modificados": modificados}
+
+
+def _descrever_chunk(chunk):
+    metadata = chunk.get('metadata', {})
+    descricao = ", ".join(f"{chave}={valor}" for chave, valor in metadata.items() if chave != 'fonte')
+    return f"[{metadata.get('fonte', '?')}] {descricao}"[:150]
+
+
+def imprimir_relatorio(diferencas):
+    print("\n-> Relatório da ingestão incremental:")
+    print(f"   -- {len(diferencas['adicionados'])} adicionados / {len(diferencas['removidos'])} removidos / "
+          f"{len(diferencas['modificados'])} modificados")
+    for rotulo, chunks in (("+", diferencas['adicionados']), ("-", diferencas['removidos']),
+                           ("~", [novo for _, novo in diferencas['modificados']])):
+        for chunk in chunks[:MAX_CHUNKS_NO_RELATORIO]:
+            print(f"   {rotulo} {_descrever_chunk(chunk)}")
+        if len(chunks) > MAX_CHUNKS_NO_RELATORIO:
+            print(f"   {rotulo} ... e mais {len(chunks) - MAX_CHUNKS_NO_RELATORIO}")
@@ -0,0 +1,125 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_respostas import assinatura_pergunta
+from classificador_intencao import normalizar_texto
+from recuperacao_hibrida import cortar_por_queda, fundir_variacoes, recuperar_em_lote
+
+# Etapas de uma pergunta acadêmica: a classificação e a geração das variações (multiquery) saem ao
+# mesmo tempo, e a pergunta e as variações vão juntas a um só embedding e a uma só busca. Quase todo
+# o tráfego é acadêmico, então o multiquery é especulativo: se a classificação der chitchat, é descartado.
+# Com o cache de respostas, a pergunta já respondida (por similaridade) dispensa o resto; com os
+# caches de consulta, variações, embeddings e resultados de perguntas populares não voltam à rede.
+MAX_ETAPAS_PARALELAS = 8
+
+
+def criar_executor(max_workers=MAX_ETAPAS_PARALELAS):
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="etapa")
+
+
+class Cronometro:
+    # Tempo de cada etapa de uma pergunta, para o log.
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.etapas = {}
+        self.primeiro_token = None
+
+    def medir(self, nome, funcao, *args):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args)
+        finally:
+            self.etapas[nome] = time.perf_counter() - inicio
+
+    def disparar(self, executor, nome, funcao, *args):
+        return executor.submit(self.medir, nome, funcao, *args)
+
+    def transmitir(self, nome, fluxo):
+        # Repassa o texto do LLM à medida que chega (para o st.write_stream), medindo o tempo até o
+        # primeiro pedaço (desde a etapa e desde a pergunta) e o total da etapa.
+        inicio = time.perf_counter()
+        for pedaco in fluxo:
+            texto = getattr(pedaco, 'content', pedaco)
+            if not isinstance(texto, str) or not texto:
+                continue
+            if self.primeiro_token is None:
+                self.primeiro_token = time.perf_counter() - self.inicio
+                self.etapas[f"{nome} (1º token)"] = time.perf_counter() - inicio
+            yield texto
+        self.etapas[nome] = time.perf_counter() - inicio
+
+    def resumo(self):
+        etapas = ", ".join(f"{nome} {segundos * 1000:.0f} ms" for nome, segundos in self.etapas.items())
+        primeiro = f" | 1º token {self.primeiro_token * 1000:.0f} ms" if self.primeiro_token is not None else ""
+        return f"{etapas}{primeiro} | total {(time.perf_counter() - self.inicio) * 1000:.0f} ms"
+
+
+def embutir_pergunta(retriever, pergunta):
+    # Mesmo caminho de embedding da busca em lote.
+    return retriever.vectorstore.embeddings.embed_documents([pergunta])[0]
+
+
+def buscar_contexto(pergunta, classificar, gerar_variacoes, retriever, roteador, executor, cronometro, num_variacoes,
+                    classificar_local=None, cache_respostas=None, versao_indice=None, caches=None):
+    # classificar(pergunta) -> True se acadêmica; gerar_variacoes(pergunta) -> texto com uma variação por linha.
+    # classificar_local(pergunta) -> True, False ou None (incerto): quando decide, o LLM nem é chamado.
+    # caches: CachesConsulta (variações e resultados; o de embeddings fica no embedder do índice).
+    # Devolve {"academico", "rota", "documentos", "em_cache", "vetor", "assinatura"}: em_cache é a
+    # entrada do cache de respostas (ou None); vetor e assinatura servem para guardar a resposta gerada.
+    contexto = {"academico": False, "rota": None, "documentos": [], "em_cache": None, "vetor": None, "assinatura": None}
+    decisao = cronometro.medir("classificação local", classificar_local, pergunta) if classificar_local else None
+    if decisao is False:
+        return contexto
+
+    rota = roteador.rotear(pergunta) if roteador else None
+    docs_rota = cronometro.medir("roteador", roteador.recuperar, rota) if rota else []
+
+    futuro_classe = None if decisao else cronometro.disparar(executor, "classificação", classificar, pergunta)
+    futuro_variacoes = None
+    chave_variacoes = (num_variacoes, normalizar_texto(pergunta))
+    variacoes = caches.variacoes.obter(chave_variacoes) if caches is not None and not docs_rota else None
+    if not docs_rota and variacoes is None:
+        futuro_variacoes = cronometro.disparar(executor, "multiquery", gerar_variacoes, pergunta)
+    resultados_cache = caches.resultados if caches is not None else None
+
+    # Enquanto as chamadas ao LLM correm: embedding da pergunta e cache de respostas.
+    vetor = None
+    if cache_respostas is not None:
+        vetor = cronometro.medir("embedding da pergunta", embutir_pergunta, retriever, pergunta)
+        assinatura = assinatura_pergunta(pergunta, rota)
+        contexto.update(vetor=vetor, assinatura=assinatura)
+        entrada = cronometro.medir("cache de respostas", cache_respostas.buscar, vetor, assinatura, versao_indice)
+        if entrada is not None:
+            # Chamadas já em andamento terminam sozinhas; o resultado é ignorado.
+            for futuro in (futuro_classe, futuro_variacoes):
+                if futuro is not None:
+                    futuro.cancel()
+            contexto.update(academico=True, rota=rota, em_cache=entrada)
+            return contexto
+
+    if futuro_classe is not None and not futuro_classe.result():
+        if futuro_variacoes is not None:
+            futuro_variacoes.cancel()
+        return contexto
+    contexto['academico'] = True
+    if docs_rota:
+        contexto.update(rota=rota, documentos=docs_rota)
+        return contexto
+
+    if variacoes is None:
+        variacoes = [v.strip() for v in futuro_variacoes.result().strip().split('\n') if v.strip()][:num_variacoes]
+        if caches is not None:
+            caches.variacoes.guardar(chave_variacoes, variacoes)
+        print(f"Log: Perguntas geradas: {[pergunta] + variacoes}")
+    else:
+        print(f"Log: Variações em cache: {[pergunta] + variacoes}")
+    # O vetor da pergunta, se já calculado para o cache de respostas, não volta ao embedder.
+    vetores = [vetor] + [None] * len(variacoes) if vetor is not None else None
+    resultados = cronometro.medir("busca", recuperar_em_lote, retriever, [pergunta] + variacoes, vetores,
+                                  resultados_cache, versao_indice)
+    # Fusão RRF das listas de cada consulta e corte onde a pontuação despenca.
+    fundidos = fundir_variacoes(resultados)
+    contexto['documentos'] = [documento for documento, _ in cortar_por_queda(fundidos)]
+    print(f"Log: {len(contexto['documentos'])} de {len(fundidos)} chunks após a fusão das variações.")
+    return contexto
@@ -1,18 +1,14 @@
+import argparse
 import json
 import os
-from collections import defaultdict 
+from collections import defaultdict
 
-from gerador_chunks import gerar_chunks
-from extratores.matriz_curricular_obrigatoria import extrair_matriz_curricular
-from extratores.disciplinas_optativas import extrair_disciplinas_optativas 
-from extratores.equivalencia_atv_complementares import extrair_atividades_complementares 
-from extratores.matriz_equivalencia_obrigatoria import extrair_equivalencia_obrigatorias 
-from extratores.matriz_equivalencia_optativas import extrair_equivalencia_optativas
-from extratores.ementario import extrair_ementario
-from extratores.corpo_docente import extrair_dados_corpo_docente
-from extratores.textosemtabela import extrair_chunks_de_texto
-
-from extratores.guia_graduacao import extrair_chunks_guia_graduacao
+from gerador_chunks import gerar_chunks, despachar_por_tipo
+from agendador_extracao import montar_tarefas, executar_tarefas, iterar_tarefas, preparar_documentos
+from ingestao_incremental import (caminho_estado, carregar_estado, salvar_estado, selecionar_tarefas,
+                                  comparar_chunks, imprimir_relatorio)
+from extratores.cache_paginas import CachePaginas
+from grafo_curricular import ARQUIVO_GRADE, salvar_grafo
 
 
 def salvar_json(dados, caminho_arquivo):
@@ -20,47 +16,125 @@ def salvar_json(dados, caminho_arquivo):
         json.dump(dados, f, ensure_ascii=False, indent=4)
     print(f"\nArquivo final '{caminho_arquivo}' salvo com sucesso!")
 
+def salvar_jsonl(chunks, caminho_arquivo):
+    # Um chunk por linha, gravado assim que é gerado: o arquivo pode ser lido enquanto cresce.
+    total = 0
+    with open(caminho_arquivo, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk, ensure_ascii=False) + '\n')
+            f.flush()
+            total += 1
+    if total:
+        print(f"\nArquivo final '{caminho_arquivo}' salvo com sucesso! ({total} chunks)")
+    else:
+        print("\nNenhum chunk foi gerado.")
+    return total
+
+def gerar_chunks_em_fluxo(tarefas, workers, cache, registros=None):
+    # Cada extrator do Pipeline 1 é despachado assim que termina; os chunks
+    # do Pipeline 2 já vêm formatados e passam direto. Os registros brutos do
+    # Pipeline 1 são acumulados em 'registros', se informado.
+    print("\n-> Iniciando Geração de Chunks (Modo Streaming)...")
+    for tarefa, resultado in iterar_tarefas(tarefas, workers=workers, cache=cache):
+        if tarefa.get('pipeline', 1) == 1:
+            if registros is not None:
+                registros.extend(resultado)
+            yield from despachar_por_tipo(resultado)
+        else:
+            print(f"-> {len(resultado)} chunks de texto pré-formatados coletados ({tarefa['nome']}).")
+            yield from resultado
+
 if __name__ == "__main__":
-    
-    NOME_ARQUIVO_PPC = 'PPC 2023 - Sistemas de Informação.pdf' 
-    NOME_ARQUIVO_GUIA = 'Guia-da-Graduacao.pdf' 
+
+    NOME_ARQUIVO_PPC = 'PPC 2023 - Sistemas de Informação.pdf'
+    NOME_ARQUIVO_GUIA = 'Guia-da-Graduacao.pdf'
     NOME_ARQUIVO_SAIDA = 'chunks_completos.json'
+    NOME_ARQUIVO_SAIDA_JSONL = 'chunks_completos.jsonl'
+
+    parser = argparse.ArgumentParser(description="Extrai os chunks do PPC e do Guia da Graduação.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Tamanho do pool de processos dos extratores (1 = sequencial, compartilhando o PDF).")
+    parser.add_argument("--workers-paginas", type=int, default=None,
+                        help="Processos usados pelo texto corrido para extrair as páginas em paralelo "
+                             "(padrão: 1 com o pool de extratores, senão um por CPU).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignora o cache em disco das extrações e reprocessa todas as páginas.")
+    parser.add_argument("--formato", choices=["json", "jsonl"], default="json",
+                        help="jsonl grava os chunks em fluxo, um por linha, à medida que os extratores terminam.")
+    parser.add_argument("--reprocessar-tudo", action="store_true",
+                        help="Ignora o estado da execução anterior e roda todos os extratores (só no formato json).")
+    args = parser.parse_args()
+    # Os dois pools juntos não passam de um processo por CPU: o do texto corrido roda dentro de um extrator.
+    if args.workers_paginas is None:
+        args.workers_paginas = 1 if args.workers > 1 else os.cpu_count() or 1
 
     print("--- INICIANDO PROCESSAMENTO COMPLETO DO PPC ---")
 
-    print("\n--- Pipeline 1: Extraindo dados estruturados (Tabelas, Ementário)... ---")    
-    dados_brutos_para_formatar = []
-    
-    print("Processando PPC (Tabelas)...")
-    dados_brutos_para_formatar.extend(extrair_matriz_curricular(NOME_ARQUIVO_PPC))
-    dados_brutos_para_formatar.extend(extrair_disciplinas_optativas(NOME_ARQUIVO_PPC))
-    dados_brutos_para_formatar.extend(extrair_atividades_complementares(NOME_ARQUIVO_PPC))
-    dados_brutos_para_formatar.extend(extrair_equivalencia_obrigatorias(NOME_ARQUIVO_PPC))
-    dados_brutos_para_formatar.extend(extrair_equivalencia_optativas(NOME_ARQUIVO_PPC))
-    dados_brutos_para_formatar.extend(extrair_dados_corpo_docente(NOME_ARQUIVO_PPC)) 
-    dados_brutos_para_formatar.extend(extrair_ementario(NOME_ARQUIVO_PPC))
-    dados_brutos_para_formatar.extend(extrair_chunks_de_texto(NOME_ARQUIVO_PPC))
-
-    print(f"-> {len(dados_brutos_para_formatar)} registros de dados brutos coletados.")
-
-    chunks_pipeline_1 = gerar_chunks(dados_brutos_para_formatar)
-    
-    print("\n--- Pipeline 2: Extraindo chunks pré-formatados (Guia da Graduação)... ---")
-    chunks_pipeline_2 = []
-    
-    print("Processando Guia da Graduação (Texto Corrido)...")
-    chunks_pipeline_2.extend(extrair_chunks_guia_graduacao(NOME_ARQUIVO_GUIA)) 
-    
-    print(f"-> {len(chunks_pipeline_2)} chunks de texto pré-formatados coletados.")
-
-    print("\n-> Combinando todos os chunks...")
-    chunks_finais = chunks_pipeline_1 + chunks_pipeline_2
-    
-    print(f"-> Total de {len(chunks_finais)} chunks finais gerados.")
-
-    if chunks_finais:
-        salvar_json(chunks_finais, NOME_ARQUIVO_SAIDA)
+    cache_paginas = None if args.no_cache else CachePaginas()
+
+    tarefas = montar_tarefas(NOME_ARQUIVO_PPC, NOME_ARQUIVO_GUIA, workers_paginas=args.workers_paginas)
+
+    if args.formato == "jsonl":
+        registros = []
+        if salvar_jsonl(gerar_chunks_em_fluxo(tarefas, args.workers, cache_paginas, registros), NOME_ARQUIVO_SAIDA_JSONL):
+            salvar_grafo(registros, ARQUIVO_GRADE)
+
+        if cache_paginas is not None:
+            cache_paginas.aplicar_limite()
+            cache_paginas.fechar()
     else:
-        print("\nNenhum chunk foi gerado.")
-    
-    print("\n--- PROCESSAMENTO FINALIZADO ---")
\ No newline at end of file
+        # Só rodam os extratores cujas páginas mudaram desde a execução anterior.
+        documentos = preparar_documentos(tarefas, cache_paginas)
+        impressoes = {arquivo: documento.impressoes for arquivo, documento in documentos.items() if documento is not None}
+        estado_anterior = None if args.reprocessar_tudo else carregar_estado(caminho_estado(NOME_ARQUIVO_SAIDA))
+        tarefas_a_rodar, resultados = selecionar_tarefas(tarefas, estado_anterior, impressoes)
+        if tarefas_a_rodar:
+            resultados.update(executar_tarefas(tarefas_a_rodar, workers=args.workers, cache=cache_paginas,
+                                               documentos=documentos))
+        for documento in documentos.values():
+            if documento is not None:
+                documento.fechar()
+
+        if cache_paginas is not None:
+            cache_paginas.aplicar_limite()
+            cache_paginas.fechar()
+
+        print("\n--- Pipeline 1: Extraindo dados estruturados (Tabelas, Ementário)... ---")
+        dados_brutos_para_formatar = []
+
+        print("Processando PPC (Tabelas)...")
+        for tarefa in tarefas:
+            if tarefa.get('pipeline', 1) == 1:
+                dados_brutos_para_formatar.extend(resultados[tarefa['nome']])
+
+        print(f"-> {len(dados_brutos_para_formatar)} registros de dados brutos coletados.")
+
+        chunks_pipeline_1 = gerar_chunks(dados_brutos_para_formatar)
+
+        print("\n--- Pipeline 2: Extraindo chunks pré-formatados (Guia da Graduação)... ---")
+        chunks_pipeline_2 = []
+
+        print("Processando Guia da Graduação (Texto Corrido)...")
+        for tarefa in tarefas:
+            if tarefa.get('pipeline', 1) == 2:
+                chunks_pipeline_2.extend(resultados[tarefa['nome']])
+
+        print(f"-> {len(chunks_pipeline_2)} chunks de texto pré-formatados coletados.")
+
+        print("\n-> Combinando todos os chunks...")
+        chunks_finais = chunks_pipeline_1 + chunks_pipeline_2
+
+        print(f"-> Total de {len(chunks_finais)} chunks finais gerados.")
+
+        if os.path.exists(NOME_ARQUIVO_SAIDA):
+            with open(NOME_ARQUIVO_SAIDA, 'r', encoding='utf-8') as f:
+                imprimir_relatorio(comparar_chunks(json.load(f), chunks_finais))
+
+        if chunks_finais:
+            salvar_json(chunks_finais, NOME_ARQUIVO_SAIDA)
+            salvar_grafo(dados_brutos_para_formatar, ARQUIVO_GRADE)
+            salvar_estado(caminho_estado(NOME_ARQUIVO_SAIDA), tarefas, impressoes, resultados)
+        else:
+            print("\nNenhum chunk foi gerado.")
+
+    print("\n--- PROCESSAMENTO FINALIZADO ---")
@@ -0,0 +1,137 @@
+from typing import Any, Callable
+
+import numpy as np
+from langchain_core.retrievers import BaseRetriever
+
+# Constante usual da reciprocal rank fusion: amortece a diferença entre as primeiras posições.
+CONSTANTE_RRF = 60
+K_VETORIAL = 10
+K_LEXICO = 10
+# Corte adaptativo da lista fundida das variações: sempre os K_MINIMO_FUSAO primeiros, depois os que
+# mantêm ao menos RAZAO_QUEDA_FUSAO da pontuação do primeiro, até K_MAXIMO_FUSAO. Com o RRF, um chunk
+# achado por várias variações pontua um múltiplo de quem só aparece numa: a queda marca o corte.
+K_MINIMO_FUSAO = 3
+K_MAXIMO_FUSAO = 10
+RAZAO_QUEDA_FUSAO = 0.5
+
+
+def fundir_rrf(listas, constante=CONSTANTE_RRF):
+    # Cada lista é uma sequência ordenada de documentos; um documento presente em várias listas
+    # soma 1 / (constante + posição) de cada uma. Documentos iguais são reconhecidos pelo conteúdo.
+    pontos = {}
+    documentos = {}
+    for lista in listas:
+        for posicao, documento in enumerate(lista, start=1):
+            chave = documento.page_content
+            pontos[chave] = pontos.get(chave, 0.0) + 1.0 / (constante + posicao)
+            documentos.setdefault(chave, documento)
+    ordem = sorted(pontos, key=lambda chave: -pontos[chave])
+    return [(documentos[chave], pontos[chave]) for chave in ordem]
+
+
+def documento_por_posicao(db):
+    # Posição no índice vetorial -> Document, tanto no índice mapeado quanto no FAISS do LangChain.
+    if hasattr(db, 'documento'):
+        return db.documento
+    return lambda posicao: db.docstore.search(db.index_to_docstore_id[posicao])
+
+
+def total_vetores(db):
+    return len(db.chunks) if hasattr(db, 'chunks') else db.index.ntotal
+
+
+def buscar_vetorial_em_lote(db, consultas, k, vetores=None, cache=None, versao=None):
+    # Todas as consultas num único pedido de embedding e numa única busca no índice. Devolve uma
+    # lista [(posição, distância)] por consulta. vetores (opcional) acompanha as consultas: os que
+    # já vierem calculados não vão ao embedder, os None sim.
+    # Com o cache (CacheTTL de (versão do índice, k, consulta)), só as consultas ausentes são buscadas.
+    if not consultas:
+        return []
+    resultados = [cache.obter((versao, k, consulta)) if cache is not None else None for consulta in consultas]
+    faltantes = [i for i, resultado in enumerate(resultados) if resultado is None]
+    if not faltantes:
+        return resultados
+    if vetores is None:
+        vetores = [None] * len(consultas)
+    a_calcular = [i for i in faltantes if vetores[i] is None]
+    calculados = dict(zip(a_calcular, db.embeddings.embed_documents([consultas[i] for i in a_calcular]))) \
+        if a_calcular else {}
+    vetores = np.asarray([calculados.get(i, vetores[i]) for i in faltantes], dtype=np.float32)
+    if hasattr(db, 'buscar_varios'):
+        novos = db.buscar_varios(vetores, k)
+    else:
+        distancias, indices = db.index.search(vetores, min(k, db.index.ntotal))
+        novos = [[(int(i), float(d)) for i, d in zip(linha_i, linha_d) if i >= 0]
+                 for linha_i, linha_d in zip(indices, distancias)]
+    for i, resultado in zip(faltantes, novos):
+        resultados[i] = resultado
+        if cache is not None:
+            cache.guardar((versao, k, consultas[i]), resultado)
+    return resultados
+
+
+def recuperar_em_lote(retriever, consultas, vetores=None, cache=None, versao=None):
+    # Equivale a retriever.invoke(c) para cada consulta, com uma ida só ao embedder e ao índice.
+    # Devolve uma lista [(documento, pontuação)] por consulta: RRF no híbrido, distância L2 no vetorial.
+    if isinstance(retriever, RetrieverHibrido):
+        return retriever.recuperar_varias(consultas, vetores, cache, versao)
+    db = retriever.vectorstore
+    documento = documento_por_posicao(db)
+    k = retriever.search_kwargs.get("k", 4)
+    return [[(documento(posicao), distancia) for posicao, distancia in resultado]
+            for resultado in buscar_vetorial_em_lote(db, consultas, k, vetores, cache, versao)]
+
+
+def mesclar_resultados(listas):
+    # Junta as listas por consulta sem repetir chunks, na ordem da primeira aparição, com a
+    # pontuação dessa aparição.
+    vistos = set()
+    mesclados = []
+    for lista in listas:
+        for documento, pontuacao in lista:
+            if documento.page_content not in vistos:
+                vistos.add(documento.page_content)
+                mesclados.append((documento, pontuacao))
+    return mesclados
+
+
+def fundir_variacoes(resultados):
+    # Uma lista [(documento, pontuação)] por consulta. As pontuações de listas diferentes (RRF do
+    # híbrido ou distância L2) não se comparam; só a posição entra na fusão.
+    return fundir_rrf([[documento for documento, _ in lista] for lista in resultados])
+
+
+def cortar_por_queda(fundidos, razao=RAZAO_QUEDA_FUSAO, minimo=K_MINIMO_FUSAO, maximo=K_MAXIMO_FUSAO):
+    if not fundidos:
+        return []
+    limite = razao * fundidos[0][1]
+    corte = min(minimo, len(fundidos))
+    while corte < min(maximo, len(fundidos)) and fundidos[corte][1] >= limite:
+        corte += 1
+    return fundidos[:corte]
+
+
+class RetrieverHibrido(BaseRetriever):
+    # Busca vetorial + BM25 sobre os mesmos chunks, fundidas por RRF. Códigos ("C1") e nomes
+    # exatos de disciplinas aparecem no topo do lado léxico mesmo quando o vetorial os perde.
+
+    vectorstore: Any
+    lexico: Any
+    documento: Callable
+    k: int = 5
+    k_vetorial: int = K_VETORIAL
+    k_lexico: int = K_LEXICO
+
+    def recuperar_varias(self, consultas, vetores=None, cache=None, versao=None):
+        # Lado vetorial em lote (um embedding e uma busca para todas as consultas); o BM25 é local.
+        resultados = []
+        vetoriais_por_consulta = buscar_vetorial_em_lote(self.vectorstore, consultas, self.k_vetorial, vetores,
+                                                         cache, versao)
+        for consulta, vetoriais in zip(consultas, vetoriais_por_consulta):
+            vetoriais = [self.documento(posicao) for posicao, _ in vetoriais]
+            lexicos = [self.documento(posicao) for posicao, _ in self.lexico.buscar(consulta, self.k_lexico)]
+            resultados.append(fundir_rrf([vetoriais, lexicos])[:self.k])
+        return resultados
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        return [documento for documento, _ in self.recuperar_varias([query])[0]]
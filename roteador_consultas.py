@@ -0,0 +1,140 @@
+import re
+
+from indice_lexico import dobrar_acentos, tokenizar
+from indice_metadados import IndiceMetadados, carregar_indice_metadados, montar_indice_metadados
+from recuperacao_hibrida import documento_por_posicao, total_vetores
+
+# Perguntas sobre uma entidade conhecida (ementa de X, professor Y, disciplinas do Nº semestre)
+# vão direto aos chunks pelo índice de metadados, sem multiquery nem a busca ampla.
+MAX_DOCUMENTOS_ROTA = 8
+ORDINAIS = {"primeiro": 1, "segundo": 2, "terceiro": 3, "quarto": 4,
+            "quinto": 5, "sexto": 6, "setimo": 7, "oitavo": 8}
+PADRAO_SEMESTRE = re.compile(r"\b([1-8])\s*o?\s*(?:semestre|periodo)\b|\b(" + "|".join(ORDINAIS) + r")\s+(?:semestre|periodo)\b")
+PADRAO_CODIGO = re.compile(r"\b([A-Za-z]\d{1,2})\b")
+# Só a lista do corpo docente do curso; "docentes do NDE" e afins seguem pela busca híbrida.
+PADRAO_CORPO_DOCENTE = re.compile(r"corpo docente|\b(?:quais|quem) (?:sao )?(?:os )?(?:professores|docentes) do curso\b"
+                                  r"|\blista (?:de|dos) (?:professores|docentes)\b")
+
+# (intenção, padrão na pergunta sem acentos, tipos de chunk, campo da entidade)
+# Sem a entidade resolvida, a pergunta segue pelo caminho geral: "objetivos do curso" ou
+# "referências do TCC" não estão nos chunks de disciplinas.
+INTENCOES = (
+    ("bibliografia_complementar", r"bibliografia complementar|referencias complementares",
+     ("bibliografia_complementar",), "disciplina"),
+    ("bibliografia_basica", r"bibliografia basica", ("bibliografia_basica",), "disciplina"),
+    ("bibliografia", r"bibliografia", ("bibliografia_basica", "bibliografia_complementar"), "disciplina"),
+    ("ementa", r"\bementa", ("ementa",), "disciplina"),
+    ("objetivo", r"\bobjetivos?\b", ("objetivo_disciplina",), "disciplina"),
+    ("professor", r"\bprofessora?\b|\bdocente\b", ("corpo_docente_detalhe",), "nome_professor"),
+    ("detalhe_disciplina", r"carga horaria|\bcreditos?\b|pre-?requisitos?|\bcodigo\b|\bdepartamento\b",
+     ("disciplina_detalhe", "disciplina_optativa", "detalhes_disciplina"), "disciplina"),
+)
+# Perguntas estruturais, respondidas pelo grafo curricular (se carregado) antes das demais.
+# "X é pré-requisito de quê" pede os dependentes; por isso é testado antes dos pré-requisitos.
+INTENCOES_GRAFO = (
+    ("dependentes", r"\be pre-?requisito (?:de|para)\b|\blibera|desbloque|\bdependem? d[aeo]s?\b"),
+    ("pre_requisitos", r"pre-?requisitos?|\bantes de (?:cursar|fazer|pegar)|\b(?:cursar|fazer|ter) antes\b"),
+)
+PADRAO_CARGA = re.compile(r"carga horaria|\bcreditos\b|\bhoras\b")
+# Palavras que descrevem a intenção e não a entidade: não valem na citação parcial de um nome.
+TERMOS_DE_INTENCAO = frozenset(tokenizar(
+    "ementa objetivo bibliografia básica complementar livros referências professor professora docente "
+    "semestre período disciplina matéria curso carga horária créditos pré-requisito código departamento "
+    "antes cursar preciso libera desbloqueia depende dependem"))
+
+
+def semestre_citado(texto):
+    encontrado = PADRAO_SEMESTRE.search(texto)
+    if not encontrado:
+        return None
+    return int(encontrado.group(1)) if encontrado.group(1) else ORDINAIS[encontrado.group(2)]
+
+
+class RoteadorConsultas:
+
+    def __init__(self, vectorstore, indice_metadados, grafo=None):
+        self.vectorstore = vectorstore
+        self.indice = indice_metadados
+        self.grafo = grafo
+        self.documento = documento_por_posicao(vectorstore)
+
+    def _disciplina_citada(self, pergunta, termos):
+        # Um código da matriz ("C1") identifica a disciplina sem ambiguidade.
+        for codigo in PADRAO_CODIGO.findall(pergunta):
+            if codigo.upper() in self.indice.codigos:
+                return [self.indice.codigos[codigo.upper()]]
+        return self.indice.resolver_entidade("disciplina", termos, TERMOS_DE_INTENCAO)
+
+    def _rota_grafo(self, pergunta, texto, disciplina):
+        # Texto exato do subgrafo (cadeia de pré-requisitos, dependentes ou carga do semestre),
+        # acompanhado dos chunks de detalhe da disciplina.
+        semestre = semestre_citado(texto)
+        if semestre is not None and disciplina is None and PADRAO_CARGA.search(texto):
+            resposta = self.grafo.texto_semestre(semestre)
+            if resposta:
+                return {"intencao": "carga_semestre", "tipos": ("disciplina_sumario_semestre",),
+                        "campo": "semestre", "valores": [semestre], "grafo": resposta}
+        for intencao, padrao in INTENCOES_GRAFO:
+            if not re.search(padrao, texto):
+                continue
+            i = self.grafo.encontrar(pergunta, TERMOS_DE_INTENCAO)
+            if i is None:
+                return None
+            resposta = self.grafo.texto_pre_requisitos(i) if intencao == "pre_requisitos" else self.grafo.texto_dependentes(i)
+            return {"intencao": intencao, "tipos": ("disciplina_detalhe", "disciplina_optativa"),
+                    "campo": "disciplina", "valores": disciplina or [], "grafo": resposta}
+        return None
+
+    def rotear(self, pergunta):
+        # Devolve a rota {"intencao", "tipos", "campo", "valores"[, "grafo"]} ou None para o caminho geral.
+        texto = dobrar_acentos(pergunta)
+        termos = frozenset(tokenizar(pergunta))
+        disciplina = self._disciplina_citada(pergunta, termos)
+
+        if self.grafo is not None:
+            rota = self._rota_grafo(pergunta, texto, disciplina)
+            if rota is not None:
+                return rota
+
+        for intencao, padrao, tipos, campo in INTENCOES:
+            if not re.search(padrao, texto):
+                continue
+            valores = disciplina if campo == "disciplina" else \
+                self.indice.resolver_entidade(campo, termos, TERMOS_DE_INTENCAO)
+            if valores is None:
+                break
+            return {"intencao": intencao, "tipos": tipos, "campo": campo, "valores": valores}
+
+        if PADRAO_CORPO_DOCENTE.search(texto):
+            return {"intencao": "corpo_docente", "tipos": ("corpo_docente_lista",), "campo": None, "valores": None}
+
+        semestre = semestre_citado(texto)
+        if semestre is not None and disciplina is None and "optativ" not in texto:
+            return {"intencao": "semestre", "tipos": ("disciplina_sumario_semestre", "disciplina_detalhe"),
+                    "campo": "semestre", "valores": [semestre]}
+        return None
+
+    def recuperar(self, rota):
+        filtro = None
+        if rota['campo'] is not None:
+            filtro = self.indice.posicoes(rota['campo'], rota['valores'])
+
+        documentos = []
+        if rota.get('grafo'):
+            documentos.append(self.grafo.documento(rota['grafo'], rota['intencao']))
+        for tipo in rota['tipos']:
+            posicoes = self.indice.posicoes("tipo", [tipo])
+            if filtro is not None:
+                posicoes &= filtro
+            documentos.extend(self.documento(posicao) for posicao in sorted(posicoes))
+        return documentos[:MAX_DOCUMENTOS_ROTA]
+
+
+def criar_roteador(vectorstore, pasta_indice, grafo=None):
+    # Usa o metadados.json gravado com o índice; se faltar ou estiver desatualizado, monta em memória.
+    indice = carregar_indice_metadados(pasta_indice)
+    total = total_vetores(vectorstore)
+    if indice is None or len(indice) != total:
+        documento = documento_por_posicao(vectorstore)
+        indice = IndiceMetadados(montar_indice_metadados(documento(i) for i in range(total)))
+    return RoteadorConsultas(vectorstore, indice, grafo)
@@ -3,17 +3,34 @@ import os
 import streamlit as st
 import re
 import unicodedata
+import time
+from functools import partial
 from dotenv import load_dotenv
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
+from backends_embedding import BACKEND_OPENAI, conferir_dimensao, embeddings_do_indice, ler_identidade
+from cache_consultas import CachesConsulta, EmbeddingsComCacheTTL
+from cache_respostas import CacheRespostas
+from classificador_intencao import ACADEMICO, ARQUIVO_MODELO_INTENCAO, CHITCHAT, carregar_classificador_intencao, criar_registro_rotulos
+from empacotador_contexto import ORCAMENTO_TOKENS_CONTEXTO, empacotar_contexto
+from grafo_curricular import ARQUIVO_GRADE, carregar_grafo
+from indice_lexico import IndiceLexico, existe_indice_lexico
+from indice_mapeado import IndiceMapeado, eh_indice_mapeado, versao_do_indice
+from pipeline_consulta import Cronometro, buscar_contexto, criar_executor
+from recuperacao_hibrida import RetrieverHibrido, documento_por_posicao, total_vetores
+from roteador_consultas import criar_roteador
+
 PASTA_INDICE_FAISS = "faiss_index"
-MODELO_EMBEDDING_OPENAI = "text-embedding-3-small"
 MODELO_LLM_RESPONDEDOR = "gemini-2.5-flash"
 MODELO_LLM_LITE = "gemini-2.5-flash-lite" 
+K_RECUPERACAO = 5
+NUM_VARIACOES = 3
+# Com o BM25 os nomes e códigos exatos já chegam ao topo: menos chunks e menos variações bastam.
+K_RECUPERACAO_HIBRIDA = 4
+NUM_VARIACOES_HIBRIDA = 2
 
 st.set_page_config(
     page_title="Assistente SI - IFMA",
@@ -71,10 +88,12 @@ def aplicar_estilo_responsivo():
 
 
 def carregar_api_keys():
+    # A chave da OpenAI só é exigida quando o índice foi criado com embeddings da OpenAI.
+    precisa_openai = ler_identidade(PASTA_INDICE_FAISS)['backend'] == BACKEND_OPENAI
     try:
-        openai_key = st.secrets["OPENAI_API_KEY"]
+        if precisa_openai:
+            os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"]
         google_key = st.secrets["GOOGLE_API_KEY"]
-        os.environ["OPENAI_API_KEY"] = openai_key
         os.environ["GOOGLE_API_KEY"] = google_key
         print("API Keys carregadas do Streamlit Secrets.")
     except Exception:
@@ -85,19 +104,27 @@ def carregar_api_keys():
         OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
         GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
         
-        if not OPENAI_API_KEY or not GOOGLE_API_KEY:
+        if (precisa_openai and not OPENAI_API_KEY) or not GOOGLE_API_KEY:
             st.error("Erro: API Keys não encontradas.")
             st.stop()
 
 @st.cache_resource
-def carregar_retriever():
-    print("Inicializando embedding OpenAI...")
+def carregar_caches_consulta():
+    # Variações, embeddings e resultados das consultas, compartilhados entre as sessões.
+    return CachesConsulta()
+
+@st.cache_resource(max_entries=1)
+def carregar_retriever(versao_indice):
+    # O embedder das consultas é sempre o registrado no índice. Recarregado quando o índice
+    # em disco é recriado (a versão entra na chave do cache).
+    print("Inicializando embedding do índice...")
     try:
-        embeddings = OpenAIEmbeddings(model=MODELO_EMBEDDING_OPENAI)
+        embeddings, identidade = embeddings_do_indice(PASTA_INDICE_FAISS)
+        embeddings = EmbeddingsComCacheTTL(embeddings, identidade['modelo'], carregar_caches_consulta().embeddings)
     except Exception as e:
-        st.error(f"Erro ao inicializar OpenAIEmbeddings: {e}")
+        st.error(f"Erro ao inicializar o modelo de embedding: {e}")
         return None
-    print("Embedding OpenAI inicializado.")
+    print("Embedding inicializado.")
 
     print(f"Carregando índice FAISS da pasta: '{PASTA_INDICE_FAISS}'...")
     if not os.path.exists(PASTA_INDICE_FAISS):
@@ -105,18 +132,52 @@ def carregar_retriever():
         return None
             
     try:
-        db = FAISS.load_local(
-            PASTA_INDICE_FAISS,
-            embeddings,
-            allow_dangerous_deserialization=True
-        )
+        if eh_indice_mapeado(PASTA_INDICE_FAISS):
+            # Formato sem pickle: só mapeia os arquivos, nada é desserializado.
+            db = IndiceMapeado(PASTA_INDICE_FAISS, embeddings)
+        else:
+            # Índices antigos (index.pkl); converta com indice_mapeado.py.
+            db = FAISS.load_local(
+                PASTA_INDICE_FAISS,
+                embeddings,
+                allow_dangerous_deserialization=True
+            )
+        conferir_dimensao(db, identidade)
         print("Índice FAISS carregado com sucesso.")
-        retriever = db.as_retriever(search_kwargs={"k": 5})
-        return retriever
     except Exception as e:
         st.error(f"Erro fatal ao carregar o índice FAISS: {e}")
         return None
 
+    # Sem o índice léxico (ou com ele desatualizado), a busca é só vetorial.
+    if existe_indice_lexico(PASTA_INDICE_FAISS):
+        try:
+            lexico = IndiceLexico(PASTA_INDICE_FAISS)
+            if len(lexico) == total_vetores(db):
+                print(f"Índice léxico (BM25) carregado: busca híbrida com {len(lexico)} chunks.")
+                return RetrieverHibrido(vectorstore=db, lexico=lexico, documento=documento_por_posicao(db),
+                                        k=K_RECUPERACAO_HIBRIDA)
+            print(f"AVISO: índice léxico com {len(lexico)} chunks e vetorial com {total_vetores(db)}. "
+                  f"Recrie o índice.")
+        except Exception as e:
+            print(f"AVISO: índice léxico ignorado ({e}).")
+    retriever = db.as_retriever(search_kwargs={"k": K_RECUPERACAO})
+    return retriever
+
+@st.cache_resource(max_entries=1)
+def carregar_roteador(_retriever, versao_indice):
+    # Atalho por metadados (ementa de X, professor Y, disciplinas do Nº semestre); opcional.
+    # Com o grade_curricular.json, responde também pré-requisitos e dependentes pelo grafo.
+    try:
+        grafo = carregar_grafo(ARQUIVO_GRADE)
+        if grafo is None:
+            print(f"AVISO: '{ARQUIVO_GRADE}' não encontrado; perguntas de pré-requisitos seguem pela busca.")
+        roteador = criar_roteador(_retriever.vectorstore, PASTA_INDICE_FAISS, grafo)
+        print("Roteador de consultas carregado.")
+        return roteador
+    except Exception as e:
+        print(f"AVISO: roteador de consultas desativado ({e}).")
+        return None
+
 @st.cache_resource
 def carregar_modelos_llm():
 
@@ -133,7 +194,7 @@ def carregar_modelos_llm():
         return None, None
 
 @st.cache_resource
-def criar_chains(_llm_class, _llm_multiquery, _llm_chitchat):
+def criar_chains(_llm_class, _llm_multiquery, _llm_chitchat, num_variacoes=NUM_VARIACOES):
 
     classify_prompt = ChatPromptTemplate.from_template("""
 Analise a pergunta do usuário e classifique-a:
@@ -146,14 +207,14 @@ Pergunta: {input}
     
     multiquery_prompt = ChatPromptTemplate.from_template("""
 Você é um assistente de IA especializado em reformular perguntas para um sistema de busca acadêmico.
-Sua tarefa é gerar 3 versões diferentes da pergunta do usuário para ajudar a encontrar a resposta correta nos documentos do IFMA.
+Sua tarefa é gerar {num_variacoes} versões diferentes da pergunta do usuário para ajudar a encontrar a resposta correta nos documentos do IFMA.
 Diretrizes:
 1. Use sinônimos técnicos (ex: "jubilamento" -> "desligamento", "cancelamento").
 2. Se a pergunta for sobre "quais disciplinas" ou "quais matérias", inclua variações como "qual a grade curricular completa" e "lista de componentes obrigatórios".
 3. Separe as perguntas por novas linhas. Não numere.
 
 Pergunta original: {input}
-""")
+""").partial(num_variacoes=str(num_variacoes))
     multiquery_chain = multiquery_prompt | _llm_multiquery | StrOutputParser()
 
     chitchat_prompt = ChatPromptTemplate.from_template("""
@@ -166,6 +227,11 @@ Resposta:
     
     return classify_chain, multiquery_chain, chitchat_chain
 
+@st.cache_resource
+def carregar_executor():
+    # Compartilhado entre as sessões: roda as etapas especulativas de cada pergunta.
+    return criar_executor()
+
 def normalizar(s):
     if not s: return ""
     s = str(s).lower().strip()
@@ -173,6 +239,57 @@ def normalizar(s):
     s = re.sub(r'[^\w\s]', '', s)
     return s
 
+PALAVRAS_ACADEMICAS = [
+    "academico", "academica", "ppc", "documento",
+    "oficial", "curricular", "matriz", "disciplina", 
+    "curso", "regra", "horas", "optativa"
+]
+
+@st.cache_resource
+def carregar_cache_respostas():
+    # Compartilhado entre as sessões; esvaziado sozinho quando a versão do índice muda.
+    return CacheRespostas()
+
+@st.cache_resource
+def carregar_classificador():
+    # Opcional: sem o modelo treinado (classificador_intencao.py --treinar), toda pergunta vai ao LLM.
+    classificador = carregar_classificador_intencao(ARQUIVO_MODELO_INTENCAO)
+    if classificador is None:
+        print(f"AVISO: '{ARQUIVO_MODELO_INTENCAO}' não encontrado; classificação só pelo LLM.")
+    else:
+        print("Classificador local de intenção carregado.")
+    return classificador
+
+@st.cache_resource
+def carregar_registro_rotulos():
+    # Opt-in (REGISTRAR_CLASSIFICACOES=1): o log guarda o texto das perguntas.
+    return criar_registro_rotulos()
+
+def classificar_localmente(classificador, pergunta):
+    if classificador is None:
+        return None
+    rotulo, probabilidade = classificador.classificar(pergunta)
+    if rotulo is None:
+        return None
+    print(f"Log: Classificador local='{rotulo}' (p_academico={probabilidade:.2f}), sem LLM.")
+    return rotulo == ACADEMICO
+
+def classificar(classify_chain, pergunta):
+    topico_raw = classify_chain.invoke(pergunta)
+
+    topico = normalizar(topico_raw)
+    print(f"Log: Classificador bruto='{topico_raw}' | normalizado='{topico}'")
+
+    if not topico:
+        print("Log: Classificação vazia, assumindo Acadêmico por segurança.")
+        return True
+    eh_academico = any(p in topico for p in PALAVRAS_ACADEMICAS)
+    # Os rótulos do LLM alimentam o próximo treino do classificador local.
+    registro = carregar_registro_rotulos()
+    if registro is not None:
+        registro.registrar(pergunta, ACADEMICO if eh_academico else CHITCHAT)
+    return eh_academico
+
 #st.set_page_config(page_title="Assistente SI - IFMA", page_icon="🤖")
 
 aplicar_estilo_responsivo()
@@ -190,12 +307,15 @@ st.title("🤖 Assistente Virtual de Sistemas de Informação - IFMA")
 st.caption("Pergunte sobre disciplinas, regras do curso, equivalências...")
 
 carregar_api_keys()
-retriever = carregar_retriever()
+versao_indice = versao_do_indice(PASTA_INDICE_FAISS)
+retriever = carregar_retriever(versao_indice)
+roteador = carregar_roteador(retriever, versao_indice) if retriever else None
 llm_resp, llm_class, llm_multiquery, llm_chitchat = carregar_modelos_llm()
 
 if retriever and llm_resp and llm_class and llm_multiquery and llm_chitchat:
     
-    classify_chain, multiquery_chain, chitchat_chain = criar_chains(llm_class, llm_multiquery, llm_chitchat)
+    num_variacoes = NUM_VARIACOES_HIBRIDA if isinstance(retriever, RetrieverHibrido) else NUM_VARIACOES
+    classify_chain, multiquery_chain, chitchat_chain = criar_chains(llm_class, llm_multiquery, llm_chitchat, num_variacoes)
 
     if "messages" not in st.session_state:
         st.session_state.messages = []
@@ -211,51 +331,44 @@ if retriever and llm_resp and llm_class and llm_multiquery and llm_chitchat:
             st.markdown(prompt_pergunta)
 
         with st.chat_message("assistant"):
-            with st.spinner("Assistente: Entendendo a pergunta..."):
-                try:
-                    topico_raw = classify_chain.invoke(prompt_pergunta)
-
-                    topico = normalizar(topico_raw)
-                    print(f"Log: Classificador bruto='{topico_raw}' | normalizado='{topico}'")
-
-                    PALAVRAS_ACADEMICAS = [
-                        "academico", "academica", "ppc", "documento",
-                        "oficial", "curricular", "matriz", "disciplina", 
-                        "curso", "regra", "horas", "optativa"
-                    ]
-
-                    eh_academico = any(p in topico for p in PALAVRAS_ACADEMICAS)
-
-                    if not topico:
-                        eh_academico = True
-                        print("Log: Classificação vazia, assumindo Acadêmico por segurança.")
+            try:
+                fluxo = None
+                with st.spinner("Assistente: Entendendo a pergunta..."):
+                    # Classificação, multiquery e a primeira busca correm juntas; o multiquery e a
+                    # busca são descartados se a pergunta for chitchat ou já tiver resposta no cache.
+                    cronometro = Cronometro()
+                    cache_respostas = carregar_cache_respostas()
+                    busca = buscar_contexto(
+                        prompt_pergunta, partial(classificar, classify_chain), multiquery_chain.invoke, retriever, roteador,
+                        carregar_executor(), cronometro, num_variacoes,
+                        partial(classificar_localmente, carregar_classificador()), cache_respostas, versao_indice,
+                        carregar_caches_consulta())
+                    eh_academico, rota, docs_unicos = busca['academico'], busca['rota'], busca['documentos']
 
                     if eh_academico:
                         st.spinner("Assistente: *Consultando documentos oficiais...*")
-                        
-                        variacoes_str = multiquery_chain.invoke(prompt_pergunta)
-                        lista_perguntas = [prompt_pergunta] + variacoes_str.strip().split('\n')
-                        print(f"Log: Perguntas geradas: {lista_perguntas}") 
-                    
-                        todos_docs = []
-                        for p in lista_perguntas:
-                            if p.strip():
-                                docs = retriever.invoke(p.strip())
-                                todos_docs.extend(docs)
-                    
-                        docs_unicos = []
-                        conteudos_vistos = set()
-                        for doc in todos_docs:
-                            if doc.page_content not in conteudos_vistos:
-                                docs_unicos.append(doc)
-                                conteudos_vistos.add(doc.page_content)
+
+                        if rota and not busca['em_cache']:
+                            print(f"Log: Rota '{rota['intencao']}' ({rota['valores']}): "
+                                  f"{len(docs_unicos)} chunks pelos metadados, sem multiquery.")
                     
-                        if not docs_unicos:
+                        if busca['em_cache']:
+                            entrada = busca['em_cache']
+                            resposta_final = entrada['resposta']
+                            print(f"Log: Cache de respostas: similaridade {entrada['similaridade']:.3f} com "
+                                  f"'{entrada['pergunta']}' (~{entrada['segundos']:.1f} s economizados). "
+                                  f"{cache_respostas.estatisticas()}")
+
+                        elif not docs_unicos:
                             resposta_final = "Desculpe, não encontrei nenhuma informação relevante nos documentos oficiais sobre esse assunto específico."
                             print("Log: Curto-circuito ativado (0 documentos encontrados).")
                    
                         else:
-                            contexto = "\n\n".join([d.page_content for d in docs_unicos[:10]])
+                            # Vizinhos da mesma seção juntados, repetidos descartados, dentro do orçamento de tokens.
+                            pacote, tokens_contexto = empacotar_contexto(docs_unicos, ORCAMENTO_TOKENS_CONTEXTO)
+                            contexto = "\n\n".join([d.page_content for d in pacote])
+                            print(f"Log: Contexto com {len(pacote)} blocos de {len(docs_unicos)} chunks, "
+                                  f"~{tokens_contexto} tokens (orçamento {ORCAMENTO_TOKENS_CONTEXTO}).")
 
                             prompt_rag = f"""
 Você é um assistente acadêmico especialista no curso de Sistemas de Informação do IFMA.
@@ -282,20 +395,29 @@ Pergunta do Aluno:
 
 Resposta Completa e Prestativa:
 """
-                            resposta_obj = llm_resp.invoke(prompt_rag)
-                            if resposta_obj and hasattr(resposta_obj, 'content'):
-                                resposta_final = resposta_obj.content
-                            else:
-                                resposta_final = "Desculpe, não consegui gerar uma resposta."
+                            fluxo = cronometro.transmitir("resposta", llm_resp.stream(prompt_rag))
                     
                     else:
                         st.spinner("Assistente: Pensando...")
-                        resposta_final = chitchat_chain.invoke(prompt_pergunta)
-                    
+                        fluxo = cronometro.transmitir("chitchat", chitchat_chain.stream(prompt_pergunta))
+
+                # Fora do spinner: a resposta aparece no balão à medida que os tokens chegam.
+                if fluxo is not None:
+                    resposta_final = st.write_stream(fluxo)
+                    if not resposta_final:
+                        resposta_final = "Desculpe, não consegui gerar uma resposta."
+                        st.markdown(resposta_final)
+                    elif eh_academico:
+                        cache_respostas.guardar(prompt_pergunta, busca['vetor'], busca['assinatura'], resposta_final,
+                                                versao_indice, time.perf_counter() - cronometro.inicio)
+                else:
                     st.markdown(resposta_final)
-                    st.session_state.messages.append({"role": "assistant", "content": resposta_final})
 
-                except Exception as e:
-                    st.error(f"Ocorreu um erro ao gerar a resposta: {e}")
+                print(f"Log: Tempos: {cronometro.resumo()}")
+                print(f"Log: Caches de consulta: {carregar_caches_consulta().estatisticas()}")
+                st.session_state.messages.append({"role": "assistant", "content": resposta_final})
+
+            except Exception as e:
+                st.error(f"Ocorreu um erro ao gerar a resposta: {e}")
 else:
     st.error("O chatbot não pôde ser inicializado.")
\ No newline at end of file